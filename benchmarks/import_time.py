@@ -0,0 +1,71 @@
+"""
+Checks the import time of a halutz module against a budget, and that
+importing it does not load the heavy dependencies, which are imported
+when first used.  The exit status is 1 if the check fails:
+
+    $ python -m benchmarks.import_time
+    $ python -m benchmarks.import_time --module halutz.indexer --budget 0.2
+"""
+import re
+import sys
+import json
+import argparse
+import subprocess
+
+# the dependencies that are not loaded when halutz is imported
+DEFERRED = ('bravado', 'bravado_core', 'requests', 'urllib3', 'msgpack',
+            'python_jsonschema_objects', 'jsonschema', 'inflection', 'yaml')
+
+_importtime_line = re.compile(r'import time:\s+\d+\s+\|\s+(\d+)\s+\|\s*(\S+)')
+
+_script = """
+import sys
+import {module}
+print(' '.join(sorted(set(name.partition('.')[0] for name in sys.modules))))
+"""
+
+
+def measure(module):
+    """ returns the (seconds, top-level module names loaded) of a fresh import of `module` """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _script.format(module=module)],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+
+    usec = max(int(found.group(1)) for found in map(_importtime_line.match, proc.stderr.splitlines())
+               if found and found.group(2) == module)
+
+    return usec / 1e6, set(proc.stdout.split())
+
+
+def run(module='halutz.client', budget=0.1, repeat=5, deferred=DEFERRED):
+    # the best of `repeat` imports, so that a busy machine does not fail the check
+    measures = [measure(module) for _ in range(repeat)]
+    seconds = min(each[0] for each in measures)
+    loaded = sorted(set(deferred) & measures[0][1])
+
+    return {
+        'module': module,
+        'import_sec': round(seconds, 4),
+        'budget_sec': budget,
+        'loaded_deferred': loaded,
+        'ok': seconds <= budget and not loaded
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--module', default='halutz.client')
+    parser.add_argument('--budget', type=float, default=0.1,
+                        help='import time budget (seconds)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    result = run(args.module, args.budget, args.repeat)
+    print(json.dumps(result, indent=3))
+
+    if not result['ok']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Compares the memory used by an Indexer catalog of item dicts with the
+compact (record) catalog:
+
+    $ python -m benchmarks.indexer_memory --items 200000
+"""
+import gc
+import json
+import time
+import argparse
+import tracemalloc
+
+from halutz.client import Client
+from halutz.indexer import Indexer
+
+from .specs import make_spec, make_items
+
+
+def measure(client, payload, compact):
+    """ returns the (current, peak) traced bytes and seconds of ingesting the payload """
+    gc.collect()
+    tracemalloc.start()
+    start = time.time()
+
+    indexer = Indexer(client.request.resource0.list_resource0,
+                      name_from='label', compact=compact)
+
+    # decode the payload here, as it would be from a response, so that
+    # the decoded items are part of what is measured.
+
+    indexer.ingest_from_list(json.loads(payload)['items'])
+    elapsed = time.time() - start
+
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # access every item, so that the record access cost is included
+    start = time.time()
+    for item in indexer:
+        item.value['label']
+    access = time.time() - start
+
+    return {'current_mb': round(current / 1e6, 1), 'peak_mb': round(peak / 1e6, 1),
+            'ingest_sec': round(elapsed, 3), 'access_sec': round(access, 3)}
+
+
+def run(n_items=100000, n_props=10):
+    client = Client('http://localhost', origin_spec=make_spec(1, n_props))
+    payload = json.dumps({'items': make_items(n_items, n_props), 'count': n_items})
+
+    return {
+        'items': n_items,
+        'props': n_props,
+        'dict': measure(client, payload, compact=False),
+        'compact': measure(client, payload, compact=True)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=100000)
+    parser.add_argument('--props', type=int, default=10)
+    args = parser.parse_args()
+    print(json.dumps(run(args.items, args.props), indent=3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Local stand-in HTTP server for the benchmark spec (see benchmarks.specs).
+Every resource collection serves the same list of items:
+
+    GET     /api/<resource>             {'items': [...], 'count': n}, sliced by offset/limit
+    GET     /api/<resource>/<id>        an item
+    POST    /api/<resource>             the request body, 201
+    PUT     /api/<resource>/<id>        the request body
+    DELETE  /api/<resource>/<id>        204
+
+The list responses are encoded once and cached, so that the server adds
+as little as possible to the time measured on the client side.
+
+    >>> with MockServer(make_items(10000)) as server:
+    ...     client = Client(server.url, origin_spec=server.spec(10))
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs
+
+from .specs import make_spec, make_items
+
+__all__ = ['MockServer']
+
+
+class _HTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    # the headers and the body are separate writes; without this the body
+    # waits on the client's delayed ACK of the headers.
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def mock(self):
+        return self.server.mock
+
+    def _send(self, status, body=b'', content_type='application/json'):
+        self.send_response(status)
+        if body:
+            self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def _parts(self):
+        path, _, query = self.path.partition('?')
+        return path.strip('/').split('/'), query
+
+    def do_GET(self):
+        parts, query = self._parts()
+        if len(parts) == 2:
+            params = dict((name, int(values[0])) for name, values in parse_qs(query).items())
+            return self._send(200, self.mock.list_body(params.get('offset', 0), params.get('limit')))
+
+        if len(parts) == 3:
+            return self._send(200, self.mock.item_body(parts[2]))
+
+        self._send(404)
+
+    def do_POST(self):
+        self._send(201, self._read_body())
+
+    def do_PUT(self):
+        self._send(200, self._read_body())
+
+    def do_DELETE(self):
+        self._send(204)
+
+
+class MockServer(object):
+    """ the benchmark server, on a free localhost port; `url` is set once started """
+
+    def __init__(self, items=None, host='127.0.0.1', port=0):
+        self.host, self.port = host, port
+        self.url = None
+        self._httpd = None
+        self.set_items(items if items is not None else make_items(100))
+
+    def set_items(self, items):
+        """ replaces the items served by the list operations """
+        self.items = items
+        self._bodies = dict()
+        self._item_body = json.dumps(items[0] if items else {}).encode('utf-8')
+
+    def list_body(self, offset=0, limit=None):
+        key = (offset, limit)
+        body = self._bodies.get(key)
+        if body is None:
+            end = None if limit is None else offset + limit
+            body = self._bodies[key] = json.dumps(
+                {'items': self.items[offset:end], 'count': len(self.items)}).encode('utf-8')
+        return body
+
+    def item_body(self, item_id):
+        return self._item_body
+
+    def spec(self, n_resources, n_props=10):
+        """ returns the benchmark spec, with the host of this server """
+        spec = make_spec(n_resources, n_props)
+        spec['host'] = '%s:%d' % (self.host, self.port)
+        return spec
+
+    def start(self):
+        self._httpd = _HTTPServer((self.host, self.port), _Handler)
+        self._httpd.mock = self
+        self.port = self._httpd.server_address[1]
+        self.url = 'http://%s:%d' % (self.host, self.port)
+
+        thread = threading.Thread(target=self._httpd.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,87 @@
+"""
+Measures the memory used by Client startup, relative to the size of the
+spec JSON, when the origin_spec is copied (the default), when it is used
+as-is (copy_spec=False), and when it is loaded from a spec_file; and the
+memory used to build all the model classes:
+
+    $ python -m benchmarks.spec_memory --size huge
+"""
+import gc
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+
+from halutz.client import Client
+
+from .specs import make_spec, SPEC_SIZES
+
+
+def measure(func):
+    """ returns the (current, peak) traced MB, and seconds, of calling `func`; and its return value """
+    gc.collect()
+    tracemalloc.start()
+    start = time.time()
+
+    value = func()
+
+    elapsed = time.time() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'current_mb': round(current / 1e6, 1), 'peak_mb': round(peak / 1e6, 1),
+            'sec': round(elapsed, 3)}, value
+
+
+def run(size='medium'):
+    spec_text = json.dumps(make_spec(SPEC_SIZES[size]))
+    workdir = tempfile.mkdtemp(prefix='halutz-bench-')
+    spec_file = os.path.join(workdir, 'spec.json')
+    with open(spec_file, 'w') as ofile:
+        ofile.write(spec_text)
+
+    results = {'size': size, 'json_mb': round(len(spec_text) / 1e6, 1)}
+
+    # a first client, so that the (deferred) imports are not measured
+    Client('http://localhost', origin_spec=make_spec(1))
+
+    try:
+        # the spec dict is loaded before measuring, as a caller would have it
+        results['dict'], _ = measure(lambda: json.loads(spec_text))
+
+        for name, copy_spec in (('copy', True), ('no_copy', False)):
+            origin_spec = json.loads(spec_text)
+            results[name], client = measure(
+                lambda: Client('http://localhost', origin_spec=origin_spec, copy_spec=copy_spec))
+            del client, origin_spec
+
+        # the spec loaded from the file is included in this measure
+        results['spec_file'], client = measure(
+            lambda: Client('http://localhost', spec_file=spec_file))
+
+        def build_models():
+            for model_name in client.definitions:
+                client.build.model_class(model_name)
+
+        client.build.model_cache.maxsize = None
+        results['models'], _ = measure(build_models)
+
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', choices=sorted(SPEC_SIZES), default='medium')
+    args = parser.parse_args()
+    print(json.dumps(run(args.size), indent=3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Synthetic OpenAPI (swagger 2.0) specs used by the benchmarks.  The specs
+look like a typical network-automation API: a set of resource
+collections, each with list/create/get/update/delete operations, a body
+schema, and a response schema with an "items" list.
+"""
+
+SPEC_SIZES = {
+    'small': 10,
+    'medium': 100,
+    'huge': 1000
+}
+
+
+def item_schema(n_props):
+    props = {'id': {'type': 'string'}, 'label': {'type': 'string'}}
+    props.update({
+        'prop_%d' % i: {'type': ['string', 'integer', 'boolean'][i % 3]}
+        for i in range(n_props)})
+
+    return {'type': 'object', 'required': ['label'], 'properties': props}
+
+
+def make_spec(n_resources, n_props=10):
+    """ returns a swagger spec dict with `n_resources` collections (5 operations each) """
+
+    paths = dict()
+    definitions = dict()
+
+    for r_num in range(n_resources):
+        rsrc = 'resource%d' % r_num
+        model = 'Resource%d' % r_num
+        model_ref = {'$ref': '#/definitions/%s' % model}
+        tags = [rsrc]
+
+        definitions[model] = item_schema(n_props)
+        definitions[model + 'List'] = {
+            'type': 'object',
+            'properties': {
+                'items': {'type': 'array', 'items': model_ref},
+                'count': {'type': 'integer'}}}
+
+        id_param = {'name': 'id', 'in': 'path', 'type': 'string', 'required': True}
+        body_param = {'name': 'data', 'in': 'body', 'required': True, 'schema': model_ref}
+
+        paths['/api/%s' % rsrc] = {
+            'get': {
+                'operationId': 'list_%s' % rsrc, 'tags': tags,
+                'parameters': [
+                    {'name': 'offset', 'in': 'query', 'type': 'integer'},
+                    {'name': 'limit', 'in': 'query', 'type': 'integer'}],
+                'responses': {'200': {
+                    'description': 'ok',
+                    'schema': {'$ref': '#/definitions/%sList' % model}}}},
+            'post': {
+                'operationId': 'create_%s' % rsrc, 'tags': tags,
+                'parameters': [body_param],
+                'responses': {'201': {'description': 'ok', 'schema': model_ref}}}
+        }
+
+        paths['/api/%s/{id}' % rsrc] = {
+            'get': {
+                'operationId': 'get_%s' % rsrc, 'tags': tags,
+                'parameters': [id_param],
+                'responses': {'200': {'description': 'ok', 'schema': model_ref}}},
+            'put': {
+                'operationId': 'update_%s' % rsrc, 'tags': tags,
+                'parameters': [id_param, body_param],
+                'responses': {'200': {'description': 'ok', 'schema': model_ref}}},
+            'delete': {
+                'operationId': 'delete_%s' % rsrc, 'tags': tags,
+                'parameters': [id_param],
+                'responses': {'204': {'description': 'deleted'}}}
+        }
+
+    return {
+        'swagger': '2.0',
+        'info': {'title': 'halutz benchmark', 'version': '1.0'},
+        'host': 'localhost',
+        'schemes': ['http'],
+        'consumes': ['application/json'],
+        'produces': ['application/json'],
+        'paths': paths,
+        'definitions': definitions
+    }
+
+
+def make_items(n_items, n_props=10):
+    """ returns a list of `n_items` item dicts matching :func:`item_schema` """
+    return [
+        dict({'id': 'id-%d' % i, 'label': 'item-%d' % i},
+             **{'prop_%d' % p: [str(p), p, bool(p % 2)][p % 3] for p in range(n_props)})
+        for i in range(n_items)]
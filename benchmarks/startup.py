@@ -0,0 +1,64 @@
+"""
+Compares Client startup with and without a compiled spec artifact, and
+in lazy mode:
+
+    $ python -m benchmarks.startup --size huge
+"""
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+from halutz.client import Client
+
+from .specs import make_spec, SPEC_SIZES
+
+
+def timed(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        times.append(time.time() - start)
+    return min(times)
+
+
+def run(size='medium', repeat=3):
+    workdir = tempfile.mkdtemp(prefix='halutz-bench-')
+    try:
+        spec_file = os.path.join(workdir, 'spec.json')
+        cache_dir = os.path.join(workdir, 'cache')
+        json.dump(make_spec(SPEC_SIZES[size]), open(spec_file, 'w'))
+
+        def cold():
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            Client('http://localhost', spec_file=spec_file, spec_cache=cache_dir)
+
+        def warm():
+            Client('http://localhost', spec_file=spec_file, spec_cache=cache_dir)
+
+        results = {
+            'size': size,
+            'no_cache': timed(lambda: Client('http://localhost', spec_file=spec_file), repeat),
+            'cold': timed(cold, repeat),
+            'warm': timed(warm, repeat),
+            'lazy': timed(lambda: Client('http://localhost', spec_file=spec_file, lazy=True), repeat)
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', choices=sorted(SPEC_SIZES), default='medium')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps(run(args.size, args.repeat), indent=3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+"""
+Benchmark suite of the halutz hot paths, run against a local mock server
+(see benchmarks.server):
+
+    startup         Client startup on the small/medium/huge specs
+    factory         Request creation through the RequestFactory
+    call            Request call throughput, sequential and concurrent
+    indexer         Indexer.run ingest of 10k (and more) items
+    models          SchemaObjectFactory class build and instantiation
+
+The results are written as JSON; result names ending with '_sec' are
+times (lower is better), and those ending with '_per_sec' are rates
+(higher is better).  When a baseline results file is given, the results
+that are worse than the baseline by more than the tolerance are reported,
+and the exit status is 1:
+
+    $ python -m benchmarks.suite --output results.json
+    $ python -m benchmarks.suite --baseline results.json --only call indexer
+    $ python -m benchmarks.suite --items 10000 100000 1000000
+"""
+import sys
+import json
+import time
+import platform
+import argparse
+from collections import OrderedDict
+
+from halutz import __version__
+from halutz.client import Client
+from halutz.indexer import Indexer
+
+from .specs import make_items, SPEC_SIZES
+from .server import MockServer
+
+
+def timed(func, repeat=3):
+    """ returns the best time of `repeat` calls of `func` """
+    times = []
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        times.append(time.time() - start)
+    return min(times)
+
+
+def rate(count, seconds):
+    return round(count / seconds, 1) if seconds else None
+
+
+def bench_startup(server, args):
+    results = dict()
+    for size in args.sizes:
+        spec = server.spec(SPEC_SIZES[size])
+        results['%s_sec' % size] = round(timed(
+            lambda: Client(server.url, origin_spec=spec), args.repeat), 4)
+        results['%s_lazy_sec' % size] = round(timed(
+            lambda: Client(server.url, origin_spec=spec, lazy=True), args.repeat), 4)
+    return results
+
+
+def bench_factory(server, args):
+    client = Client(server.url, origin_spec=server.spec(SPEC_SIZES['medium']))
+    results = dict()
+
+    for cache_requests in (False, True):
+        client.cache_requests = cache_requests
+        name = 'cached' if cache_requests else 'uncached'
+
+        def make_requests():
+            for _ in range(args.calls):
+                client.request.resource0.update_resource0
+
+        results['%s_per_sec' % name] = rate(args.calls, timed(make_requests, args.repeat))
+
+    return results
+
+
+def bench_call(server, args):
+    client = Client(server.url, origin_spec=server.spec(SPEC_SIZES['small']))
+    client.cache_requests = True
+    server.set_items(make_items(100))
+    results = dict()
+
+    get_item = client.request.resource0.get_resource0
+    list_items = client.request.resource0.list_resource0
+
+    for model_response in (False, 'view', True):
+        get_item.model_response = model_response
+        name = {False: 'get', 'view': 'get_view', True: 'get_model'}[model_response]
+
+        def calls():
+            for _ in range(args.calls):
+                get_item(id='x')
+
+        results['%s_per_sec' % name] = rate(args.calls, timed(calls, args.repeat))
+
+    def list_calls():
+        for _ in range(args.calls):
+            list_items(limit=100)
+
+    results['list_100_per_sec'] = rate(args.calls, timed(list_calls, args.repeat))
+
+    param_list = [dict(id=str(each)) for each in range(args.calls)]
+    get_item.model_response = False
+    results['map_%d_workers_per_sec' % args.workers] = rate(args.calls, timed(
+        lambda: get_item.map(param_list, max_workers=args.workers), args.repeat))
+
+    return results
+
+
+def bench_indexer(server, args):
+    client = Client(server.url, origin_spec=server.spec(SPEC_SIZES['small']))
+    results = dict()
+
+    for n_items in args.items:
+        server.set_items(make_items(n_items))
+
+        # the first list call encodes (and caches) the response on the server
+        server.list_body()
+
+        for name, options in (('dict', {}), ('compact', {'compact': True}),
+                              ('streaming', {'streaming': True})):
+            indexer = Indexer(client.request.resource0.list_resource0,
+                              name_from='label', **options)
+            seconds = timed(indexer.run, 1 if n_items > 100000 else args.repeat)
+            results['%d_%s_sec' % (n_items, name)] = round(seconds, 3)
+            results['%d_%s_items_per_sec' % (n_items, name)] = rate(n_items, seconds)
+
+    server.set_items(make_items(100))
+    return results
+
+
+def bench_models(server, args):
+    client = Client(server.url, origin_spec=server.spec(SPEC_SIZES['small']))
+    build = client.build
+    item = make_items(1)[0]
+
+    def build_classes():
+        build.invalidate()
+        for model_name in client.definitions:
+            build.model_class(model_name)
+
+    results = {
+        'classes': len(client.definitions),
+        'classes_build_sec': round(timed(build_classes, args.repeat), 4)}
+
+    model_cls = build.model_class('Resource0')
+
+    def instantiate():
+        for _ in range(args.calls):
+            model_cls(**item)
+
+    results['instance_per_sec'] = rate(args.calls, timed(instantiate, args.repeat))
+    return results
+
+
+BENCHMARKS = OrderedDict([
+    ('startup', bench_startup),
+    ('factory', bench_factory),
+    ('call', bench_call),
+    ('indexer', bench_indexer),
+    ('models', bench_models)
+])
+
+
+def compare(results, baseline, tolerance):
+    """ returns the list of (name, value, baseline value) of the results worse than the baseline """
+    worse = list()
+    for bench, values in results.items():
+        for name, value in values.items():
+            base = baseline.get(bench, {}).get(name)
+            if value is None or not base:
+                continue
+
+            if name.endswith('_per_sec'):
+                regressed = value < base * (1 - tolerance)
+            elif name.endswith('_sec'):
+                regressed = value > base * (1 + tolerance)
+            else:
+                continue
+
+            if regressed:
+                worse.append(('%s.%s' % (bench, name), value, base))
+
+    return worse
+
+
+def run(args):
+    results = OrderedDict()
+    with MockServer() as server:
+        for name in args.only or BENCHMARKS:
+            print('running %s ...' % name, file=sys.stderr)
+            results[name] = BENCHMARKS[name](server, args)
+
+    return {
+        'meta': {
+            'halutz': __version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'created': time.time()
+        },
+        'results': results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS))
+    parser.add_argument('--sizes', nargs='+', choices=sorted(SPEC_SIZES),
+                        default=['small', 'medium', 'huge'])
+    parser.add_argument('--items', nargs='+', type=int, default=[10000, 100000])
+    parser.add_argument('--calls', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='results JSON file (default: stdout)')
+    parser.add_argument('--baseline', help='results JSON file to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed fraction worse than the baseline')
+    args = parser.parse_args()
+
+    report = run(args)
+    report['meta']['args'] = vars(args)
+
+    if args.output:
+        with open(args.output, 'w') as ofile:
+            json.dump(report, ofile, indent=3)
+    else:
+        print(json.dumps(report, indent=3))
+
+    if args.baseline:
+        with open(args.baseline) as ifile:
+            baseline = json.load(ifile)['results']
+
+        worse = compare(report['results'], baseline, args.tolerance)
+        for name, value, base in worse:
+            print('REGRESSION %s: %s (baseline %s)' % (name, value, base), file=sys.stderr)
+
+        if worse:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
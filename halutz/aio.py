@@ -0,0 +1,232 @@
+"""
+asyncio counterparts to the halutz Client and Request.  Requests are sent
+over a pooled aiohttp session (keep-alive connections are reused), and the
+number of requests in-flight is bounded per client.  This module requires
+python 3 and the `aiohttp` package:
+
+    >>> async with AsyncClient(server_url, origin_spec=spec, max_concurrency=20) as client:
+    ...     rqsts = [client.request.dcim.dcim_devices_read(id=dev_id) for dev_id in dev_ids]
+    ...     results = await asyncio.gather(*rqsts)
+"""
+
+import json
+import asyncio
+
+import six
+import aiohttp
+import bravado.exception
+from bravado.client import construct_request
+from bravado.http_future import unmarshal_response
+from bravado_core.response import IncomingResponse
+
+from .client import Client
+from .request import Request
+from . import codec
+from .metrics import RequestTimer, NULL_TIMER
+
+__all__ = ['AsyncClient', 'AsyncRequest']
+
+
+class AioResponse(IncomingResponse):
+    """ bravado IncomingResponse adapter for an aiohttp response """
+
+    def __init__(self, response, raw_bytes):
+        self.status_code = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+        self.raw_bytes = raw_bytes
+        self._charset = response.charset or 'utf-8'
+
+    @property
+    def text(self):
+        return self.raw_bytes.decode(self._charset, 'replace')
+
+    def json(self, **kwargs):
+        if kwargs:
+            return json.loads(self.text, **kwargs)
+        return codec.json_loads(self.raw_bytes)
+
+
+class AsyncRequest(Request):
+    """
+    A Request whose call is a coroutine.  The synchronous call variants
+    (invoke, stream, paginate, map) are not available; gather the calls
+    instead.
+    """
+
+    def _not_async(self, *args, **kwargs):
+        raise TypeError(
+            'AsyncRequest does not support synchronous calls; await the request call')
+
+    invoke = stream = paginate = map = _not_async
+
+    async def __call__(self, **params):
+        """ execute the request and return the (response, ok) tuple """
+
+        params = self._with_body(params)
+
+        # the timer is not made current, since the tasks of the event loop
+        # share the thread; the phases are timed here.
+
+        timer = RequestTimer(self, self.client.hooks) if self.client.hooks else None
+        if not timer:
+            return (await self._async_invoke(params, NULL_TIMER))[:2]
+
+        try:
+            with timer.phase('total'):
+                result = await self._async_invoke(params, timer)
+        except Exception as exc:
+            timer.report(error=exc)
+            raise
+
+        timer.report(ok=result[1], http_resp=result[2])
+        return result[:2]
+
+    async def _async_invoke(self, params, timer):
+        with timer.phase('marshal'):
+            if self.msgpack:
+                params = self._negotiate(params)
+            request_options = params.pop('_request_options', {})
+            request_params = construct_request(self.operation, request_options, **params)
+
+        with timer.phase('http'):
+            http_resp = await self.client.send(request_params)
+
+        if timer:
+            body = request_params.get('data')
+            timer.request_bytes = len(body) if isinstance(body, (bytes, str)) else 0
+            timer.received(http_resp)
+
+        try:
+            with timer.phase('unmarshal'):
+                unmarshal_response(http_resp, self.operation)
+                resp_data = self._swagger_result(http_resp, http_resp.swagger_result)
+
+            with timer.phase('model'):
+                return self._model(resp_data, http_resp.status_code), True, http_resp
+
+        except bravado.exception.HTTPNotModified as exc:
+            return None, True, exc.response
+
+        except bravado.exception.HTTPClientError as exc:
+            return self._error(exc), False, exc.response
+
+
+class AsyncClient(Client):
+    request_type = AsyncRequest
+
+    # the Client arguments whose features are in the synchronous request
+    # path only.
+    UNSUPPORTED = ('response_cache', 'single_flight', 'resilience', 'rate_limit')
+
+    def __init__(self, server_url, max_concurrency=10, keepalive_timeout=30, **kwargs):
+        """
+        Parameters
+        ----------
+        server_url : str
+            see :class:`Client`
+
+        max_concurrency : int
+            the maximum number of requests in-flight at any time; this
+            is also the size of the connection pool.
+
+        keepalive_timeout : float
+            the number of seconds an idle pooled connection is kept open.
+
+        kwargs :
+            all other :class:`Client` arguments.  If a requests `session` is
+            provided, its headers and cookies are used by the aiohttp session.
+            The `UNSUPPORTED` arguments are not available.
+        """
+        unsupported = [name for name in self.UNSUPPORTED if kwargs.get(name)]
+        if unsupported:
+            raise ValueError('AsyncClient does not support: %s' % ', '.join(unsupported))
+
+        self.max_concurrency = max_concurrency
+        self.keepalive_timeout = keepalive_timeout
+        self.aio_session = None
+        self._in_flight = None
+        super(AsyncClient, self).__init__(server_url, **kwargs)
+
+    def batch(self, max_workers=None):
+        raise RuntimeError('AsyncClient does not support Batch; use asyncio.gather')
+
+    def aio_open(self):
+        """ returns the aiohttp session, creating it in the running loop on first use """
+        if self.aio_session and not self.aio_session.closed:
+            return self.aio_session
+
+        headers = cookies = auth = None
+        if self.session:
+            headers = dict(self.session.headers)
+            cookies = self.session.cookies.get_dict()
+            if isinstance(self.session.auth, tuple):
+                auth = aiohttp.BasicAuth(*self.session.auth)
+
+        self._in_flight = asyncio.Semaphore(self.max_concurrency)
+        self.aio_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.max_concurrency,
+                keepalive_timeout=self.keepalive_timeout),
+            headers=headers, cookies=cookies, auth=auth)
+
+        return self.aio_session
+
+    async def close(self):
+        if self.aio_session:
+            await self.aio_session.close()
+            self.aio_session = None
+
+    async def __aenter__(self):
+        self.aio_open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @staticmethod
+    def _query_items(query_params):
+        # aiohttp only accepts str/int/float query values, so the values
+        # are rendered the same way that requests would.
+
+        items = []
+        for name, value in six.iteritems(query_params):
+            for each_value in (value if isinstance(value, (list, tuple)) else [value]):
+                items.append((name, each_value if isinstance(each_value, six.string_types)
+                              else str(each_value)))
+        return items
+
+    @staticmethod
+    def _form_data(request_params):
+        form = aiohttp.FormData()
+        for name, value in six.iteritems(request_params.get('data') or {}):
+            form.add_field(name, str(value))
+
+        for name, file_tuple in request_params['files']:
+            form.add_field(name, file_tuple[1], filename=file_tuple[0])
+
+        return form
+
+    async def send(self, request_params):
+        """
+        Sends the bravado request (see `bravado.client.construct_request`) and
+        returns the response as a bravado IncomingResponse.
+        """
+        session = self.aio_open()
+
+        data = (self._form_data(request_params) if request_params.get('files')
+                else request_params.get('data'))
+
+        timeout = aiohttp.ClientTimeout(
+            total=request_params.get('timeout'),
+            connect=request_params.get('connect_timeout'))
+
+        async with self._in_flight:
+            async with session.request(
+                    request_params['method'], request_params['url'],
+                    params=self._query_items(request_params.get('params') or {}),
+                    headers=request_params.get('headers'),
+                    data=data, timeout=timeout) as response:
+                raw_bytes = await response.read()
+
+        return AioResponse(response, raw_bytes)
@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import mmap
+import struct
+import pickle
+import hashlib
+from os import path
+from contextlib import contextmanager
+
+import six
+
+try:
+    import fcntl
+except ImportError:     # pragma: no cover, not posix
+    fcntl = None
+
+from . import __version__
+
+__all__ = ['dump_artifact', 'load_artifact', 'read_artifact_header', 'artifact_lock',
+           'SpecCache']
+
+ARTIFACT_MAGIC = b'HLTZ'
+ARTIFACT_VERSION = 1
+
+_header_len = struct.Struct('>I')
+
+
+def _versions():
+    # pickled bravado objects are only good for the library versions that
+    # created them, so these are recorded in (and checked against) the header.
+
+    import bravado_core
+    return {
+        'artifact': ARTIFACT_VERSION,
+        'halutz': __version__,
+        'bravado_core': getattr(bravado_core, 'version', None)}
+
+
+def dump_artifact(filepath, kind, key, payload, **header):
+    """
+    Writes a halutz binary artifact file.  The file is a small JSON
+    header (kind, key, library versions, creation time, and any
+    additional caller `header` values) followed by the pickled payload.
+    The file is written to a temporary name and then moved into place so
+    that concurrent readers never see a partial file.
+    """
+    header.update({
+        'kind': kind,
+        'key': key,
+        'created': time.time(),
+        'versions': _versions()})
+
+    header_bytes = json.dumps(header, sort_keys=True).encode('utf-8')
+    tmp_filepath = "%s.%d.tmp" % (filepath, os.getpid())
+
+    with open(tmp_filepath, 'wb') as ofile:
+        ofile.write(ARTIFACT_MAGIC)
+        ofile.write(_header_len.pack(len(header_bytes)))
+        ofile.write(header_bytes)
+        pickle.dump(payload, ofile, pickle.HIGHEST_PROTOCOL)
+
+    getattr(os, 'replace', os.rename)(tmp_filepath, filepath)
+
+
+def read_artifact_header(ifile):
+    """ returns the header dict of an open artifact file, or None if not an artifact """
+    if ifile.read(len(ARTIFACT_MAGIC)) != ARTIFACT_MAGIC:
+        return None
+
+    header_len, = _header_len.unpack(ifile.read(_header_len.size))
+    return json.loads(ifile.read(header_len).decode('utf-8'))
+
+
+def load_artifact(filepath, kind, key=None, max_age=None, use_mmap=False):
+    """
+    Loads a halutz artifact file.  When `max_age` (seconds) is given, an
+    artifact created longer ago than that is not loaded.  When `use_mmap`
+    is True, the payload is unpickled directly from the memory-mapped file
+    rather than read through the file buffer.
+
+    Returns
+    -------
+    tuple
+        (header, payload) when the file exists, is of the given `kind`, matches
+        `key` (if provided), and was created by the same library versions;
+        otherwise (None, None).
+    """
+    if not path.isfile(filepath):
+        return None, None
+
+    with open(filepath, 'rb') as ifile:
+        try:
+            header = read_artifact_header(ifile)
+        except ValueError:
+            return None, None
+
+        if (not header or header.get('kind') != kind or
+                header.get('versions') != _versions() or
+                (key is not None and header.get('key') != key) or
+                (max_age is not None and time.time() - header['created'] > max_age)):
+            return None, None
+
+        try:
+            if not (use_mmap and six.PY3):
+                return header, pickle.load(ifile)
+
+            mapped = mmap.mmap(ifile.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                with memoryview(mapped)[ifile.tell():] as data:
+                    return header, pickle.loads(data)
+            finally:
+                mapped.close()
+
+        except (EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return None, None
+
+
+@contextmanager
+def artifact_lock(filepath):
+    """
+    Exclusive (inter-process) lock used while creating the artifact at
+    `filepath`; so that concurrent processes wait for one of them to
+    create it, rather than all doing the same work.  This is a no-op where
+    `fcntl` is not available.
+    """
+    if not fcntl:
+        yield
+        return
+
+    with open(filepath + '.lock', 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+class SpecCache(object):
+    """
+    Directory of "compiled spec" artifacts.  Each artifact holds the
+    origin_spec together with the fully built bravado Spec (resources,
+    operations, and definitions) so that a Client can skip the spec copy
+    and the bravado build when the spec has not changed.
+    """
+    KIND = 'spec'
+    file_spec = "{key}.halutz-spec"
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        if not path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+
+    @staticmethod
+    def dict_key(origin_spec, flavor=''):
+        """ key for an in-memory spec dictionary """
+        spec_text = json.dumps(origin_spec, sort_keys=True, separators=(',', ':'))
+        digest = hashlib.sha256(spec_text.encode('utf-8')).hexdigest()
+        return digest + flavor
+
+    @staticmethod
+    def file_key(spec_file, flavor=''):
+        """ key for a spec file; hashing the raw file avoids the json load """
+        digest = hashlib.sha256()
+        with open(spec_file, 'rb') as ifile:
+            for chunk in iter(lambda: ifile.read(1 << 20), b''):
+                digest.update(chunk)
+
+        return digest.hexdigest() + flavor
+
+    def filepath(self, key):
+        return path.join(self.cache_dir, self.file_spec.format(key=key))
+
+    def load(self, key):
+        """ returns the (origin_spec, swagger_spec) for `key`, or None if not cached """
+        header, payload = load_artifact(self.filepath(key), kind=self.KIND, key=key)
+        return payload
+
+    def save(self, key, origin_spec, swagger_spec):
+        # the http-client (and the requests session it holds) belongs to the
+        # running Client, and is not stored in the artifact.
+
+        http_client, swagger_spec.http_client = swagger_spec.http_client, None
+        try:
+            dump_artifact(self.filepath(key), kind=self.KIND, key=key,
+                          payload=(origin_spec, swagger_spec))
+        finally:
+            swagger_spec.http_client = http_client
@@ -0,0 +1,130 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .models import ValidationError
+
+__all__ = ['Batch', 'BatchResult']
+
+
+# the outcome of one call in a batch.  `resp` and `ok` are the values
+# returned by the Request call; `error` is the exception raised by the call
+# (if any), in which case `resp` is None and `ok` is False.
+
+BatchResult = namedtuple('BatchResult', 'index request params resp ok error')
+
+
+class Batch(object):
+    """
+    Executes many Request calls concurrently using a thread pool.  All of
+    the calls share the client's requests session, and so its connection
+    pool.  The pool of the session created by the client is sized to the
+    number of workers.  A session provided by the caller is used as-is:
+    its pool size (requests' default is 10 connections per host) is for
+    the caller to set, e.g. by mounting an HTTPAdapter(pool_maxsize=...),
+    and the calls beyond it use connections that are not kept.
+
+        >>> batch = client.batch(max_workers=20)
+        >>> for dev_id in dev_ids:
+        ...     batch.add(client.request.dcim.dcim_devices_read, id=dev_id)
+        >>> for result in batch.run():
+        ...     print(result.params['id'], result.ok)
+    """
+    # the requests.adapters DEFAULT_POOLSIZE
+    DEFAULT_WORKERS = 10
+
+    def __init__(self, client, max_workers=DEFAULT_WORKERS):
+        self.client = client
+        self.max_workers = max_workers
+        self.calls = list()
+
+        # (key, value) = (call index, exception) of the calls that are not
+        # sent, see `validate`.
+        self.rejected = dict()
+
+        self._size_pool()
+
+    def _size_pool(self):
+        from requests.adapters import HTTPAdapter, DEFAULT_POOLSIZE
+
+        # only the adapters the client created with its session are
+        # resized; the session of the caller, or an adapter the caller
+        # mounted on the client session, keeps its settings (retries, TLS).
+
+        http_client = self.client.swagger_spec.http_client
+        adapters = getattr(http_client, 'pool_adapters', None)
+        pool_maxsize = getattr(http_client, 'pool_maxsize', DEFAULT_POOLSIZE)
+        if not adapters or pool_maxsize >= self.max_workers:
+            return
+
+        session = http_client.session
+        for prefix, adapter in list(adapters.items()):
+            if session.adapters.get(prefix) is adapter:
+                adapters[prefix] = HTTPAdapter(pool_maxsize=self.max_workers)
+                session.mount(prefix, adapters[prefix])
+
+        http_client.pool_maxsize = self.max_workers
+
+    def add(self, request, **params):
+        """
+        Adds a call of `request` with `params` to the batch, and returns the
+        call index.  If the request has a body parameter that is not in
+        `params`, the request body attribute value is captured now; so that
+        the request instance can be re-used (and its body changed) for the
+        next call.
+        """
+        self.calls.append((request, request._with_body(params)))
+        return len(self.calls) - 1
+
+    def extend(self, request, param_list):
+        for params in param_list:
+            self.add(request, **params)
+
+    def validate(self):
+        """
+        Validates the bodies of the calls, with the compiled body validator
+        of each request (see Request.validate_many).  The calls with an
+        invalid body are not sent; their BatchResult error is the
+        ValidationError.  Returns the number of invalid calls.
+        """
+        # (key, value) = (id(request), (request, [call index, ...]))
+        by_request = dict()
+        for index, (request, params) in enumerate(self.calls):
+            if request.body_param:
+                by_request.setdefault(id(request), (request, []))[1].append(index)
+
+        for request, indexes in by_request.values():
+            bodies = (self.calls[index][1].get(request.body_param) for index in indexes)
+            for position, errors in request.validate_many(bodies).items():
+                self.rejected[indexes[position]] = ValidationError(errors)
+
+        return len(self.rejected)
+
+    def __len__(self):
+        return len(self.calls)
+
+    @staticmethod
+    def _call(index, request, params, error=None):
+        if error:
+            return BatchResult(index, request, params, None, False, error)
+
+        try:
+            resp, ok = request(**params)
+            return BatchResult(index, request, params, resp, ok, None)
+        except Exception as exc:
+            return BatchResult(index, request, params, None, False, exc)
+
+    def _submit(self, executor):
+        return [executor.submit(self._call, index, request, dict(params),
+                                self.rejected.get(index))
+                for index, (request, params) in enumerate(self.calls)]
+
+    def run(self):
+        """ execute all calls and return the list of BatchResult, in call order """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return [future.result() for future in self._submit(executor)]
+
+    def as_completed(self):
+        """ execute all calls, yielding each BatchResult as its call completes """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for future in as_completed(self._submit(executor)):
+                yield future.result()
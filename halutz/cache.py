@@ -0,0 +1,70 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+__all__ = ['LRUCache', 'CacheInfo']
+
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses evictions maxsize currsize')
+
+
+class LRUCache(object):
+    """
+    A thread-safe least-recently-used cache with hit/miss/eviction
+    statistics.  A `maxsize` of None means the cache is unbounded.
+    """
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self._items[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = value
+            while self.maxsize is not None and len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_create(self, key, create):
+        """ returns the cached value for `key`, calling `create()` to make it on a miss """
+        value = self.get(key)
+        if value is None:
+            value = create()
+            self.put(key, value)
+        return value
+
+    def invalidate(self, key=None):
+        """ removes `key` from the cache, or everything when `key` is None """
+        with self._lock:
+            if key is None:
+                self._items.clear()
+            else:
+                self._items.pop(key, None)
+
+    def cache_info(self):
+        return CacheInfo(self.hits, self.misses, self.evictions,
+                         self.maxsize, len(self._items))
+
+    def keys(self):
+        """ returns a list of the cached keys, least recently used first """
+        with self._lock:
+            return list(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
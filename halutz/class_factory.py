@@ -1,27 +1,104 @@
 
+import six
+import json
+import hashlib
+import importlib
+import threading
 from first import first
-from copy import deepcopy
+from contextlib import contextmanager
 
-from jsonschema.compat import lru_cache
-from python_jsonschema_objects import ObjectBuilder
-from python_jsonschema_objects.classbuilder import ClassBuilder
+from .cache import LRUCache
+from .validators import ValidatorCompiler
+from .views import make_view
 
-__all__ = ['SchemaObjectFactory']
+__all__ = ['SchemaObjectFactory', 'copy_schema']
+
+
+def copy_schema(schema):
+    """
+    returns a copy of the dict and list containers of `schema`; the values
+    are shared.  This is the deepcopy of a JSON schema, without the memo.
+    """
+    if isinstance(schema, dict):
+        return {key: copy_schema(value) for key, value in six.iteritems(schema)}
+
+    if isinstance(schema, list):
+        return [copy_schema(value) for value in schema]
+
+    return schema
+
+
+class _CopyOnResolve(object):
+    """
+    The spec resolver, as used by the class builder; the class builder
+    changes the schemas it builds from (e.g. setting the property 'type'
+    to the property class), so each '$ref' schema it resolves is a copy
+    rather than the schema of the shared spec.
+    """
+    def __init__(self, resolver):
+        self._resolver = resolver
+
+    def __getattr__(self, item):
+        return getattr(self._resolver, item)
+
+    @contextmanager
+    def resolving(self, ref):
+        with self._resolver.resolving(ref) as resolved:
+            yield copy_schema(resolved)
 
 
 class SchemaObjectFactory(object):
+    DEFAULT_CACHE_SIZE = 128
 
-    def __init__(self, client):
+    def __init__(self, client, cache_size=DEFAULT_CACHE_SIZE, models=None):
+        self.client = client
         self.deref = client.deref
         self.definitions = client.definitions
-        self.resolver = client.swagger_spec.resolver
-        self._model_cache = lru_cache()(self.__model_class)
+        self.resolver = _CopyOnResolve(client.swagger_spec.resolver)
+
+        # the model-class cache, (key, value) = (model name, class).  use
+        # `cache_info()` to see the hit/miss/eviction counts, and
+        # `invalidate()` to drop classes.
+
+        self.model_cache = LRUCache(maxsize=cache_size)
+
+        # (key, value) = (id(schema), (schema, model name)) for the anonymous
+        # schemas; the schema is kept so that its id() cannot be re-used.
+
+        self._anon_names = dict()
+
+        # (key, value) = (model name, class) of the classes generated ahead
+        # of time by halutz.codegen; see `use_models`.
+
+        self.models = dict()
+        if models:
+            self.use_models(models)
+
+        # compiled schema validators, (key, value) = (id(schema), (schema, validator))
+
+        self._validator_compiler = ValidatorCompiler(self.deref)
+        self._validators = dict()
+        self._validators_lock = threading.Lock()
+
+    @staticmethod
+    def schema_hash_name(schema):
+        """ a stable, content based, model name for an anonymous schema """
+        schema_text = json.dumps(schema, sort_keys=True, separators=(',', ':'))
+        return 'Anon' + hashlib.sha1(schema_text.encode('utf-8')).hexdigest()[:16]
 
     @staticmethod
     def schema_model_name(object_schema):
         return first(map(object_schema.get,
                          ['x-model', 'title', 'id']))
 
+    @staticmethod
+    def ref_model_name(schema):
+        # the definition name of a '#/definitions/<name>' reference; used
+        # when the spec has not been x-model tagged (Client lazy mode).
+
+        ref = schema.get('$ref') or ''
+        return ref.rpartition('/')[-1] if ref.startswith('#/definitions/') else None
+
     @staticmethod
     def proptype(prop_obj, prop_name):
         prop_info = prop_obj.propinfo(prop_name)
@@ -81,6 +158,9 @@ class SchemaObjectFactory(object):
         # if not model_name:
         #     model_name = SchemaObjectFactory.schema_model_name(object_schema)
 
+        # python_jsonschema_objects is imported when the first class is built
+        from python_jsonschema_objects.classbuilder import ClassBuilder
+
         cls_bldr = ClassBuilder(self.resolver)
         model_cls = cls_bldr.construct(model_name, object_schema)
 
@@ -89,31 +169,126 @@ class SchemaObjectFactory(object):
         model_cls.proptype = SchemaObjectFactory.proptype
         return [model_cls, cls_bldr.resolved][classes]
 
-    def __model_class(self, model_name):
-        """ this method is used by the lru_cache, do not call directly """
-        build_schema = deepcopy(self.definitions[model_name])
-        return self.schema_class(build_schema, model_name)
+    def _model_cache(self, model_name, model_schema=None):
+        """
+        returns the cached class for `model_name`, building it from
+        `model_schema` (or the spec definition by that name) on a miss.
+        """
+        def build():
+            if model_name in self.models:
+                return self.models[model_name]
+
+            build_schema = copy_schema(model_schema or self.definitions[model_name])
+            return self.schema_class(build_schema, model_name)
+
+        return self.model_cache.get_or_create(model_name, build)
 
     def model_class(self, model_name):
         return self._model_cache(model_name)
 
+    def use_models(self, models):
+        """
+        Use the model classes of a module generated by :func:`generate_models`
+        (or the halutz.codegen command), rather than building the classes at
+        runtime.  Models not found in the module are still built at runtime.
+
+        Parameters
+        ----------
+        models : module | str
+            the generated module, or its import name
+        """
+        if isinstance(models, six.string_types):
+            models = importlib.import_module(models)
+
+        self.models = models.MODELS
+        self.invalidate()
+
+    def generate_models(self, filepath):
+        """
+        Writes a python module with ahead-of-time generated model classes,
+        and their validators, for all of the spec definitions and the body
+        and response schemas.  See :mod:`halutz.codegen`.
+        """
+        from .codegen import ModelGenerator
+        ModelGenerator(self).write(filepath)
+
+    def cache_info(self):
+        """ returns the model-class cache (hits, misses, evictions, maxsize, currsize) """
+        return self.model_cache.cache_info()
+
+    def invalidate(self, model_name=None):
+        """ drops the class for `model_name` from the cache, or all classes if None """
+        self.model_cache.invalidate(model_name)
+
     # -------------------------------------------------------------------------
     # for use by the Request class to create instances of the body and
     # and response json-dict data
     # -------------------------------------------------------------------------
 
-    def body_class(self, body_param):
-        body_schema = self.deref(body_param.param_spec['schema'])
+    def anon_model_name(self, schema):
+        anon = self._anon_names.get(id(schema))
+        if anon and anon[0] is schema:
+            return anon[1]
+
+        model_name = self.schema_hash_name(schema)
+        self._anon_names[id(schema)] = (schema, model_name)
+        return model_name
+
+    def schema_model(self, schema):
+        """
+        Returns the (model name, model schema) used to cache the class of a
+        body or response `schema`.  The model schema is None when the model
+        is a spec definition.
+        """
+        model_schema = self.deref(schema)
+        model_name = (self.schema_model_name(model_schema) or
+                      self.ref_model_name(schema))
 
-        cache_name = (self.schema_model_name(body_schema) or
-                      str(id(body_schema)))
+        if model_name and model_name in self.definitions:
+            return model_name, None
 
-        if cache_name not in self.definitions:
-            self.definitions[cache_name] = body_schema
+        # schemas that are not spec definitions are cached by their x-model
+        # name if they have one, or by a hash of their content.
 
-        return self._model_cache(cache_name)
+        return model_name or self.anon_model_name(model_schema), model_schema
+
+    def _schema_model_class(self, schema):
+        return self._model_cache(*self.schema_model(schema))
+
+    def body_class(self, body_param):
+        return self._schema_model_class(body_param.param_spec['schema'])
+
+    def body_validator(self, body_param):
+        """
+        Returns the compiled validator for the `body_param` schema; as the
+        body class, it is built once per schema.  See `schema_validator`.
+        """
+        return self.schema_validator(body_param.param_spec['schema'])
 
     def resp_class(self, request, status_code):
-        resp_schema = self.deref(request.spec['responses'][str(status_code)]['schema'])
-        return (None if not resp_schema
-                else self._model_cache(resp_schema['x-model']))
+        resp_schema = request.spec['responses'][str(status_code)].get('schema')
+        return self._schema_model_class(resp_schema) if resp_schema else None
+
+    def resp_view(self, request, status_code, resp_data):
+        """
+        Returns a lazy view (see :mod:`halutz.views`) of the response data, or
+        the data as-is if there is no response schema.
+        """
+        resp_spec = request.spec['responses'].get(str(status_code)) or {}
+        resp_schema = resp_spec.get('schema')
+        return make_view(resp_data, resp_schema, self) if resp_schema else resp_data
+
+    def schema_validator(self, schema):
+        """
+        Returns the compiled validator function for `schema`; the function
+        takes a (json) value and returns the list of validation errors.
+        """
+        cached = self._validators.get(id(schema))
+        if cached and cached[0] is schema:
+            return cached[1]
+
+        with self._validators_lock:
+            validator = self._validator_compiler.compile(schema)
+            self._validators[id(schema)] = (schema, validator)
+
+        return validator
@@ -3,29 +3,60 @@ from copy import deepcopy
 import json
 from os import path
 
-from bravado_core.spec import Spec
-from bravado.requests_client import RequestsClient
-
+from .request import Request
+from .batch import Batch
 from .request_factory import RequestFactory
 from .class_factory import SchemaObjectFactory
+from .artifacts import SpecCache
+from .singleflight import SingleFlight
+from .metrics import Metrics
+from .resilience import Resilience
 
 __all__ = ['Client']
 
 
 class Client(object):
     file_spec = "{server}-swagger.json"
+    request_type = Request
 
     def __init__(self,
                  server_url,
                  origin_spec=None,
                  session=None,
                  remote=None,
-                 spec_file=None):
+                 spec_file=None,
+                 spec_cache=None,
+                 lazy=False,
+                 model_cache_size=SchemaObjectFactory.DEFAULT_CACHE_SIZE,
+                 models=None,
+                 response_cache=None,
+                 single_flight=False,
+                 metrics=None,
+                 copy_spec=True,
+                 use_msgpack=False,
+                 resilience=None,
+                 rate_limit=None):
 
         self.server_url = server_url
         self.session = session
         self.remote = remote
 
+        # when lazy is True, the bravado operations are only built when
+        # a request for them is first made; see LazySpec.
+
+        self.lazy = lazy
+        spec_flavor = '-lazy' if lazy else ''
+
+        # if a spec_cache directory (or SpecCache instance) is provided, then
+        # the compiled bravado spec is stored there, keyed by a hash of the
+        # origin spec, so that subsequent clients can skip building it.
+
+        if spec_cache and not isinstance(spec_cache, SpecCache):
+            spec_cache = SpecCache(spec_cache)
+
+        self.spec_cache = spec_cache
+        spec_key = compiled = None
+
         # if an origin_spec is not providing on init, then the caller could
         # provide either a file-path location to a locally stored copy,
         # and if not that, then the spec will be downloaded from the server.
@@ -37,20 +68,60 @@ class Client(object):
 
         spec_file_exists = path.isfile(spec_file) if spec_file else False
 
+        # the bravado spec annotates the spec dict it is built from (e.g. the
+        # 'x-model' and 'x-scope' values), and so it is built from a copy of a
+        # caller provided origin_spec.  when `copy_spec` is False the caller's
+        # dict is used as-is, and shared; a spec that is loaded or fetched
+        # here is never copied.
+
         if spec_file and spec_file_exists:
-            origin_spec = self.load_swagger_spec(spec_file)
+            if spec_cache:
+                spec_key = spec_cache.file_key(spec_file, spec_flavor)
+                compiled = spec_cache.load(spec_key)
+            if not compiled:
+                origin_spec = self.load_swagger_spec(spec_file)
+                copy_spec = False
         elif not origin_spec:
             origin_spec = self.fetch_swagger_spec()
+            copy_spec = False
+
+        if spec_cache and not compiled and not spec_key:
+            spec_key = spec_cache.dict_key(origin_spec, spec_flavor)
+            compiled = spec_cache.load(spec_key)
+
+        if compiled:
+            # the compiled artifact already has its own copy of the origin
+            # spec, and the bravado spec; only the http-client needs to be
+            # linked to this client.
+
+            self.origin_spec, self.swagger_spec = compiled
+            self.swagger_spec.http_client = self.make_http_client()
+
+            # the artifact could have been built by a client of another
+            # server; the api url is built for this one, as Spec.build does.
+            # The origin_url is kept, since the spec refs (its 'x-scope'
+            # values) are resolved relative to it.
 
-        self.origin_spec = deepcopy(origin_spec)
+            from bravado_core.spec import build_api_serving_url
 
-        if spec_file and not spec_file_exists:
-            self.save_swagger_spec(spec_file)
+            self.swagger_spec.api_url = build_api_serving_url(
+                spec_dict=self.swagger_spec.spec_dict, origin_url=self.server_url,
+                use_spec_url_for_base_path=self.swagger_spec.config.get(
+                    'use_spec_url_for_base_path', False))
 
-        # bravado swagger spec created from the origin_spec, linking
-        # the bravado requests session to the AOSpy session
+        else:
+            self.origin_spec = deepcopy(origin_spec) if copy_spec else origin_spec
 
-        self.swagger_spec = self.make_swagger_spec()
+            if spec_file and not spec_file_exists:
+                self.save_swagger_spec(spec_file)
+
+            # bravado swagger spec created from the origin_spec, linking
+            # the bravado requests session to the AOSpy session
+
+            self.swagger_spec = self.make_swagger_spec()
+
+            if spec_cache:
+                spec_cache.save(spec_key, self.origin_spec, self.swagger_spec)
 
         # alias for ease-of-use
         self.definitions = self.origin_spec.get('definitions') or {}
@@ -63,10 +134,44 @@ class Client(object):
         # or as-is content from the AOS.  By default set this to as-is.
         # caller can set this to True so that all responses are handled
         # the same; or they can set this on a request-by-request bases
-        # in the Request instance.
+        # in the Request instance.  set this to 'view' to have the response
+        # returned as a lazy view over the content rather than model objects.
 
         self.model_response = False
 
+        # control if the Request instances created by the request factory
+        # share a per-operation template (command, body parameter, and body
+        # class) that is built once, rather than building it for every
+        # request.  caller can set this to True for hot loops.
+
+        self.cache_requests = False
+
+        # control if identical concurrent (GET) calls share one in-flight
+        # http request; see halutz.singleflight.  This must be set before
+        # the Request instances are created.
+
+        self.single_flight = (
+            SingleFlight() if single_flight is True else single_flight or None)
+
+        # when `use_msgpack` is True, msgpack is preferred for the responses
+        # of the operations that produce it, and the request bodies of the
+        # operations that consume it are msgpack encoded.  This must be set
+        # before the Request instances are created.  The msgpack bodies
+        # decoded by halutz use the `msgpack_options`; see halutz.codec.
+
+        self.use_msgpack = use_msgpack
+        self.msgpack_options = {'raw': False, 'intern_keys': False}
+
+        # the retries, circuit breakers, and timeouts of the request calls;
+        # see halutz.resilience.  True for the defaults.
+
+        self.resilience = Resilience() if resilience is True else resilience or None
+
+        # the RateLimiter of the request calls, by host and operation; see
+        # halutz.ratelimit.
+
+        self.rate_limit = rate_limit or None
+
         # setup request methods to create Request instances for command
         # execution.
 
@@ -74,14 +179,55 @@ class Client(object):
         self.request = rqst_factory.attr_factory()
         self.command_request = rqst_factory.command_request
         self.path_requests = rqst_factory.path_requests
+        self.match_request = rqst_factory.match_request
+        self.operations = rqst_factory.operations
+
+        # object to use for building jsonschema classes/instances.  if a
+        # `models` module (or module name), generated by halutz.codegen, is
+        # provided then its classes are used rather than building them.
+
+        self.build = SchemaObjectFactory(self, cache_size=model_cache_size,
+                                         models=models)
+
+        # GET responses are cached when a `response_cache` is provided: a
+        # ResponseCache, True for an in-memory cache, or a directory path for
+        # an on-disk cache.  See halutz.response_cache.
+
+        if response_cache:
+            from .response_cache import ResponseCache, DiskBackend
+
+            if response_cache is True:
+                response_cache = ResponseCache()
+            elif not isinstance(response_cache, ResponseCache):
+                response_cache = ResponseCache(backend=DiskBackend(response_cache))
+
+        self.response_cache = response_cache or None
+
+        # callables called with the RequestEvent (phase timing, sizes, and
+        # status) of each request call; see halutz.metrics.  When `metrics`
+        # is True (or a Metrics instance) it is added as a hook, and kept as
+        # the `metrics` attribute.
+
+        self.hooks = []
+
+        if metrics is True:
+            metrics = Metrics()
 
-        # object to use for building jsonschema classes/instances
-        self.build = SchemaObjectFactory(self)
+        self.metrics = metrics or None
+        if self.metrics:
+            self.hooks.append(self.metrics)
 
     @property
     def server(self):
         return self.server_url.partition('://')[-1]
 
+    def batch(self, max_workers=None):
+        """
+        Returns a :class:`Batch` used to execute many request calls
+        concurrently with a thread pool of `max_workers` threads.
+        """
+        return Batch(self, max_workers=max_workers or Batch.DEFAULT_WORKERS)
+
     def fetch_swagger_spec(self):
         """ must be subclassed to load the spec from the server """
         raise RuntimeError('fetch_swagger_spec not implemeted')
@@ -106,19 +252,37 @@ class Client(object):
 
         return json.load(open(filepath))
 
-    def make_swagger_spec(self):
-        http_client = RequestsClient()
+    def make_http_client(self):
+        from bravado.requests_client import RequestsClient
+        from .http_client import ResponseAdapter
+
+        http_client = RequestsClient(response_adapter_class=ResponseAdapter)
 
         # if the caller provided an existing requests session,
         # then use there here.
 
         if self.session:
             http_client.session = self.session
+        else:
+            # the adapters of the session created here, whose connection
+            # pools a Batch can resize; see Batch._size_pool.
+            http_client.pool_adapters = dict(http_client.session.adapters)
+
+        return http_client
+
+    def make_swagger_spec(self):
+        # bravado is imported when the first client is created, rather
+        # than when halutz is imported.
+
+        from bravado_core.spec import Spec
+        from .lazy import LazySpec
+
+        spec_type = LazySpec if self.lazy else Spec
 
-        return Spec.from_dict(
+        return spec_type.from_dict(
             spec_dict=self.origin_spec,
             origin_url=self.server_url,
-            http_client=http_client,
+            http_client=self.make_http_client(),
 
             # TODO expose these configuration options to the
             # TODO caller; hardcoded for now.  caller could make
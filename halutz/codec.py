@@ -0,0 +1,74 @@
+"""
+Response body decoding used by halutz: JSON, with a pluggable `loads`
+(the stdlib json by default), and msgpack.  A faster decoder, such as
+orjson, is used when the caller selects it:
+
+    >>> from halutz import codec
+    >>> codec.use_json(loads=orjson.loads)
+
+msgpack is decoded from a memoryview over the response bytes; with
+`raw=True` the strings are left as bytes, and with `intern_keys=True` the
+map keys are shared by all the maps of a body (as json.loads does), which
+saves memory for lists of objects.
+"""
+
+import json
+
+__all__ = ['json_loads', 'use_json', 'msgpack_loads', 'shared_keys_hook',
+           'APP_JSON', 'APP_MSGPACK', 'MSGPACK_TYPES', 'msgpack_body_type']
+
+APP_JSON = 'application/json'
+APP_MSGPACK = 'application/x-msgpack'
+
+# the msgpack content types; the bravado_core releases use one or the other
+MSGPACK_TYPES = (APP_MSGPACK, 'application/msgpack')
+
+def _std_json_loads(data):
+    return json.loads(data.decode('utf-8') if isinstance(data, (bytes, bytearray)) else data)
+
+
+json_loads = _std_json_loads
+
+
+def use_json(loads=None):
+    """
+    Sets the function used to decode the JSON response bodies; given the
+    body bytes (or text).  When `loads` is None, the default is restored.
+    """
+    global json_loads
+    json_loads = loads or _std_json_loads
+
+
+def shared_keys_hook():
+    """
+    returns an `object_pairs_hook` that shares the key strings of all the
+    objects it decodes; for decoders that otherwise create new key strings
+    for every object.
+    """
+    keys = dict()
+
+    def object_pairs(pairs):
+        return dict((keys.setdefault(key, key), value) for key, value in pairs)
+
+    return object_pairs
+
+
+def msgpack_loads(data, raw=False, intern_keys=False):
+    """
+    Decodes the msgpack `data` bytes (or buffer).  When `raw` is True, the
+    strings are returned as bytes rather than decoded; when `intern_keys`
+    is True, the map keys are shared (see `shared_keys_hook`).
+    """
+    import msgpack
+
+    options = dict(raw=raw, strict_map_key=False)
+    if intern_keys:
+        options['object_pairs_hook'] = shared_keys_hook()
+
+    return msgpack.unpackb(memoryview(data), **options)
+
+
+def msgpack_body_type():
+    """ returns the msgpack content type that bravado_core encodes request bodies for """
+    from bravado_core.content_type import APP_MSGPACK as body_type
+    return body_type
@@ -0,0 +1,248 @@
+"""
+Ahead-of-time generation of model classes.  The generator writes a plain
+python module with a `__slots__` based class (see :mod:`halutz.models`)
+and a precompiled validator function for each of the spec definitions,
+and for the body and response schemas defined inline in the paths.  A
+client then imports the classes instead of building them at runtime:
+
+    $ python -m halutz.codegen netbox-swagger.json netbox_models.py
+
+    >>> client = Client(server_url, spec_file='netbox-swagger.json',
+    ...                 models='netbox_models')
+
+or, from an existing client:
+
+    >>> client.build.generate_models('netbox_models.py')
+"""
+
+import re
+import json
+import keyword
+import argparse
+from pprint import pformat
+from collections import OrderedDict
+
+import six
+from bravado_core.spec import strip_xscope
+
+from .validators import ValidatorCompiler
+
+__all__ = ['ModelGenerator']
+
+MODULE_HEADER = '''\
+# generated by halutz.codegen from: %(title)s (%(version)s)
+# do not edit; re-generate this module when the spec changes.
+
+import re
+
+from halutz.validators import MISSING
+from halutz.models import CompiledModel, CompiledArray
+
+from six import string_types, integer_types
+'''
+
+# attribute names used by the model base classes
+
+RESERVED_ATTRS = {'for_json', 'as_dict', 'serialize', 'validate', 'propinfo',
+                  'proptype', '_extra', '_coerce'}
+
+
+def _identifier(name, reserved=()):
+    ident = re.sub(r'\W', '_', name)
+    if ident[:1].isdigit():
+        ident = '_' + ident
+    if keyword.iskeyword(ident) or ident in reserved or ident.startswith('__'):
+        ident += '_'
+    return ident
+
+
+def _literal(value, indent):
+    return pformat(value, indent=1).replace('\n', '\n' + ' ' * indent)
+
+
+class ModelGenerator(object):
+    """
+    Generates the model module for the definitions of a SchemaObjectFactory
+    (`client.build`).  The generated classes are keyed, in the module
+    `MODELS` dict, by the same model names that the factory uses.
+    """
+    def __init__(self, factory):
+        self.factory = factory
+        self.deref = factory.deref
+        self.validators = ValidatorCompiler(self.deref)
+
+        # (key, value) = (model name, (class name, model schema))
+        self.models = OrderedDict()
+        self.class_names = set()
+
+    def collect(self):
+        """ collects the models: the spec definitions and the inline body/response schemas """
+        for model_name in sorted(self.factory.definitions):
+            self.add_model(model_name, self.deref(self.factory.definitions[model_name]))
+
+        paths = self.deref(self.factory.client.origin_spec.get('paths') or {})
+        for path_name, path_spec in sorted(six.iteritems(paths)):
+            for method, op_spec in sorted(six.iteritems(self.deref(path_spec))):
+                if method.startswith('x-') or method == 'parameters':
+                    continue
+
+                op_spec = self.deref(op_spec)
+                schemas = [self.deref(param).get('schema')
+                           for param in op_spec.get('parameters') or []]
+                schemas.extend(self.deref(resp).get('schema')
+                               for resp in six.itervalues(op_spec.get('responses') or {}))
+
+                for schema in filter(None, schemas):
+                    model_name, model_schema = self.factory.schema_model(schema)
+                    if model_schema is not None:
+                        self.add_model(model_name, model_schema)
+
+        return self
+
+    def add_model(self, model_name, schema):
+        if model_name in self.models:
+            return
+
+        s_type = schema.get('type')
+        if s_type not in ('object', 'array') and not (not s_type and 'properties' in schema):
+            return
+
+        class_name = _identifier(model_name)
+        while class_name in self.class_names:
+            class_name += '_'
+
+        self.class_names.add(class_name)
+        self.models[model_name] = (class_name, schema)
+
+    def _model_ref(self, schema):
+        """ returns the class name of a '$ref' to a model, or None """
+        if not isinstance(schema, dict) or '$ref' not in schema:
+            return None
+
+        model_name = self.factory.ref_model_name(schema)
+        return self.models[model_name][0] if model_name in self.models else None
+
+    def _validator(self, model_name, class_name, schema):
+        # the validator of a spec definition is generated for its '$ref', so
+        # that the same function is used by the validators referencing it.
+
+        if model_name in self.factory.definitions:
+            schema = {'$ref': '#/definitions/' + model_name}
+
+        return self.validators.function_for(schema, class_name)
+
+    def _array_source(self, model_name, class_name, schema):
+        item_cls = self._model_ref(schema.get('items'))
+        lines = [
+            "class %s(CompiledArray):" % class_name,
+            "    __slots__ = ()",
+            "    __validator__ = staticmethod(%s)" % self._validator(model_name, class_name, schema),
+            ""
+        ]
+        return lines, (["%s.__itemtype__ = %s" % (class_name, item_cls)] if item_cls else [])
+
+    def _object_source(self, model_name, class_name, schema):
+        props = schema.get('properties') or {}
+        attrs = dict(
+            (prop_name, _identifier(prop_name, RESERVED_ATTRS))
+            for prop_name in sorted(props))
+
+        checks = OrderedDict(
+            (prop_name, self.validators.function_for(
+                props[prop_name], '%s_%s' % (class_name, _identifier(prop_name))))
+            for prop_name in sorted(attrs))
+
+        nested, arrays = OrderedDict(), OrderedDict()
+        for prop_name in sorted(attrs):
+            prop_schema = props[prop_name]
+            if self._model_ref(prop_schema):
+                nested[prop_name] = self._model_ref(prop_schema)
+            elif self.deref(prop_schema).get('type') == 'array':
+                item_cls = self._model_ref(self.deref(prop_schema).get('items'))
+                if item_cls:
+                    arrays[prop_name] = item_cls
+
+        lines = [
+            "class %s(CompiledModel):" % class_name,
+            "    __slots__ = %r" % (tuple(attrs.values()),),
+            "    __props__ = %s" % _literal(
+                dict((attr, prop) for prop, attr in six.iteritems(attrs)), 16),
+            "    __attrs__ = %s" % _literal(attrs, 16),
+            "    __properties__ = %s" % _literal(strip_xscope(props), 21),
+            "    __additional__ = %r" % (schema.get('additionalProperties') is not False),
+            "    __validator__ = staticmethod(%s)" % self._validator(model_name, class_name, schema),
+            "    __checks__ = {%s}" % ', '.join(
+                "%r: %s" % (prop_name, func) for prop_name, func in six.iteritems(checks)),
+            ""
+        ]
+
+        # the links to the other classes are set after all classes are defined
+
+        links = []
+        if nested:
+            links.append("%s.__nested__ = {%s}" % (class_name, ', '.join(
+                "%r: %s" % each for each in six.iteritems(nested))))
+        if arrays:
+            links.append("%s.__arrays__ = {%s}" % (class_name, ', '.join(
+                "%r: %s" % each for each in six.iteritems(arrays))))
+
+        return lines, links
+
+    def generate(self):
+        """ returns the source text of the generated module """
+        if not self.models:
+            self.collect()
+
+        classes, links = [], []
+        for model_name, (class_name, schema) in six.iteritems(self.models):
+            source = (self._array_source if schema.get('type') == 'array'
+                      else self._object_source)
+            class_lines, class_links = source(model_name, class_name, schema)
+            classes.extend(class_lines + [''])
+            links.extend(class_links)
+
+        info = self.factory.client.origin_spec.get('info') or {}
+
+        return '\n'.join(
+            [MODULE_HEADER % {'title': info.get('title'), 'version': info.get('version')},
+             '# ' + '-' * 77,
+             '# validators',
+             '# ' + '-' * 77,
+             '',
+             self.validators.source(),
+             '',
+             '# ' + '-' * 77,
+             '# models',
+             '# ' + '-' * 77,
+             ''] +
+            classes + links +
+            ['',
+             'MODELS = {',
+             ',\n'.join("    %r: %s" % (model_name, class_name)
+                        for model_name, (class_name, _) in six.iteritems(self.models)),
+             '}',
+             ''])
+
+    def write(self, filepath):
+        source = self.generate()
+        with open(filepath, 'w') as ofile:
+            ofile.write(source)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python -m halutz.codegen',
+        description="generate a python module of model classes from a swagger spec")
+
+    parser.add_argument('spec_file', help='swagger spec JSON file')
+    parser.add_argument('output', help='python module file to write')
+    args = parser.parse_args()
+
+    from .client import Client
+
+    client = Client(server_url='', origin_spec=json.load(open(args.spec_file)))
+    client.build.generate_models(args.output)
+
+
+if __name__ == '__main__':
+    main()
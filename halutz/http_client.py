@@ -0,0 +1,19 @@
+"""
+bravado http-client parts used by the halutz Client; the JSON response
+bodies are decoded with the halutz codec (see halutz.codec).
+"""
+
+from bravado.requests_client import RequestsResponseAdapter
+
+from . import codec
+
+__all__ = ['ResponseAdapter']
+
+
+class ResponseAdapter(RequestsResponseAdapter):
+
+    def json(self, **kwargs):
+        if kwargs:
+            return super(ResponseAdapter, self).json(**kwargs)
+
+        return codec.json_loads(self.raw_bytes)
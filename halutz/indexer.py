@@ -1,16 +1,40 @@
 import six
 import copy
+import json
+import hashlib
+try:
+    from collections.abc import Mapping
+except ImportError:     # pragma: no cover, py2
+    from collections import Mapping
 from pprint import pformat
 from first import first
 from bidict import namedbidict
 from operator import itemgetter
+from weakref import WeakValueDictionary
 from collections import namedtuple
 
+from .records import RecordLayout, CompactRecord
+from .artifacts import dump_artifact, load_artifact, artifact_lock
+from .paging import detect_paging
+from .ratelimit import PRIORITY_BACKGROUND
+from .validators import MISSING
 
-__all__ = ['Indexer', 'IndexItem']
+
+__all__ = ['Indexer', 'IndexItem', 'IndexChanges', 'SecondaryIndex']
+
+# the changes made by Indexer.refresh; each is a list of item ids.
+
+IndexChanges = namedtuple('IndexChanges', 'added removed renamed changed')
+
+
+class Index(namedbidict('Index', 'id', 'name')):
+    # defined at the module level, so that it can be pickled (see snapshots)
+    __slots__ = ()
 
 
 class IndexItem(object):
+    __slots__ = ('id', 'name', 'value', 'index', '__weakref__')
+
     def __init__(self, item_id, item_name, item_value, index):
         self.id, self.name, self.value = item_id, item_name, item_value
         self.index = index
@@ -22,22 +46,164 @@ class IndexItem(object):
             'value': self.value})
 
 
+class SecondaryIndex(object):
+    """
+    An index of the Indexer catalog items by a key computed from each item
+    value.  The `key` is a field name, a dotted field path ('site.name'), a
+    list of fields/paths (a compound key, the tuple of their values), or a
+    callable given the item value.  A list value is keyed by the tuple of
+    its elements.  Items without the field(s), for which the callable
+    returns None, or whose key is not hashable (e.g. a dict value), are
+    not indexed.  A `unique` index maps each key to one item id, otherwise
+    to the set of item ids.
+    """
+    def __init__(self, name, key=None, unique=False):
+        self.name = name
+        self.unique = unique
+        self.key_from = self.make_key_from(key or name)
+
+        # (key, value) = (index key, item id or set of item ids)
+        self.entries = dict()
+
+        # (key, value) = (item id, index key); to remove an item when its
+        # value has already been replaced in the catalog.
+        self.item_keys = dict()
+
+    @staticmethod
+    def _field_getter(field):
+        path = field.split('.')
+
+        def get_field(item_value):
+            for each in path:
+                item_value = item_value[each]
+            return item_value
+
+        return get_field
+
+    @classmethod
+    def make_key_from(cls, key):
+        if callable(key):
+            return key
+
+        if isinstance(key, six.string_types):
+            get_field = cls._field_getter(key)
+        else:
+            getters = [cls._field_getter(field) for field in key]
+
+            def get_field(item_value):
+                return tuple(getter(item_value) for getter in getters)
+
+        def key_from(item_value):
+            try:
+                return get_field(item_value)
+            except (KeyError, TypeError, IndexError):
+                return None
+
+        return key_from
+
+    @classmethod
+    def _as_tuple(cls, value):
+        if isinstance(value, (list, tuple)):
+            return tuple(cls._as_tuple(each) for each in value)
+        return value
+
+    @classmethod
+    def _as_key(cls, value):
+        # the list values (e.g. of a compound key) become tuples; returns
+        # None if the key is still not hashable.
+
+        key = cls._as_tuple(value)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+
+        return key
+
+    def add(self, item_id, item_value):
+        key = self._as_key(self.key_from(item_value))
+        if key is None:
+            return
+
+        if not self.unique:
+            self.entries.setdefault(key, set()).add(item_id)
+        elif self.entries.setdefault(key, item_id) != item_id:
+            raise ValueError("duplicate key %r in unique index '%s': items %r, %r" % (
+                key, self.name, self.entries[key], item_id))
+
+        self.item_keys[item_id] = key
+
+    def remove(self, item_id):
+        key = self.item_keys.pop(item_id, None)
+        if key is None:
+            return
+
+        if self.unique:
+            del self.entries[key]
+            return
+
+        item_ids = self.entries[key]
+        item_ids.discard(item_id)
+        if not item_ids:
+            del self.entries[key]
+
+    def ids(self, key):
+        """ returns the list of the item ids with the `key` """
+        found = self.entries.get(self._as_key(key))
+        if found is None:
+            return []
+        return [found] if self.unique else list(found)
+
+    def clear(self):
+        self.entries.clear()
+        self.item_keys.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
 class Indexer(object):
     RESP_STATUS_CODE = '200'
-    Index = namedbidict('Index', 'id', 'name')
+    SNAPSHOT_KIND = 'indexer'
+    Index = Index
     index_item_type = IndexItem
 
     def __init__(self, rqst,
                  name_from=None,
                  id_from=None,
                  response_code=None,        # will use default if set to None
-                 index_item_type=None       # will use default if None
+                 index_item_type=None,      # will use default if None
+                 streaming=False,           # ingest items as the response is read
+                 compact=False,             # store the items as compact records
+                 paging=None,               # paging strategy, or True to detect it
+                 priority=PRIORITY_BACKGROUND,  # the scheduling priority of the fetches
+                 snapshot_name=None         # names lambda id_from/name_from in the snapshot key
                  ):
 
         self.rqst = rqst
+
+        # the items are fetched with (a copy of) the request at the indexer
+        # priority, so that, when the client has rate limits, the other calls
+        # go ahead of the (re)runs and refreshes; see halutz.ratelimit.
+
+        self.priority = priority
+        self.streaming = streaming
+
+        # when paging, the items are fetched in pages (concurrently if the
+        # strategy allows) and ingested as each page arrives; see halutz.paging.
+
+        self.paging = detect_paging(rqst) if paging is True else paging
         self.name_from = name_from
         self.id_from = id_from
 
+        # the id_from and name_from of the snapshot key, as given; the
+        # attributes are replaced by their getters when items are ingested.
+        # a lambda, or nested function, has no name of its own, and the
+        # caller names it with `snapshot_name`.
+
+        self.snapshot_name = snapshot_name
+        self._snapshot_from = [self._snapshot_name(id_from), self._snapshot_name(name_from)]
+
         deref = rqst.client.deref
 
         self.schema = deref(rqst.spec['responses'][response_code or Indexer.RESP_STATUS_CODE]['schema'])
@@ -53,11 +219,13 @@ class Indexer(object):
 
         if items_type == 'object':
             self._ingest_ = self.ingest_from_dict
+            self._entries_ = self._dict_entries
             self.items_properties = (
                 items_schema.get('properties') or
                 items_schema['additionalProperties']['properties'])
         else:
             self._ingest_ = self.ingest_from_list
+            self._entries_ = self._list_entries
             self.items_properties = (
                 items_schema['items'].get('properties') or
                 deref(items_schema['items']))
@@ -68,6 +236,33 @@ class Indexer(object):
         self.catalog = dict()
         self.run_kwargs = None
 
+        # (key, value) = (index name, SecondaryIndex); see `add_index`
+        self.indexes = dict()
+
+        # when compact, the catalog values are CompactRecords using a layout
+        # of the items schema properties, rather than the item dicts.
+
+        self.layout = RecordLayout(self._item_fields()) if compact else None
+
+        # the IndexItem instances in use, so that each item has one instance
+        # (key, value) = (item id, IndexItem)
+
+        self._index_items = WeakValueDictionary()
+
+        # the ETag of the last response, used by `refresh` to make a
+        # conditional request.
+
+        self.etag = None
+
+    def _item_fields(self):
+        props = self.items_properties
+
+        # the items_properties of a '$ref' items schema is the item schema
+        if props.get('type') == 'object' and isinstance(props.get('properties'), dict):
+            props = props['properties']
+
+        return sorted(props)
+
     @property
     def names(self):
         return list(self.index.id_for)
@@ -76,7 +271,7 @@ class Indexer(object):
     def ids(self):
         return list(self.index.name_for)
 
-    def ingest_from_dict(self, items):
+    def _dict_entries(self, items):
         # if id_from is None, then we use the key as the id
         # otherwise we have a property identified to get the id value
 
@@ -102,13 +297,17 @@ class Indexer(object):
                     return item_value[name_from]
                 self.name_from = call_name_from
 
-        for each_key, each_item in six.iteritems(items):
-            each_id = self.id_from(each_key, each_item)
-            each_name = self.name_from(each_key, each_item)
-            self.index[each_id] = each_name
-            self.catalog[each_id] = each_item
+        # the items are either the response dict, or when streaming, an
+        # iterable of the (key, value) pairs.
 
-    def ingest_from_list(self, items):
+        pairs = six.iteritems(items) if isinstance(items, Mapping) else items
+
+        for each_key, each_item in pairs:
+            yield (self.id_from(each_key, each_item),
+                   self.name_from(each_key, each_item),
+                   each_item)
+
+    def _list_entries(self, items):
         if not callable(self.id_from):
             self.id_from = itemgetter(self.id_from or 'id')
 
@@ -116,27 +315,137 @@ class Indexer(object):
             self.name_from = itemgetter(self.name_from or 'name')
 
         for each_item in items:
-            each_id = self.id_from(each_item)
-            each_name = self.name_from(each_item)
-            self.index[each_id] = each_name
-            self.catalog[each_id] = each_item
+            yield self.id_from(each_item), self.name_from(each_item), each_item
+
+    def _add_entry(self, item_id, item_name, item_value):
+        if self.layout:
+            item_value = self.layout.record(item_value)
+
+        self.index[item_id] = item_name
+        self.catalog[item_id] = item_value
+        for each_index in six.itervalues(self.indexes):
+            each_index.add(item_id, item_value)
+
+    def _update_entry(self, item_id, item_value):
+        if self.layout:
+            item_value = self.layout.record(item_value)
+
+        self._index_items.pop(item_id, None)
+        self.catalog[item_id] = item_value
+        for each_index in six.itervalues(self.indexes):
+            each_index.remove(item_id)
+            each_index.add(item_id, item_value)
+
+    def _remove_entry(self, item_id):
+        self._index_items.pop(item_id, None)
+        del self.index[item_id]
+        del self.catalog[item_id]
+        for each_index in six.itervalues(self.indexes):
+            each_index.remove(item_id)
+
+    def ingest_from_dict(self, items):
+        for entry in self._dict_entries(items):
+            self._add_entry(*entry)
+
+    def ingest_from_list(self, items):
+        for entry in self._list_entries(items):
+            self._add_entry(*entry)
 
     def clear(self):
         self.index.clear()
         self.catalog.clear()
+        self._index_items.clear()
+        for each_index in six.itervalues(self.indexes):
+            each_index.clear()
+
+    # -------------------------------------------------------------------------
+    # secondary indexes
+    # -------------------------------------------------------------------------
+
+    def add_index(self, name, key=None, unique=False):
+        """
+        Adds a secondary index, see :class:`SecondaryIndex`, that is kept up to
+        date as items are ingested or refreshed; the items already in the
+        catalog are indexed now.
+
+        Examples
+        --------
+            >>> devices.add_index('role', key='device_role.slug')
+            >>> devices.add_index('rack_position', key=['rack.id', 'position'], unique=True)
+            >>> devices.find_by('role', 'leaf')
+        """
+        sec_index = SecondaryIndex(name, key=key, unique=unique)
+        for item_id, item_value in six.iteritems(self.catalog):
+            sec_index.add(item_id, item_value)
+
+        self.indexes[name] = sec_index
+        return sec_index
+
+    def ids_by(self, index_name, key):
+        """ returns the list of item ids with the `key` in the secondary index """
+        return self.indexes[index_name].ids(key)
+
+    def find_by(self, index_name, key):
+        """
+        returns the IndexItem with `key` in a unique secondary index (or
+        None); or the list of IndexItems with `key` in a non-unique index.
+        """
+        sec_index = self.indexes[index_name]
+        items = [self._item(item_id) for item_id in sec_index.ids(key)]
+        if sec_index.unique:
+            return first(items)
+        return items
+
+    @staticmethod
+    def _page_items(pages):
+        for page in pages:
+            items = page.items or ()
+            for each_item in (six.iteritems(items) if isinstance(items, Mapping) else items):
+                yield each_item
+
+    def _fetch(self, **kwargs):
+        """ returns the items, or None if the (conditional) request was not-modified """
+
+        # the copy is made for each fetch, so that it has the current
+        # settings of the request (e.g. `model_response`).
+        rqst = self.rqst.with_priority(self.priority)
+
+        if self.paging:
+            self.etag = None
+            return self._page_items(rqst.paginate(
+                paging=self.paging, items_key=self.items_key, **kwargs))
+
+        # when streaming, the items are ingested as they are decoded from
+        # the response body, so the full response is never held in memory.
+
+        if self.streaming:
+            items, ok = rqst.stream(self.items_key, **kwargs)
+            http_resp = items.response if ok else None
+        else:
+            items, ok, http_resp = rqst.invoke(**kwargs)
+
+        if not ok:
+            raise RuntimeError(
+                'unable to get items', items)
+
+        if http_resp.status_code == 304:
+            # the streamed response has no body to read, and is closed so
+            # that its connection is returned to the pool.
+            if self.streaming:
+                items.close()
+            return None
+
+        self.etag = http_resp.headers.get('ETag')
+        return items if self.streaming else items[self.items_key]
 
     def run(self, **kwargs):
         # keep a copy of the last run kwargs so that they could be later referenced
         # this is usedful for URL construction/ect.
 
         self.run_kwargs = copy.deepcopy(kwargs)
+        self.etag = None
 
-        resp, ok = self.rqst(**kwargs)
-        if not ok:
-            raise RuntimeError(
-                'unable to get items', resp)
-
-        items = resp[self.items_key]
+        items = self._fetch(**kwargs)
 
         self.clear()
         self._ingest_(items)
@@ -146,6 +455,191 @@ class Indexer(object):
     def rerun(self):
         return self.run(**self.run_kwargs)
 
+    # -------------------------------------------------------------------------
+    # snapshots
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _snapshot_name(value):
+        # a callable is keyed by its module and qualified name, which are the
+        # same in each process (unlike its repr).  The lambdas, and nested
+        # functions, of a module share their names, and are MISSING.
+
+        if not callable(value):
+            return value
+
+        name = getattr(value, '__qualname__', None) or getattr(value, '__name__', None)
+        if not name or '<lambda>' in name or '<locals>' in name:
+            return MISSING
+
+        return '%s.%s' % (getattr(value, '__module__', None), name)
+
+    def snapshot_key(self, run_kwargs=None):
+        """
+        returns the key of the snapshot of this request, to the client
+        server, with `run_kwargs`
+
+        Raises
+        ------
+        ValueError
+            if the id_from or name_from is a lambda (or nested function),
+            and the indexer has no `snapshot_name`.
+        """
+        if MISSING in self._snapshot_from and self.snapshot_name is None:
+            raise ValueError(
+                'the snapshot of an indexer with a lambda, or nested, '
+                'id_from/name_from needs a snapshot_name')
+
+        key_text = json.dumps(
+            [self.rqst.method, self.rqst.path, self.rqst.client.server_url,
+             self.items_key, self._snapshot_from, self.snapshot_name,
+             self.layout.fields if self.layout else None,
+             run_kwargs or {}],
+            sort_keys=True, default=str)
+
+        return hashlib.sha256(key_text.encode('utf-8')).hexdigest()
+
+    def save_snapshot(self, filepath):
+        """
+        Saves the index and catalog to a snapshot file (see
+        :mod:`halutz.artifacts`); the header records the request path and
+        run kwargs used to create it.  Secondary indexes are not saved, they
+        are rebuilt when the snapshot is loaded.
+        """
+        # compact records are saved as their value tuples
+
+        payload = {
+            'index': self.index,
+            'catalog': (dict((item_id, record._values)
+                             for item_id, record in six.iteritems(self.catalog))
+                        if self.layout else self.catalog)
+        }
+
+        dump_artifact(
+            filepath, kind=self.SNAPSHOT_KIND, key=self.snapshot_key(self.run_kwargs),
+            payload=payload, path=self.rqst.path, method=self.rqst.method,
+            run_kwargs=json.loads(json.dumps(self.run_kwargs, default=str)),
+            etag=self.etag, count=len(self.catalog))
+
+    def load_snapshot(self, filepath, max_age=None, **kwargs):
+        """
+        Loads the index and catalog from a snapshot file that was made by
+        the same request to the same server, with the same `id_from`,
+        `name_from` and run `kwargs`, and is not older than `max_age`
+        seconds (if given).  The file is memory-mapped.
+
+        Returns
+        -------
+        bool
+            True if the snapshot was loaded, False otherwise.
+        """
+        header, payload = load_artifact(
+            filepath, kind=self.SNAPSHOT_KIND, key=self.snapshot_key(kwargs),
+            max_age=max_age, use_mmap=True)
+
+        if not payload:
+            return False
+
+        catalog = payload['catalog']
+        if self.layout:
+            layout = self.layout
+            catalog = dict((item_id, CompactRecord(layout, values))
+                           for item_id, values in six.iteritems(catalog))
+
+        self.clear()
+        self.index = payload['index']
+        self.catalog = catalog
+
+        for each_index in six.itervalues(self.indexes):
+            for item_id, item_value in six.iteritems(self.catalog):
+                each_index.add(item_id, item_value)
+
+        self.run_kwargs = copy.deepcopy(kwargs)
+        self.etag = header.get('etag')
+        return True
+
+    def run_cached(self, filepath, max_age=None, **kwargs):
+        """
+        Loads the snapshot file if valid (see `load_snapshot`); otherwise
+        runs the request and saves the snapshot.  Concurrent processes wait
+        on a lock file while one of them makes the snapshot.
+        """
+        if self.load_snapshot(filepath, max_age, **kwargs):
+            return self
+
+        with artifact_lock(filepath):
+            if not self.load_snapshot(filepath, max_age, **kwargs):
+                self.run(**kwargs)
+                self.save_snapshot(filepath)
+
+        return self
+
+    def refresh(self, **kwargs):
+        """
+        Re-fetches the items (using the last run kwargs, if none are given)
+        and applies only the differences to the index: the items added,
+        removed, renamed, or with a changed value.  If the server provided
+        an ETag, the request is conditional; when the items are not
+        modified, the server responds 304 and there are no changes.
+
+        Returns
+        -------
+        IndexChanges
+            the ids of the items added, removed, renamed, and changed.
+        """
+        if kwargs:
+            self.run_kwargs = copy.deepcopy(kwargs)
+        else:
+            kwargs = copy.deepcopy(self.run_kwargs or {})
+
+        if self.etag:
+            options = dict(kwargs.get('_request_options') or {})
+            options['headers'] = dict(options.get('headers') or {},
+                                      **{'If-None-Match': self.etag})
+            kwargs['_request_options'] = options
+
+        items = self._fetch(**kwargs)
+        if items is None:
+            return IndexChanges([], [], [], [])
+
+        seen = set()
+        added, renamed, changed = [], [], []
+
+        for item_id, item_name, item_value in self._entries_(items):
+            seen.add(item_id)
+
+            if item_id not in self.catalog:
+                added.append((item_id, item_name, item_value))
+                continue
+
+            if self.index.name_for[item_id] != item_name:
+                renamed.append((item_id, item_name))
+
+            if self.catalog[item_id] != item_value:
+                self._update_entry(item_id, item_value)
+                changed.append(item_id)
+
+        removed = [item_id for item_id in self.catalog if item_id not in seen]
+        for item_id in removed:
+            self._remove_entry(item_id)
+
+        # the renamed items are removed from the index before any are put
+        # back, since items could have swapped names.
+
+        for item_id, _ in renamed:
+            self._index_items.pop(item_id, None)
+            del self.index[item_id]
+
+        for item_id, item_name in renamed:
+            self.index[item_id] = item_name
+
+        for entry in added:
+            self._add_entry(*entry)
+
+        return IndexChanges(
+            added=[entry[0] for entry in added], removed=removed,
+            renamed=[item_id for item_id, _ in renamed], changed=changed)
+
     def find(self, item_name):
         return None if item_name not in self else self[item_name]
 
@@ -163,14 +657,21 @@ class Indexer(object):
 
         return IndexIterator()
 
+    def _item(self, item_id, item_name=None):
+        index_item = self._index_items.get(item_id)
+        if index_item is None:
+            index_item = self._index_items[item_id] = self.index_item_type(
+                item_id=item_id, item_name=item_name or self.index.name_for[item_id],
+                item_value=self.catalog[item_id],
+                index=self)
+
+        return index_item
+
     def __getitem__(self, item_name):
         item_id = self.index.id_for.get(item_name)
         assert item_id, "item name %s not found in catalog" % item_name
 
-        return self.index_item_type(
-            item_id=item_id, item_name=item_name,
-            item_value=self.catalog[item_id],
-            index=self)
+        return self._item(item_id, item_name)
 
     def __len__(self):
         return len(self.index)
@@ -0,0 +1,135 @@
+import six
+from collections import defaultdict
+
+try:
+    from collections.abc import Mapping
+except ImportError:     # pragma: no cover, py2
+    from collections import Mapping
+
+from bravado_core.spec import Spec, build_api_serving_url
+from bravado_core.model import model_discovery
+from bravado_core.operation import Operation
+from bravado_core.resource import Resource, convert_path_to_resource
+from bravado_core.util import AliasKeyDict, sanitize_name
+
+__all__ = ['LazySpec']
+
+
+def _identity(value):
+    # the deref of a dereferenced spec; a module function, so that the
+    # spec can be pickled (see SpecCache).
+    return value
+
+
+class LazyOperations(Mapping):
+    """
+    The operations table of a lazy resource.  The table only holds the
+    (path, method) index; the bravado Operation, with its params, is built
+    the first time it is looked up.
+    """
+    def __init__(self, swagger_spec, op_index):
+        self._swagger_spec = swagger_spec
+        self._op_index = op_index
+
+    def __getitem__(self, op_name):
+        path_name, http_method = self._op_index[op_name]
+        return self._swagger_spec.build_operation(path_name, http_method)
+
+    def __iter__(self):
+        return iter(self._op_index)
+
+    def __len__(self):
+        return len(self._op_index)
+
+    def __contains__(self, op_name):
+        return op_name in self._op_index
+
+
+class LazySpec(Spec):
+    """
+    A bravado Spec that does not build the resources and operations up
+    front.  Only the path index is parsed when the spec is built, and each
+    Operation is built when first used; so that startup time and memory
+    grow with the operations actually used rather than the size of the spec.
+    """
+
+    def build(self):
+        self._validate_spec()
+
+        # the models are only discovered when they are used, or needed for
+        # the dereferenced spec; as Spec.build does, with its config.
+
+        if self.config['use_models'] or self.config['internally_dereference_refs']:
+            model_discovery(self)
+
+        if self.config['internally_dereference_refs']:
+            self.deref = _identity
+            self._internal_spec_dict = self.deref_flattened_spec
+
+        for user_defined_format in self.config['formats']:
+            self.register_format(user_defined_format)
+
+        # (key, value) = ((path_name, http_method), Operation) built on-demand
+        self.operations = dict()
+
+        # (key, value) = ((http_method, base_path + path_name), (path_name, http_method))
+        self._request_to_op_key = dict()
+
+        self.resources = self.build_resources()
+
+        self.api_url = build_api_serving_url(
+            spec_dict=self.spec_dict,
+            origin_url=self.origin_url,
+            use_spec_url_for_base_path=self.config['use_spec_url_for_base_path'])
+
+    def build_resources(self):
+        deref = self.deref
+        spec_dict = deref(self._internal_spec_dict)
+        base_path = spec_dict.get('basePath', '').rstrip('/')
+        tag_to_ops = defaultdict(dict)
+
+        for path_name, path_spec in six.iteritems(deref(spec_dict.get('paths', {}))):
+            for http_method, op_spec in six.iteritems(deref(path_spec)):
+                if http_method.startswith('x-') or http_method == 'parameters':
+                    continue
+
+                # the Operation here is only a shell used to determine the
+                # operation-id; the params are not built.
+
+                op_spec = deref(op_spec)
+                op_id = Operation(self, path_name, http_method, op_spec).operation_id
+                op_key = (path_name, http_method)
+
+                tags = (deref(op_spec.get('tags')) or
+                        [convert_path_to_resource(path_name)])
+
+                for tag in tags:
+                    tag_to_ops[deref(tag)][op_id] = op_key
+
+                self._request_to_op_key[(http_method, base_path + path_name)] = op_key
+
+        resources = AliasKeyDict()
+        for tag, op_index in six.iteritems(tag_to_ops):
+            sanitized_tag = sanitize_name(tag)
+            resources[sanitized_tag] = Resource(
+                sanitized_tag, LazyOperations(self, op_index))
+            resources.add_alias(tag, sanitized_tag)
+
+        return resources
+
+    def build_operation(self, path_name, http_method):
+        """ returns the Operation for (path_name, http_method), building it on first use """
+        op_key = (path_name, http_method)
+        op = self.operations.get(op_key)
+        if not op:
+            deref = self.deref
+            path_spec = deref(deref(deref(self._internal_spec_dict)['paths'])[path_name])
+            op_spec = deref(path_spec[http_method])
+            op = self.operations[op_key] = Operation.from_spec(
+                self, path_name, http_method, op_spec)
+
+        return op
+
+    def get_op_for_request(self, http_method, path_pattern):
+        op_key = self._request_to_op_key.get((http_method.lower(), path_pattern))
+        return self.build_operation(*op_key) if op_key else None
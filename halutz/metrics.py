@@ -0,0 +1,343 @@
+"""
+Request instrumentation.  When a client has hooks, each request call is
+timed by phase:
+
+    queue       waiting for the client rate limits, see halutz.ratelimit
+    marshal     building the http request from the params (bravado)
+    http        the http round-trip, until the response is read
+    unmarshal   decoding the response body
+    model       creating the response view or model object
+    backoff     waiting to retry the call, see halutz.resilience
+    total       the request call, end to end
+
+and, when the call completes, each hook is called with a RequestEvent
+(the operation, status code, phase times, payload sizes, retries, and
+error).  The Metrics collector is a hook that keeps per-operation
+histograms and counters, and exports them as a dict or in the Prometheus
+text format:
+
+    >>> client = Client(server_url, origin_spec=spec, metrics=True)
+    >>> ...
+    >>> print(client.metrics.prometheus())
+"""
+
+import bisect
+import threading
+from timeit import default_timer
+from collections import namedtuple, defaultdict
+
+import six
+
+__all__ = ['Metrics', 'Histogram', 'RequestEvent', 'RequestTimer', 'current_timer',
+           'NULL_TIMER']
+
+
+RequestEvent = namedtuple('RequestEvent', [
+    'operation_id', 'method', 'path', 'status_code', 'ok', 'phases',
+    'request_bytes', 'response_bytes', 'error', 'retries'])
+
+PHASES = ('queue', 'marshal', 'http', 'unmarshal', 'model', 'backoff', 'total')
+
+_local = threading.local()
+
+
+def current_timer():
+    """ returns the RequestTimer of the request call in progress in this thread, or a no-op timer """
+    return getattr(_local, 'timer', None) or NULL_TIMER
+
+
+class _NullPhase(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class _NullTimer(object):
+    _phase = _NullPhase()
+
+    def phase(self, name):
+        return self._phase
+
+    def retry(self, reason):
+        pass
+
+    def __bool__(self):
+        return False
+
+    __nonzero__ = __bool__
+
+
+NULL_TIMER = _NullTimer()
+
+
+class _Phase(object):
+    __slots__ = ('phases', 'name', 'start')
+
+    def __init__(self, phases, name):
+        self.phases, self.name = phases, name
+
+    def __enter__(self):
+        self.start = default_timer()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.phases[self.name] = (
+            self.phases.get(self.name, 0.0) + default_timer() - self.start)
+        return False
+
+
+class RequestTimer(object):
+    """
+    Times the phases of a request call, and calls the `hooks` with the
+    RequestEvent when the call completes.  The timer is made current (see
+    `current_timer`) in the thread while the call runs.
+    """
+
+    def __init__(self, request, hooks):
+        self.request = request
+        self.hooks = hooks
+        self.phases = dict()
+        self.request_bytes = self.response_bytes = 0
+
+        # the reason ('http_<status>', or exception class name) of each retry
+        self.retries = list()
+
+    def phase(self, name):
+        return _Phase(self.phases, name)
+
+    def retry(self, reason):
+        """ records a retry of the call """
+        self.retries.append(reason)
+
+    def __bool__(self):
+        return True
+
+    __nonzero__ = __bool__
+
+    def sent(self, rqst):
+        """ records the request body size, from the bravado http future """
+        body = getattr(getattr(rqst, 'future', None), 'request', None)
+        body = getattr(body, 'data', None) or getattr(body, 'json', None)
+        if isinstance(body, (six.binary_type, six.text_type)):
+            self.request_bytes = len(body)
+
+    def received(self, http_resp):
+        """ records the response body size """
+        try:
+            self.response_bytes = len(http_resp.raw_bytes or b'')
+        except Exception:
+            self.response_bytes = 0
+
+    def run(self, call):
+        """ runs `call()`, a request call returning the (response, ok, http response) tuple """
+        prev_timer, _local.timer = getattr(_local, 'timer', None), self
+        try:
+            with self.phase('total'):
+                result = call()
+
+        except Exception as exc:
+            _local.timer = prev_timer
+            self.report(error=exc)
+            raise
+
+        _local.timer = prev_timer
+        self.report(ok=result[1], http_resp=result[2])
+        return result
+
+    def report(self, ok=False, http_resp=None, error=None):
+        """ calls the hooks with the RequestEvent of the completed call """
+        if error is not None:
+            http_resp = getattr(error, 'response', None)
+
+        status_code = getattr(http_resp, 'status_code', None)
+        if error is not None:
+            error = error.__class__.__name__
+        elif not ok:
+            error = 'http_%s' % status_code
+
+        self.phases.setdefault('total', 0.0)
+
+        event = RequestEvent(
+            operation_id=self.request.operation.operation_id,
+            method=self.request.method, path=self.request.path,
+            status_code=status_code, ok=bool(ok), phases=self.phases,
+            request_bytes=self.request_bytes, response_bytes=self.response_bytes,
+            error=error, retries=tuple(self.retries))
+
+        for hook in self.hooks:
+            hook(event)
+
+
+class Histogram(object):
+    """ cumulative-bucket histogram, as used by Prometheus """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """ returns the list of (upper bound, cumulative count); the last bound is '+Inf' """
+        total, result = 0, []
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q):
+        """ returns the upper bound of the bucket holding the `q` quantile (an estimate) """
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99)
+        }
+
+
+class Metrics(object):
+    """
+    Per-operation request metrics; a client hook.
+
+    Parameters
+    ----------
+    buckets : tuple
+        the upper bounds (seconds) of the latency histogram buckets.
+
+    size_buckets : tuple
+        the upper bounds (bytes) of the payload size histogram buckets.
+    """
+    DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                       0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    DEFAULT_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576,
+                            4194304, 16777216)
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, size_buckets=DEFAULT_SIZE_BUCKETS,
+                 prefix='halutz'):
+        self.buckets = buckets
+        self.size_buckets = size_buckets
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # (key, value) = ((operation id, phase), Histogram)
+            self.latency = dict()
+            # (key, value) = ((operation id, 'request' | 'response'), Histogram)
+            self.sizes = dict()
+            # (key, value) = ((operation id, status code), count)
+            self.statuses = defaultdict(int)
+            # (key, value) = ((operation id, error), count)
+            self.errors = defaultdict(int)
+            # (key, value) = ((operation id, retry reason), count)
+            self.retries = defaultdict(int)
+
+    def _histogram(self, table, key, buckets):
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = Histogram(buckets)
+        return histogram
+
+    def __call__(self, event):
+        op_id = event.operation_id
+        with self._lock:
+            for phase, seconds in six.iteritems(event.phases):
+                self._histogram(self.latency, (op_id, phase), self.buckets).observe(seconds)
+
+            self._histogram(self.sizes, (op_id, 'request'), self.size_buckets).observe(
+                event.request_bytes)
+            self._histogram(self.sizes, (op_id, 'response'), self.size_buckets).observe(
+                event.response_bytes)
+
+            self.statuses[(op_id, event.status_code)] += 1
+            if event.error:
+                self.errors[(op_id, event.error)] += 1
+            for reason in event.retries:
+                self.retries[(op_id, reason)] += 1
+
+    def as_dict(self):
+        """ returns the metrics as a dict, by operation id """
+        ops = defaultdict(lambda: {'latency': {}, 'sizes': {}, 'statuses': {}, 'errors': {},
+                                   'retries': {}})
+        with self._lock:
+            for (op_id, phase), histogram in six.iteritems(self.latency):
+                ops[op_id]['latency'][phase] = histogram.as_dict()
+            for (op_id, direction), histogram in six.iteritems(self.sizes):
+                ops[op_id]['sizes'][direction] = histogram.as_dict()
+            for (op_id, status_code), count in six.iteritems(self.statuses):
+                ops[op_id]['statuses'][str(status_code)] = count
+            for (op_id, error), count in six.iteritems(self.errors):
+                ops[op_id]['errors'][error] = count
+            for (op_id, reason), count in six.iteritems(self.retries):
+                ops[op_id]['retries'][reason] = count
+
+        return dict(ops)
+
+    @staticmethod
+    def _labels(**labels):
+        return ','.join('%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                        for name, value in sorted(six.iteritems(labels)))
+
+    def _histogram_lines(self, name, table, label_name):
+        lines = []
+        for (op_id, label), histogram in sorted(six.iteritems(table), key=lambda each: str(each[0])):
+            labels = {'operation': op_id, label_name: label}
+            for bound, total in histogram.cumulative():
+                lines.append('%s_bucket{%s} %d' % (
+                    name, self._labels(le=bound, **labels), total))
+            lines.append('%s_sum{%s} %r' % (name, self._labels(**labels), histogram.sum))
+            lines.append('%s_count{%s} %d' % (name, self._labels(**labels), histogram.count))
+        return lines
+
+    def prometheus(self):
+        """ returns the metrics in the Prometheus text exposition format """
+        seconds = self.prefix + '_request_seconds'
+        sizes = self.prefix + '_payload_bytes'
+        requests_total = self.prefix + '_requests_total'
+        errors_total = self.prefix + '_request_errors_total'
+        retries_total = self.prefix + '_request_retries_total'
+
+        with self._lock:
+            lines = ['# HELP %s request latency by operation and phase' % seconds,
+                     '# TYPE %s histogram' % seconds]
+            lines.extend(self._histogram_lines(seconds, self.latency, 'phase'))
+
+            lines.extend(['# HELP %s request and response body sizes' % sizes,
+                          '# TYPE %s histogram' % sizes])
+            lines.extend(self._histogram_lines(sizes, self.sizes, 'direction'))
+
+            lines.extend(['# HELP %s requests by operation and status code' % requests_total,
+                          '# TYPE %s counter' % requests_total])
+            lines.extend('%s{%s} %d' % (requests_total, self._labels(operation=op_id, status=status), count)
+                         for (op_id, status), count in sorted(six.iteritems(self.statuses), key=str))
+
+            lines.extend(['# HELP %s failed requests by operation and error' % errors_total,
+                          '# TYPE %s counter' % errors_total])
+            lines.extend('%s{%s} %d' % (errors_total, self._labels(operation=op_id, error=error), count)
+                         for (op_id, error), count in sorted(six.iteritems(self.errors), key=str))
+
+            lines.extend(['# HELP %s request retries by operation and reason' % retries_total,
+                          '# TYPE %s counter' % retries_total])
+            lines.extend('%s{%s} %d' % (retries_total, self._labels(operation=op_id, reason=reason), count)
+                         for (op_id, reason), count in sorted(six.iteritems(self.retries), key=str))
+
+        return '\n'.join(lines) + '\n'
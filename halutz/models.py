@@ -0,0 +1,220 @@
+"""
+Runtime support for the model classes generated by :mod:`halutz.codegen`.
+The generated classes provide the parts of the python-jsonschema-objects
+class API that halutz (and its users) rely on: construction from keyword
+properties, attribute access with validation on set, `validate()`,
+`for_json()`, `propinfo()` and `proptype()`; but they are plain
+`__slots__` classes with precompiled validators.
+"""
+
+import json
+import six
+
+__all__ = ['CompiledModel', 'CompiledArray', 'ValidationError']
+
+
+class ValidationError(ValueError):
+    def __init__(self, errors):
+        super(ValidationError, self).__init__('\n'.join(errors))
+        self.errors = errors
+
+
+def _for_json(value):
+    if hasattr(value, 'for_json'):
+        return value.for_json()
+    if isinstance(value, list):
+        return [_for_json(each) for each in value]
+    return value
+
+
+def _check(validator, value, path):
+    errors = []
+    validator(_for_json(value), path, errors)
+    if errors:
+        raise ValidationError(errors)
+
+
+_PYTYPES = {
+    'integer': int,
+    'string': str,
+    'object': dict
+}
+
+
+class CompiledModel(object):
+    __slots__ = ('_extra',)
+
+    # these class attributes are set by each generated class
+
+    __props__ = {}          # (key, value) = (attribute name, property name)
+    __attrs__ = {}          # (key, value) = (property name, attribute name)
+    __properties__ = {}     # (key, value) = (property name, property schema)
+    __nested__ = {}         # (key, value) = (property name, model class)
+    __arrays__ = {}         # (key, value) = (property name, item model class)
+    __checks__ = {}         # (key, value) = (property name, validator function)
+    __additional__ = True   # if additional properties are allowed
+    __validator__ = None    # validator function of the model
+
+    def __init__(self, **props):
+        for prop_name, value in six.iteritems(props):
+            setattr(self, self.__attrs__.get(prop_name, prop_name), value)
+
+    def _coerce(self, prop_name, value):
+        # nested objects/arrays of models are given as dicts; make them models.
+
+        model_cls = self.__nested__.get(prop_name)
+        if model_cls and isinstance(value, dict):
+            return model_cls(**value)
+
+        item_cls = self.__arrays__.get(prop_name)
+        if item_cls and isinstance(value, list):
+            return [item_cls(**each) if isinstance(each, dict) else each
+                    for each in value]
+
+        return value
+
+    def __setattr__(self, attr, value):
+        prop_name = self.__props__.get(attr)
+
+        if prop_name is None:
+            if attr == '_extra':
+                return object.__setattr__(self, attr, value)
+
+            # properties whose names are not usable attribute names can
+            # be set using the property name
+            if attr in self.__attrs__:
+                return setattr(self, self.__attrs__[attr], value)
+
+            if not self.__additional__:
+                raise AttributeError("%s has no property '%s'" % (
+                    self.__class__.__name__, attr))
+
+            try:
+                self._extra[attr] = value
+            except AttributeError:
+                self._extra = {attr: value}
+            return
+
+        if value is not None:
+            value = self._coerce(prop_name, value)
+            check = self.__checks__.get(prop_name)
+            if check:
+                _check(check, value, '%s.%s' % (self.__class__.__name__, prop_name))
+
+        object.__setattr__(self, attr, value)
+
+    def __getattr__(self, attr):
+        # only called when the attribute is not set; so unset properties
+        # are None, as they would be with python-jsonschema-objects.
+
+        if attr in self.__props__:
+            return None
+
+        try:
+            return object.__getattribute__(self, '_extra')[attr]
+        except (AttributeError, KeyError):
+            raise AttributeError("%s has no property '%s'" % (
+                self.__class__.__name__, attr))
+
+    def for_json(self):
+        # the None properties are left out, as they are unset in the
+        # python-jsonschema-objects models.
+
+        data = dict()
+        for attr, prop_name in six.iteritems(self.__props__):
+            try:
+                value = object.__getattribute__(self, attr)
+            except AttributeError:
+                continue
+            if value is not None:
+                data[prop_name] = _for_json(value)
+
+        try:
+            data.update(self._extra)
+        except AttributeError:
+            pass
+
+        return data
+
+    as_dict = for_json
+
+    def serialize(self, **kwargs):
+        return json.dumps(self.for_json(), **kwargs)
+
+    def validate(self):
+        _check(self.__validator__, self, self.__class__.__name__)
+        return True
+
+    def propinfo(self, prop_name):
+        return self.__properties__.get(prop_name) or {}
+
+    def proptype(self, prop_name):
+        if prop_name in self.__nested__:
+            return self.__nested__[prop_name]
+
+        prop_type = self.propinfo(prop_name).get('type')
+        if prop_type == 'array':
+            return self.__arrays__.get(prop_name)
+
+        return _PYTYPES.get(prop_type, prop_type)
+
+    def __getstate__(self):
+        state = dict()
+        for attr in self.__props__:
+            try:
+                state[attr] = object.__getattribute__(self, attr)
+            except AttributeError:
+                continue
+
+        try:
+            state['_extra'] = self._extra
+        except AttributeError:
+            pass
+
+        return state
+
+    def __setstate__(self, state):
+        for attr, value in six.iteritems(state):
+            object.__setattr__(self, attr, value)
+
+    def __eq__(self, other):
+        return (isinstance(other, CompiledModel) and
+                self.for_json() == other.for_json())
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "<%s attributes: %s>" % (
+            self.__class__.__name__, ', '.join(sorted(self.__attrs__)))
+
+
+class CompiledArray(list):
+    __slots__ = ()
+
+    type = 'array'
+    __itemtype__ = None     # model class of the items, if any
+    __validator__ = None    # validator function of the array
+
+    def __init__(self, items=()):
+        item_cls = self.__itemtype__
+        super(CompiledArray, self).__init__(
+            item_cls(**each) if item_cls and isinstance(each, dict) else each
+            for each in items)
+
+    def for_json(self):
+        return [_for_json(each) for each in self]
+
+    as_dict = for_json
+
+    def serialize(self, **kwargs):
+        return json.dumps(self.for_json(), **kwargs)
+
+    def validate(self):
+        _check(self.__validator__, self, self.__class__.__name__)
+        return True
+
+    def __repr__(self):
+        return "<%s %s>" % (self.__class__.__name__, list.__repr__(self))
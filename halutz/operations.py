@@ -0,0 +1,224 @@
+"""
+Operation lookup tables, built once per client:
+
+    >>> op = client.operations.get('get', '/api/blueprints/{blueprint_id}/nodes')
+    >>> found = client.operations.match('get', '/api/blueprints/abc/nodes')
+    >>> found.operation.path_name, found.params
+    ('/api/blueprints/{blueprint_id}/nodes', {'blueprint_id': 'abc'})
+
+`get` is a dict lookup by (method, path template); `match` resolves a
+concrete URL (or path) to its operation and path params by walking a
+trie of the path segments, literal segments before templated ones; a
+templated segment matches when the literal one has no operation of the
+method, e.g. GET /items/search is the GET /items/{id} operation when
+/items/search only has a POST operation.
+"""
+
+import re
+from collections import namedtuple
+
+import six
+from six.moves.urllib.parse import urlsplit, unquote
+
+__all__ = ['OperationIndex', 'OperationMatch']
+
+
+# the operation of a matched URL; `params` are the path params, converted
+# to their integer/number type.
+
+OperationMatch = namedtuple('OperationMatch', 'operation params')
+
+_template_param = re.compile(r'{([^}]+)}')
+
+
+class _Node(object):
+    __slots__ = ('literals', 'templates', 'ops')
+
+    def __init__(self):
+        # (key, value) = (path segment, _Node)
+        self.literals = dict()
+
+        # list of (segment, segment regex, param names, _Node); for the
+        # segments with a template param, e.g. '{id}' or '{name}.json'
+        self.templates = list()
+
+        # (key, value) = (http method, op key); the operations of the path
+        # ending at this node
+        self.ops = dict()
+
+    def template_child(self, segment):
+        for each_segment, regex, names, child in self.templates:
+            if each_segment == segment:
+                return child
+
+        child = _Node()
+        self.templates.append((segment, self.segment_regex(segment),
+                               _template_param.findall(segment), child))
+
+        # the templates with more literal characters are matched first
+        self.templates.sort(key=lambda each: -len(_template_param.sub('', each[0])))
+        return child
+
+    @staticmethod
+    def segment_regex(segment):
+        parts = _template_param.split(segment)
+
+        # the split alternates literal text and param names
+        return re.compile('^%s$' % ''.join(
+            '([^/]+?)' if index % 2 else re.escape(part)
+            for index, part in enumerate(parts)))
+
+
+class OperationIndex(object):
+    """
+    The (method, path template) -> operation table of a bravado spec (or
+    halutz LazySpec), and the matcher of concrete paths to operations.
+    Paths are indexed both with and without the spec 'basePath'.  The
+    bravado Operations are looked up from the spec when found, so that a
+    LazySpec still only builds the operations that are used.
+    """
+    _PARAM_TYPES = {
+        'integer': int,
+        'number': float
+    }
+
+    def __init__(self, swagger_spec):
+        self.swagger_spec = swagger_spec
+        self.base_path = swagger_spec.spec_dict.get('basePath', '').rstrip('/')
+
+        # (key, value) = ((http method, path), op key); the op key is the
+        # (path template, http method)
+        self.op_keys = dict()
+
+        # (key, value) = (path template, [http method, ...])
+        self.paths = dict()
+
+        self._root = _Node()
+        self._operations = None
+
+        deref = swagger_spec.deref
+        for path_name, path_spec in six.iteritems(deref(swagger_spec.spec_dict.get('paths') or {})):
+            methods = [method for method in deref(path_spec)
+                       if not method.startswith('x-') and method != 'parameters']
+
+            self.paths[path_name] = methods
+            for method in methods:
+                self.add(method, path_name)
+
+    def add(self, http_method, path_name):
+        op_key = (path_name, http_method)
+        self.op_keys[(http_method, path_name)] = op_key
+        if self.base_path:
+            self.op_keys[(http_method, self.base_path + path_name)] = op_key
+
+        node = self._root
+        for segment in path_name.strip('/').split('/'):
+            if '{' in segment:
+                node = node.template_child(segment)
+            else:
+                node = node.literals.setdefault(segment, _Node())
+
+        node.ops[http_method] = op_key
+
+    def operation(self, op_key):
+        """ returns the bravado Operation of the (path template, http method) `op_key` """
+        build_operation = getattr(self.swagger_spec, 'build_operation', None)
+        if build_operation:
+            return build_operation(*op_key)
+
+        if self._operations is None:
+            self._operations = dict(
+                ((op.path_name, op.http_method), op)
+                for resource in self.swagger_spec.resources.values()
+                for op in resource.operations.values())
+
+        return self._operations.get(op_key)
+
+    def get(self, http_method, path_name):
+        """ returns the Operation for the http method and path template, or None """
+        op_key = self.op_keys.get((http_method.lower(), path_name))
+        return self.operation(op_key) if op_key else None
+
+    def methods(self, path_name):
+        """ returns the dict of (http method, Operation) of the path template, or None """
+        methods = self.paths.get(path_name)
+        if methods is None and self.base_path and path_name.startswith(self.base_path):
+            methods = self.paths.get(path_name[len(self.base_path):])
+            path_name = path_name[len(self.base_path):]
+
+        if methods is None:
+            return None
+
+        return dict((method, self.operation((path_name, method))) for method in methods)
+
+    def _walk(self, node, segments, index, params, http_method=None):
+        # the node of the path, with an operation of `http_method` (or of
+        # any method, if None)
+        if index == len(segments):
+            return node if (http_method in node.ops if http_method else node.ops) else None
+
+        segment = segments[index]
+        child = node.literals.get(segment)
+        if child:
+            found = self._walk(child, segments, index + 1, params, http_method)
+            if found:
+                return found
+
+        for _, regex, names, child in node.templates:
+            matched = regex.match(segment)
+            if not matched:
+                continue
+
+            found = self._walk(child, segments, index + 1, params, http_method)
+            if found:
+                params.update(zip(names, (unquote(value) if '%' in value else value
+                                          for value in matched.groups())))
+                return found
+
+        return None
+
+    def _match(self, url, http_method=None):
+        path = urlsplit(url).path if ('://' in url or '?' in url or '#' in url) else url
+        if self.base_path and path.startswith(self.base_path + '/'):
+            path = path[len(self.base_path):]
+
+        params = dict()
+        node = self._walk(self._root, path.strip('/').split('/'), 0, params, http_method)
+        return node, params
+
+    def match_path(self, url):
+        """
+        Returns the (path template, path params) of the path of `url`, a URL
+        or a path; or (None, None) when no path template matches.
+        """
+        node, params = self._match(url)
+        if not node:
+            return None, None
+
+        path_name, _ = next(iter(node.ops.values()))
+        return path_name, params
+
+    def match(self, http_method, url):
+        """
+        Returns the OperationMatch (operation, path params) of the request of
+        `http_method` to `url`, a URL or path; or None if there is no such
+        operation.
+        """
+        http_method = http_method.lower()
+        node, params = self._match(url, http_method)
+        if not node:
+            return None
+
+        op_key = node.ops[http_method]
+
+        operation = self.operation(op_key)
+        for name, value in six.iteritems(params):
+            param = operation.params.get(name)
+            to_type = self._PARAM_TYPES.get(param.param_spec.get('type')) if param else None
+            if to_type:
+                try:
+                    params[name] = to_type(value)
+                except ValueError:
+                    pass
+
+        return OperationMatch(operation, params)
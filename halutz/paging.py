@@ -0,0 +1,229 @@
+"""
+Pagination strategies used by :meth:`Request.paginate` (and the Indexer)
+to fetch a collection that the server returns in pages.  The strategies
+where the pages can be addressed up front (offset/limit and page numbers,
+when the response includes the total count) fetch the remaining pages
+concurrently once the first page is returned; the others (page tokens and
+'next' links) fetch one page after the other.
+"""
+
+import math
+from collections import namedtuple
+
+import six
+from six.moves.urllib.parse import urlsplit, parse_qs
+from first import first
+
+__all__ = ['Page', 'PagingError', 'Paging', 'OffsetPaging', 'PageNumberPaging',
+           'TokenPaging', 'LinkPaging', 'detect_paging', 'default_items_key']
+
+
+# a page of a paginated response; `items` is the response items_key value,
+# and `http_resp` is None for the pages fetched concurrently.
+
+Page = namedtuple('Page', 'params data http_resp items')
+
+
+class PagingError(RuntimeError):
+    pass
+
+
+def default_items_key(request, status_code='200'):
+    """ returns the name of the first property of the response schema; as the Indexer does """
+    deref = request.client.deref
+    resp_spec = request.spec['responses'].get(status_code) or {}
+    resp_schema = deref(resp_spec.get('schema')) or {}
+    return first(resp_schema.get('properties') or {})
+
+
+class Paging(object):
+    """
+    Base pagination strategy; a single page.  A strategy provides the
+    params of the first page, and then either the params of all the other
+    pages (random access), or the params of the next page.
+    """
+
+    def first(self, params):
+        """ returns the params of the first page """
+        return params
+
+    def pages(self, page):
+        """ returns the list of params of all the pages after the first `page`, or None if unknown """
+        return None
+
+    def next(self, page):
+        """ returns the params of the page after `page`, or None at the end """
+        return None
+
+
+class OffsetPaging(Paging):
+    """
+    offset/limit pagination.  When the response has the total `count` the
+    remaining pages are fetched concurrently; otherwise pages are fetched
+    until one has less than `limit` items.
+    """
+
+    def __init__(self, offset='offset', limit='limit', count='count', page_size=100):
+        self.offset = offset
+        self.limit = limit
+        self.count = count
+        self.page_size = page_size
+
+    def first(self, params):
+        params = dict(params)
+        params.setdefault(self.limit, self.page_size)
+        params.setdefault(self.offset, 0)
+        return params
+
+    def pages(self, page):
+        total = page.data.get(self.count) if self.count else None
+        if total is None:
+            return None
+
+        limit = page.params[self.limit]
+        return [dict(page.params, **{self.offset: offset})
+                for offset in six.moves.range(page.params[self.offset] + limit, total, limit)]
+
+    def next(self, page):
+        # a page without items (null, or missing) is the last page.
+        limit = page.params[self.limit]
+        if not page.items or len(page.items) < limit:
+            return None
+
+        return dict(page.params, **{self.offset: page.params[self.offset] + limit})
+
+
+class PageNumberPaging(Paging):
+    """
+    page number pagination, where the first page is `first_page`.  When the
+    response has the total `count` the remaining pages are fetched
+    concurrently; otherwise pages are fetched until one is short.
+    """
+
+    def __init__(self, page='page', page_size_param='page_size', count='count',
+                 page_size=100, first_page=1):
+        self.page = page
+        self.page_size_param = page_size_param
+        self.count = count
+        self.page_size = page_size
+        self.first_page = first_page
+
+    def first(self, params):
+        params = dict(params)
+        params.setdefault(self.page, self.first_page)
+        if self.page_size_param:
+            params.setdefault(self.page_size_param, self.page_size)
+        return params
+
+    def _size(self, params):
+        return params[self.page_size_param] if self.page_size_param else self.page_size
+
+    def pages(self, page):
+        total = page.data.get(self.count) if self.count else None
+        if total is None:
+            return None
+
+        page_num = page.params[self.page]
+        last_page = page_num + int(math.ceil(float(total) / self._size(page.params))) - 1
+        return [dict(page.params, **{self.page: each})
+                for each in six.moves.range(page_num + 1, last_page + 1)]
+
+    def next(self, page):
+        if not page.items or len(page.items) < self._size(page.params):
+            return None
+
+        return dict(page.params, **{self.page: page.params[self.page] + 1})
+
+
+class TokenPaging(Paging):
+    """
+    page token (cursor) pagination; the response `next_token` property is
+    the `token` param of the next page.  When `next_token` is None, the
+    commonly used property names are tried.
+    """
+
+    NEXT_TOKEN_NAMES = ('next_page_token', 'nextPageToken', 'next_cursor',
+                        'nextCursor', 'next_token', 'cursor')
+
+    def __init__(self, token='page_token', next_token=None):
+        self.token = token
+        self.next_token = next_token
+
+    def next(self, page):
+        names = [self.next_token] if self.next_token else self.NEXT_TOKEN_NAMES
+        token = first(page.data.get(name) for name in names)
+        if not token:
+            return None
+
+        return dict(page.params, **{self.token: token})
+
+
+class LinkPaging(Paging):
+    """
+    'next' link pagination; the URL of the next page is the rel="next" Link
+    header, or the response `next_field` property (e.g. 'next').  The query
+    of the URL provides the params of the next page; when the operation
+    params (`request.params`) are given as `op_params`, only those are taken
+    from it, and converted to their numeric/boolean types.
+    """
+
+    _QUERY_TYPES = {
+        'integer': int,
+        'number': float,
+        'boolean': lambda value: value.lower() == 'true'
+    }
+
+    def __init__(self, next_field='next', op_params=None):
+        self.next_field = next_field
+        self.op_params = op_params
+
+    def _next_url(self, page):
+        if self.next_field and isinstance(page.data.get(self.next_field), six.string_types):
+            return page.data[self.next_field]
+
+        from requests.utils import parse_header_links
+
+        link_header = page.http_resp.headers.get('link') if page.http_resp else None
+        return first(link.get('url') for link in parse_header_links(link_header or '')
+                     if link.get('rel') == 'next')
+
+    def next(self, page):
+        next_url = self._next_url(page)
+        if not next_url:
+            return None
+
+        params = dict(page.params)
+        for name, values in six.iteritems(parse_qs(urlsplit(next_url).query)):
+            if self.op_params is None:
+                params[name] = values[0] if len(values) == 1 else values
+                continue
+
+            op_param = self.op_params.get(name)
+            if op_param is None:
+                continue
+
+            to_type = self._QUERY_TYPES.get(op_param.param_spec.get('type'))
+            if to_type:
+                values = [to_type(value) for value in values]
+
+            params[name] = values if op_param.param_spec.get('type') == 'array' else values[0]
+
+        return params
+
+
+def detect_paging(request):
+    """ returns the paging strategy for the `request` from its parameter names """
+    names = set(request.params)
+
+    if {'offset', 'limit'} <= names:
+        return OffsetPaging()
+
+    if 'page' in names:
+        return PageNumberPaging(page_size_param=first(
+            name for name in ('page_size', 'per_page', 'pageSize', 'size') if name in names))
+
+    token = first(name for name in ('page_token', 'pageToken', 'cursor') if name in names)
+    if token:
+        return TokenPaging(token=token)
+
+    return LinkPaging(op_params=request.params)
@@ -0,0 +1,177 @@
+"""
+Client-side rate limiting and request scheduling.  Each request call
+takes a token from the bucket of its host, and from the bucket of its
+operation when the operation has a limit; when a bucket is empty the
+call waits.  The waiting calls are admitted by priority (the lower value
+first), then in arrival order; so interactive calls go ahead of the
+background ones (e.g. Indexer refreshes), whether they are made by the
+caller thread or by a thread pool (see Request.map):
+
+    >>> client = Client(server_url, origin_spec=spec, rate_limit=RateLimiter(
+    ...     rate=20, burst=5, operations={'blueprints_get': 2}))
+    >>> client.request.blueprints.blueprints_get.priority = PRIORITY_BACKGROUND
+
+Each limit is a rate (calls per second), or a (rate, burst) tuple; the
+burst is the number of calls that can be made at once, after a quiet
+period.  The time a call waits is the 'queue' phase of the request
+metrics, see halutz.metrics.
+"""
+
+import itertools
+import threading
+from timeit import default_timer
+
+import six
+
+__all__ = ['RateLimiter', 'TokenBucket', 'PRIORITY_INTERACTIVE', 'PRIORITY_BACKGROUND']
+
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+
+class TokenBucket(object):
+    """
+    A bucket of `burst` tokens, refilled at `rate` tokens per second.  It
+    is not thread-safe; the RateLimiter uses it under its lock.
+    """
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst or max(1.0, self.rate))
+        self.tokens = self.burst
+        self.updated = default_timer()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now=None):
+        """ returns the seconds until a token is available; 0 if one is """
+        self._refill(default_timer() if now is None else now)
+        return 0.0 if self.tokens >= 1.0 else (1.0 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1.0
+
+
+class _Waiter(object):
+    __slots__ = ('order', 'buckets')
+
+    def __init__(self, order, buckets):
+        self.order, self.buckets = order, buckets
+
+
+class RateLimiter(object):
+    """
+    The token buckets, by host and by operation, of a client; and the
+    queue of the calls waiting for tokens.
+
+    Parameters
+    ----------
+    rate, burst :
+        the limit of each host; None for no host limit.
+
+    hosts : dict
+        (key, value) = (host, limit); the limit of the host, rather than
+        `rate` and `burst`.
+
+    operations : dict
+        (key, value) = (operation id, limit); the operations with a limit
+        of their own, in addition to their host limit.
+    """
+    def __init__(self, rate=None, burst=None, hosts=None, operations=None):
+        self.rate = rate
+        self.burst = burst
+        self.host_limits = dict(hosts or {})
+        self.operation_limits = dict(operations or {})
+
+        # (key, value) = (('host' | 'operation', name), TokenBucket)
+        self.buckets = dict()
+
+        # the waiting calls; each ordered by its (priority, arrival)
+        self._waiting = list()
+        self._arrival = itertools.count()
+        self._cond = threading.Condition(threading.Lock())
+
+    @staticmethod
+    def _make_bucket(limit):
+        return TokenBucket(*limit) if isinstance(limit, (tuple, list)) else TokenBucket(limit)
+
+    def _bucket(self, kind, name, limit):
+        key = (kind, name)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = self._make_bucket(limit)
+        return bucket
+
+    def _buckets(self, request):
+        buckets = []
+
+        host = request.host
+        host_limit = self.host_limits.get(
+            host, (self.rate, self.burst) if self.rate else None)
+        if host_limit:
+            buckets.append(self._bucket('host', host, host_limit))
+
+        op_id = request.operation.operation_id
+        if op_id in self.operation_limits:
+            buckets.append(self._bucket('operation', op_id, self.operation_limits[op_id]))
+
+        return buckets
+
+    def _is_next(self, waiter):
+        # a call is next when no call ahead of it waits for any of its buckets
+        return not any(
+            other.order < waiter.order and
+            any(bucket in other.buckets for bucket in waiter.buckets)
+            for other in self._waiting)
+
+    def acquire(self, request, priority=None):
+        """
+        Waits for the tokens of a call of `request`, by the `priority` (the
+        request priority if None); returns the seconds waited.
+        """
+        start = default_timer()
+        with self._cond:
+            buckets = self._buckets(request)
+            if not buckets:
+                return 0.0
+
+            if priority is None:
+                priority = request.priority
+
+            waiter = _Waiter((priority, next(self._arrival)), buckets)
+            self._waiting.append(waiter)
+
+            try:
+                while True:
+                    wait = None
+                    if self._is_next(waiter):
+                        now = default_timer()
+                        wait = max(bucket.wait_time(now) for bucket in buckets)
+                        if wait <= 0:
+                            for bucket in buckets:
+                                bucket.take()
+                            break
+
+                    self._cond.wait(wait)
+
+            finally:
+                self._waiting.remove(waiter)
+                self._cond.notify_all()
+
+        return default_timer() - start
+
+    def waiting(self):
+        """ returns the number of calls waiting for tokens """
+        with self._cond:
+            return len(self._waiting)
+
+    def tokens(self):
+        """ returns the dict of (bucket key, available tokens) """
+        now = default_timer()
+        with self._cond:
+            for bucket in self.buckets.values():
+                bucket.wait_time(now)
+            return dict((key, round(bucket.tokens, 3))
+                        for key, bucket in six.iteritems(self.buckets))
@@ -0,0 +1,130 @@
+"""
+Compact storage of the Indexer catalog items.  Rather than keeping each
+decoded item dict, the item values are packed into a tuple ordered by a
+RecordLayout built from the items schema properties; so the property
+names are stored once per layout (interned), not once per item.  Values
+for properties not in the schema are kept in a (per-item) extra dict.
+
+A CompactRecord is a read-only Mapping over the packed values, so it is
+used the same way as the item dict it replaces.
+"""
+
+import six
+
+try:
+    from collections.abc import Mapping
+except ImportError:     # pragma: no cover, py2
+    from collections import Mapping
+
+from .validators import MISSING
+
+__all__ = ['RecordLayout', 'CompactRecord', 'intern_keys']
+
+
+def intern_keys(value):
+    """ returns `value` with the keys of the (nested) dicts interned """
+    if isinstance(value, dict):
+        return dict((six.moves.intern(key) if isinstance(key, str) else key,
+                     intern_keys(each))
+                    for key, each in six.iteritems(value))
+
+    if isinstance(value, list):
+        return [intern_keys(each) for each in value]
+
+    return value
+
+
+class RecordLayout(object):
+    """
+    The (ordered) property names of the records; shared by all the records
+    of an Indexer.
+    """
+    __slots__ = ('fields', 'positions')
+
+    def __init__(self, fields):
+        self.fields = tuple(six.moves.intern(str(field)) for field in fields)
+        self.positions = dict((field, pos) for pos, field in enumerate(self.fields))
+
+    def pack(self, item_value):
+        """ returns the tuple of `item_value` values; the last is the extra dict, or None """
+        values = [intern_keys(item_value.get(field, MISSING)) for field in self.fields]
+
+        extra = dict(
+            (six.moves.intern(key), intern_keys(value))
+            for key, value in six.iteritems(item_value) if key not in self.positions)
+
+        values.append(extra or None)
+        return tuple(values)
+
+    def record(self, item_value):
+        """ returns the CompactRecord of the `item_value` dict """
+        return CompactRecord(self, self.pack(item_value))
+
+    def __getstate__(self):
+        return self.fields
+
+    def __setstate__(self, fields):
+        self.__init__(fields)
+
+
+class CompactRecord(Mapping):
+    __slots__ = ('_layout', '_values')
+
+    def __init__(self, layout, values):
+        self._layout = layout
+        self._values = values
+
+    def __getitem__(self, key):
+        pos = self._layout.positions.get(key)
+        if pos is None:
+            extra = self._values[-1]
+            if extra is None:
+                raise KeyError(key)
+            return extra[key]
+
+        value = self._values[pos]
+        if value is MISSING:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        for field, value in zip(self._layout.fields, self._values):
+            if value is not MISSING:
+                yield field
+
+        for key in self._values[-1] or ():
+            yield key
+
+    def __len__(self):
+        return (len(self._values) - 1 - self._values.count(MISSING) +
+                len(self._values[-1] or ()))
+
+    def for_json(self):
+        """ returns the item dict """
+        return dict(self.items())
+
+    as_dict = for_json
+
+    def __eq__(self, other):
+        if isinstance(other, CompactRecord):
+            return self._values == other._values and self._layout.fields == other._layout.fields
+
+        if isinstance(other, Mapping):
+            return self._values == self._layout.pack(other)
+
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __getstate__(self):
+        return self._layout, self._values
+
+    def __setstate__(self, state):
+        self._layout, self._values = state
+
+    def __repr__(self):
+        return repr(self.for_json())
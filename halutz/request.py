@@ -1,41 +1,93 @@
 import six
 from first import first
+from six.moves.urllib.parse import urlsplit
+import copy
 import json
+from collections import namedtuple
 
-import msgpack
-from bravado_core.content_type import APP_JSON, APP_MSGPACK
-import bravado.exception
+from . import codec
+from .codec import APP_JSON, MSGPACK_TYPES
+from .streaming import ItemStream
+from .paging import Page, PagingError, detect_paging, default_items_key
+from .metrics import RequestTimer, current_timer
+from .resilience import IDEMPOTENT_METHODS
+from .ratelimit import PRIORITY_INTERACTIVE
 
-__all__ = ['Request']
+__all__ = ['Request', 'RequestTemplate']
+
+
+# the per-operation values used by a Request that do not change from one
+# request to the next.  when the client is caching requests, the template is
+# built once per operation, and shared by all the Request instances.
+
+RequestTemplate = namedtuple('RequestTemplate', 'command body_param body_type')
 
 
 class Request(object):
 
-    def __init__(self, client, command):
+    # `model_response` value to return the response data as a lazy view,
+    # see halutz.views; any other true value returns a model class instance.
+    MODEL_VIEW = 'view'
+
+    def __init__(self, client, command, template=None):
         self.client = client
+        self.template = template or self.make_template(client, command)
+        self.body_param = self.template.body_param
+        self.command = self.template.command
+        self.operation = self.command.operation
+        self.model_response = client.model_response or False
+
+        # the client SingleFlight used to coalesce identical concurrent
+        # calls; set to None to not coalesce the calls of this request.
+        self.single_flight = client.single_flight
+
+        # True if the request can be retried after a failure that may have
+        # been processed by the server (see halutz.resilience); set to True
+        # for a POST made idempotent, e.g. by an idempotency key header.
+        self.idempotent = self.method in IDEMPOTENT_METHODS
 
+        # the scheduling priority of the calls, when the client has rate
+        # limits; the lower value goes first.  See halutz.ratelimit.
+        self.priority = PRIORITY_INTERACTIVE
+
+        # when the client uses msgpack, the (accept, send) msgpack content
+        # types of the operation, per its produces/consumes; either is None
+        # when not used.
+
+        self.msgpack = self._msgpack_types() if client.use_msgpack else None
+
+    @staticmethod
+    def make_template(client, command):
         # see if there is an 'in body' parameter
 
-        self.body_param = first(
+        body_param = first(
             p_name for p_name, p_obj in six.iteritems(command.params)
             if p_obj.param_spec['in'] == 'body')
 
-        self.command = command
-        self.command.also_return_response = True
-        self.operation = command.operation
-        self.model_response = client.model_response or False
+        command.also_return_response = True
+
+        body_type = (client.build.body_class(command.params[body_param])
+                     if body_param else None)
 
+        return RequestTemplate(command, body_param, body_type)
+
+    def __getattr__(self, item):
         # automatically create an instance of the body class if there
-        # is one in the command spec.  attach the attribute as the
-        # body parameter name.
+        # is one in the command spec.  the instance is created on first
+        # use, and attached as the body parameter name attribute.
+
+        if item != self.__dict__.get('body_param') or item is None:
+            raise AttributeError(item)
+
+        body_type = self.template.body_type
+        if hasattr(body_type, 'type') and body_type.type == 'array':
+            body = body_type([])
+        else:
+            body = body_type()
+
+        setattr(self, item, body)
+        return body
 
-        if self.body_param:
-            body_type = client.build.body_class(command.params[self.body_param])
-            if hasattr(body_type, 'type') and body_type.type == 'array':
-                setattr(self, self.body_param, body_type([]))
-            else:
-                setattr(self, self.body_param, body_type())
-                
     @property
     def path(self):
         return self.operation.path_name
@@ -52,16 +104,35 @@ class Request(object):
     def params(self):
         return self.command.operation.params
 
-    @staticmethod
-    def _unmarshal_response(response):
+    @property
+    def host(self):
+        """ the host (and port) of the server api url """
+        return urlsplit(self.client.swagger_spec.api_url).netloc
+
+    def with_priority(self, priority):
+        """ returns a copy of this request, for calls with the scheduling `priority` """
+        rqst = copy.copy(self)
+        rqst.priority = priority
+        return rqst
+
+    @property
+    def body_validator(self):
+        """ the compiled validator of the body schema; None if there is no body """
+        if not self.body_param:
+            return None
+
+        return self.client.build.body_validator(self.params[self.body_param])
+
+    def _unmarshal_response(self, response):
         content_type = response.headers.get('content-type', '').lower()
 
-        if content_type.startswith(APP_JSON) or content_type.startswith(APP_MSGPACK):
+        if content_type.startswith(APP_JSON) or content_type.startswith(MSGPACK_TYPES):
             # content_spec = deref(response_spec['schema'])
             if content_type.startswith(APP_JSON):
                 content_value = response.json()
             else:
-                content_value = msgpack.loads(response.raw_bytes, encoding='utf-8')
+                content_value = codec.msgpack_loads(
+                    response.raw_bytes, **self.client.msgpack_options)
 
             return content_value
         elif content_type.startswith('text'):
@@ -69,44 +140,371 @@ class Request(object):
 
         return None
 
-    def __call__(self, **params):
-        """ execute the request and return the (response, ok) tuple """
+    def _swagger_result(self, http_resp, resp_data):
+        """
+        returns the response data from the bravado unmarshalled `resp_data`;
+        bravado returns the body bytes of a msgpack response of the type it
+        does not know (see codec.MSGPACK_TYPES), which are decoded here and
+        unmarshalled per the response schema.
+        """
+        if resp_data is None:
+            return self._unmarshal_response(http_resp)
+
+        if not (self.msgpack and isinstance(resp_data, bytes)):
+            return resp_data
+
+        content_type = http_resp.headers.get('content-type', '').lower()
+        if not content_type.startswith(MSGPACK_TYPES):
+            return resp_data
+
+        from bravado_core.response import get_response_spec
+        from bravado_core.unmarshal import unmarshal_schema_object
+
+        swagger_spec = self.operation.swagger_spec
+        resp_spec = get_response_spec(http_resp.status_code, self.operation)
+        resp_data = self._unmarshal_response(http_resp)
+
+        return unmarshal_schema_object(
+            swagger_spec, swagger_spec.deref(resp_spec['schema']), resp_data)
+
+    def _unmarshal(self, http_resp):
+        """
+        returns the response data of `http_resp`, unmarshalled as bravado
+        does for the responses of a call; used for the responses that are
+        not the result of a bravado call, e.g. cached responses.
+        """
+        from bravado.http_future import unmarshal_response
+
+        unmarshal_response(http_resp, self.operation)
+        return self._swagger_result(http_resp, http_resp.swagger_result)
+
+    def _msgpack_types(self):
+        produces = self.operation.produces
+        accept = first(content_type for content_type in MSGPACK_TYPES
+                       if content_type in produces)
+
+        # bravado_core encodes the body for its msgpack type only
+        body_type = codec.msgpack_body_type()
+        send = (body_type if self.body_param and body_type in self.operation.consumes
+                else None)
+
+        return (accept, send) if (accept or send) else None
+
+    def _negotiate(self, params):
+        """
+        returns the call params with the request options headers to accept
+        msgpack responses, and to send a msgpack body, per `msgpack`.
+        bravado encodes the body per the Content-Type header.
+        """
+        accept, send = self.msgpack
+
+        options = dict(params.get('_request_options') or {})
+        headers = dict(options.get('headers') or {})
+        names = set(name.lower() for name in headers)
 
-        # auto-add body if exists and not provided by caller.
+        if accept and 'accept' not in names:
+            headers['Accept'] = '%s, %s;q=0.9' % (accept, APP_JSON)
+        if send and 'content-type' not in names:
+            headers['Content-Type'] = send
+
+        options['headers'] = headers
+        return dict(params, _request_options=options)
+
+    def _with_body(self, params):
+        """ returns the call params with the body added, if exists and not provided by caller """
         if self.body_param and self.body_param not in params:
             body_attr = getattr(self, self.body_param)
             params[self.body_param] = (
                 body_attr.for_json() if hasattr(body_attr, 'for_json')
                 else body_attr)
 
-        try:
+        return params
+
+    def _model(self, resp_data, status_code):
+        """ returns the response data as a view or model object, per `model_response` """
+
+        if self.model_response == self.MODEL_VIEW:
+            # if the caller wants the response data returned as a view, the
+            # data is wrapped as-is; nested values are wrapped when used.
+
+            resp_data = self.client.build.resp_view(
+                request=self, status_code=status_code, resp_data=resp_data)
+
+        elif self.model_response:
+            # if the caller wants the response data returned as a schema-object,
+            # then first get the class; and if one exists, then use the http response
+            # data to create the model object.
+
+            resp_cls = self.client.build.resp_class(
+                request=self, status_code=status_code)
+
+            if resp_cls:
+                resp_data = resp_cls(**resp_data)
+
+        return resp_data
+
+    @staticmethod
+    def _error(exc):
+        """ returns the response data for a failed (HTTPClientError) http response """
+        http_resp = exc.response
+        return http_resp, str(http_resp), http_resp.text
 
-            rqst = self.command(**params)
-            resp_data, http_resp = rqst.result()
+    def _send(self, params):
+        """
+        send the request and return the (response, ok, http response) tuple;
+        the response data is not modeled.
+        """
+        if self.single_flight:
+            return self.single_flight.send(self, params)
 
-            # if there is no resp_data, it means that there is no response-schema
-            # defined, and the bravado library doesn't return anything.  therefore
-            # we need to unmarshal the data here.
+        return self._send_request(params)
 
-            if resp_data is None:
-                resp_data = self._unmarshal_response(http_resp)
+    def _send_request(self, params):
+        """ sends the request, with the client retries, circuit breaker and timeout if any """
+        resilience = self.client.resilience
+        if resilience:
+            return resilience.send(self, params, self._send_once)
 
-            if self.model_response:
-                # if the caller wants the response data returned as a schema-object,
-                # then first get the class; and if one exists, then use the http response
-                # data to create the model object.
+        return self._send_once(params)
 
-                resp_cls = self.client.build.resp_class(
-                    request=self, status_code=http_resp.status_code)
+    def _send_once(self, params):
+        # the bravado http future result is taken in its two steps, the http
+        # response and then the unmarshalled result, so that each is timed
+        # when the call is instrumented; see halutz.metrics.
 
-                if resp_cls:
-                    resp_data = resp_cls(**resp_data)
+        import bravado.exception
 
-            return resp_data, True
+        timer = current_timer()
+        rate_limit = self.client.rate_limit
+        if rate_limit:
+            with timer.phase('queue'):
+                rate_limit.acquire(self)
+
+        try:
+            with timer.phase('marshal'):
+                if self.msgpack:
+                    params = self._negotiate(params)
+                rqst = self.command(**params)
+
+            with timer.phase('http'):
+                http_resp = self._incoming_response(rqst)
+
+            if timer:
+                timer.sent(rqst)
+                timer.received(http_resp)
+
+            with timer.phase('unmarshal'):
+                resp_data = self._swagger_result(
+                    http_resp, rqst._get_swagger_result(http_resp))
+
+            return resp_data, True, http_resp
+
+        except bravado.exception.HTTPNotModified as exc:
+            return None, True, exc.response
 
         except bravado.exception.HTTPClientError as exc:
-            http_resp = exc.response
-            return (http_resp, str(http_resp), http_resp.text), False
+            return self._error(exc), False, exc.response
+
+    @staticmethod
+    def _incoming_response(rqst):
+        # the http response, with the requests timeout and connection errors
+        # raised as the bravado errors, as the http future result does.
+
+        future = rqst.future
+        try:
+            return rqst._get_incoming_response()
+        except tuple(future.connection_errors or ()) as exc:
+            future._raise_connection_error(exc)
+        except tuple(future.timeout_errors or ()) as exc:
+            future._raise_timeout_error(exc)
+
+    def invoke(self, **params):
+        """
+        execute the request and return the (response, ok, http response)
+        tuple; the http response is the bravado IncomingResponse, used to
+        check the status and headers.  A 304 (not modified) response, to a
+        conditional request, is ok and its response data is None.  If the
+        client has a response cache, the request goes through it.  If the
+        client has hooks, the call is timed and reported to them.
+        """
+
+        params = self._with_body(params)
+
+        if self.client.hooks:
+            timer = RequestTimer(self, self.client.hooks)
+            return timer.run(lambda: self._invoke(params))
+
+        return self._invoke(params)
+
+    def _invoke(self, params):
+        cache = self.client.response_cache
+        resp_data, ok, http_resp = cache.send(self, params) if cache else self._send(params)
+
+        if ok and resp_data is not None:
+            with current_timer().phase('model'):
+                resp_data = self._model(resp_data, http_resp.status_code)
+
+        return resp_data, ok, http_resp
+
+    def __call__(self, **params):
+        """ execute the request and return the (response, ok) tuple """
+        return self.invoke(**params)[:2]
+
+    def stream(self, items_key, **params):
+        """
+        Execute the request, streaming the response body; rather than the
+        response data, the returned value is an iterator of the items of the
+        `items_key` response property, decoded one at a time as the body is
+        read.  Array items are yielded as-is; object items as (key, value)
+        pairs.  The items are not modeled.
+
+        Returns
+        -------
+        tuple
+            (ItemStream, True), or (error response, False)
+        """
+        import bravado.exception
+        from bravado.client import construct_request
+        from bravado.requests_client import RequestsResponseAdapter
+
+        params = self._with_body(params)
+        if self.msgpack:
+            params = self._negotiate(params)
+
+        if self.client.rate_limit:
+            self.client.rate_limit.acquire(self)
+
+        request_options = params.pop('_request_options', {})
+        request_params = construct_request(self.operation, request_options, **params)
+
+        http_client = self.client.swagger_spec.http_client
+        sanitized_params, misc_options = http_client.separate_params(request_params)
+
+        timeout = misc_options.get('timeout')
+        if 'connect_timeout' in misc_options:
+            timeout = (misc_options['connect_timeout'], timeout)
+
+        session = http_client.session
+        response = session.send(
+            session.prepare_request(http_client.authenticated_request(sanitized_params)),
+            stream=True, timeout=timeout,
+            verify=misc_options['ssl_verify'], cert=misc_options['ssl_cert'],
+            allow_redirects=misc_options['follow_redirects'])
+
+        if response.status_code >= 400:
+            exc = bravado.exception.make_http_exception(
+                response=RequestsResponseAdapter(response))
+
+            # the error body has been read; the connection is released
+            response.close()
+
+            if isinstance(exc, bravado.exception.HTTPClientError):
+                return self._error(exc), False
+            raise exc
+
+        resp_spec = self.spec['responses'].get(str(response.status_code)) or {}
+        resp_schema = self.client.deref(resp_spec.get('schema')) or {}
+        items_schema = self.client.deref(
+            (resp_schema.get('properties') or {}).get(items_key)) or {}
+
+        return ItemStream(response, items_key,
+                          items_type=items_schema.get('type') or 'array'), True
+
+    def paginate(self, paging=None, items_key=None, max_workers=None, **params):
+        """
+        Execute the request for each page of a paginated collection, and
+        yield each Page (params, data, http_resp, items) as it is returned.
+        When the `paging` strategy (see :mod:`halutz.paging`, detected from
+        the request params if not given) can address all the pages from the
+        first one, the remaining pages are fetched concurrently, and are
+        yielded in the order they complete.
+
+        Raises
+        ------
+        PagingError
+            if a page request fails.
+        """
+        paging = paging or detect_paging(self)
+        items_key = items_key or default_items_key(self)
+
+        def make_page(page_params, data, http_resp=None):
+            return Page(page_params, data, http_resp,
+                        data.get(items_key) if isinstance(data, dict) else None)
+
+        page_params = paging.first(params)
+        data, ok, http_resp = self.invoke(**page_params)
+        if not ok:
+            raise PagingError('unable to get page', page_params, data)
+
+        page = make_page(page_params, data, http_resp)
+        yield page
+
+        all_params = paging.pages(page)
+        if all_params is not None:
+            for result in self.map(all_params, max_workers=max_workers, ordered=False):
+                if not result.ok:
+                    raise PagingError('unable to get page', result.params,
+                                      result.error or result.resp)
+                yield make_page(result.params, result.resp)
+            return
+
+        while True:
+            page_params = paging.next(page)
+            if page_params is None:
+                return
+
+            data, ok, http_resp = self.invoke(**page_params)
+            if not ok:
+                raise PagingError('unable to get page', page_params, data)
+
+            page = make_page(page_params, data, http_resp)
+            yield page
+
+    def validate_many(self, bodies):
+        """
+        Validates each of the `bodies` against the body schema, using the
+        compiled body validator; the bodies are plain (json) values, or
+        model instances.  No model instances are created.
+
+        Returns
+        -------
+        dict
+            (key, value) = (index of an invalid body, list of its errors);
+            empty if all the bodies are valid.
+        """
+        validate = self.body_validator
+        if not validate:
+            raise RuntimeError('%s has no body parameter' % self.operation.operation_id)
+
+        invalid = dict()
+        for index, body in enumerate(bodies):
+            errors = validate(body.for_json() if hasattr(body, 'for_json') else body)
+            if errors:
+                invalid[index] = errors
+
+        return invalid
+
+    def map(self, param_list, max_workers=None, ordered=True, validate=False):
+        """
+        Execute this request once for each params dict in `param_list`,
+        concurrently using a thread pool.  See :class:`Batch`.  When
+        `validate` is True, the bodies are first validated (see
+        `validate_many`); the calls with an invalid body are not sent, and
+        their BatchResult error is a ValidationError.
+
+        Returns
+        -------
+        list | generator
+            The BatchResult for each call; a list in `param_list` order when
+            `ordered` is True, otherwise a generator yielding each result as
+            its call completes.
+        """
+        batch = self.client.batch(max_workers=max_workers)
+        batch.extend(self, param_list)
+        if validate:
+            batch.validate()
+
+        return batch.run() if ordered else batch.as_completed()
 
     def __repr__(self):
         return "Request: %s" % json.dumps({
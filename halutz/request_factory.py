@@ -1,21 +1,19 @@
 
-from bravado_core. resource import Resource as BravadoResource
-from bravado.client import CallableOperation, ResourceDecorator
-
-from .request import Request
+from .operations import OperationIndex
 
 
 class RequestFactory(object):
 
     class Resource(object):
         """ wrapper around the bravado ResourceDecorator to facilite this factory """
-        def __init__(self, client, resource):
-            self._client = client
+        def __init__(self, factory, resource):
+            self._factory = factory
             self._resource = resource
 
         def __getattr__(self, item):
-            return Request(self._client,
-                           getattr(self._resource, item))
+            return self._factory.make_request(
+                ('attr', self._resource.resource.name, item),
+                lambda: getattr(self._resource, item))
 
         def __dir__(self):
             return self._resource.__dir__()
@@ -27,12 +25,24 @@ class RequestFactory(object):
     class ViaAttr(object):
         def __init__(self, factory):
             self._factory = factory
+            self._resources = dict()
 
         def __getattr__(self, attr):
-            return RequestFactory.Resource(
-                self._factory.client,
+            rsrc = self._resources.get(attr)
+            if rsrc:
+                return rsrc
+
+            from bravado.client import ResourceDecorator
+
+            rsrc = RequestFactory.Resource(
+                self._factory,
                 ResourceDecorator(self._factory.resources[attr]))
 
+            if self._factory.client.cache_requests:
+                self._resources[attr] = rsrc
+
+            return rsrc
+
         def __dir__(self):
             return self._factory.resources.keys()
 
@@ -41,6 +51,36 @@ class RequestFactory(object):
         self.client = client
         self.resources = client.swagger_spec.resources
 
+        # the (method, path) -> operation table, and the URL matcher; used
+        # rather than the bravado spec `get_op_for_request`.
+
+        self.operations = OperationIndex(client.swagger_spec)
+
+        # (key, value) = (request key, RequestTemplate), used when the
+        # client is caching requests.  see `make_request`.
+
+        self.templates = dict()
+
+    def make_request(self, key, get_command):
+        """
+        Returns a new Request for the command returned by `get_command`.  When
+        the client is caching requests, the request template is built once for
+        the given `key`, and re-used; so `get_command` is only called the first
+        time.
+        """
+        client = self.client
+        request_type = client.request_type
+
+        if not client.cache_requests:
+            return request_type(client, get_command())
+
+        template = self.templates.get(key)
+        if not template:
+            template = self.templates[key] = request_type.make_template(
+                client, get_command())
+
+        return request_type(client, template.command, template=template)
+
     def attr_factory(self):
         return RequestFactory.ViaAttr(factory=self)
 
@@ -67,12 +107,17 @@ class RequestFactory(object):
         Request
             The request instance you can then use to exeute the command.
         """
-        op = self.client.swagger_spec.get_op_for_request(method, path)
-        if not op:
-            raise RuntimeError(
-                'no command found for (%s, %s)' % (method, path))
+        def get_command():
+            from bravado.client import CallableOperation
+
+            op = self.operations.get(method, path)
+            if not op:
+                raise RuntimeError(
+                    'no command found for (%s, %s)' % (method, path))
 
-        return Request(self.client, CallableOperation(op))
+            return CallableOperation(op)
+
+        return self.make_request(('op', method.lower(), path), get_command)
 
     def path_requests(self, path):
         """
@@ -95,13 +140,34 @@ class RequestFactory(object):
         Resource
             instance that has attributes for methods available.
         """
-        path_spec = self.client.origin_spec['paths'].get(path)
-        if not path_spec:
+        path_ops = self.operations.methods(path)
+        if not path_ops:
             raise RuntimeError("no path found for: %s" % path)
 
-        get_for_meth = self.client.swagger_spec.get_op_for_request
-        rsrc = BravadoResource(name=path, ops={
-            method: get_for_meth(method, path)
-            for method in path_spec.keys()})
+        from bravado_core.resource import Resource as BravadoResource
+        from bravado.client import ResourceDecorator
+
+        rsrc = BravadoResource(name=path, ops=path_ops)
+        return RequestFactory.Resource(self, ResourceDecorator(rsrc))
+
+    def match_request(self, method, url):
+        """
+        Returns the request for a given http method and concrete API URL (or
+        path), together with the path params taken from the URL:
+
+            >>> rqst, params = client.match_request('get', '/api/blueprints/abc/nodes')
+            >>> params
+            {'blueprint_id': 'abc'}
+            >>> resp, ok = rqst(**params)
+
+        Returns
+        -------
+        tuple
+            (Request, path params dict)
+        """
+        found = self.operations.match(method, url)
+        if not found:
+            raise RuntimeError(
+                'no command found for (%s, %s)' % (method, url))
 
-        return RequestFactory.Resource(self.client, ResourceDecorator(rsrc))
+        return self.command_request(method, found.operation.path_name), found.params
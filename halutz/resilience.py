@@ -0,0 +1,322 @@
+"""
+Retries, backoff, circuit breaking and timeouts for the request calls of
+a client:
+
+    >>> client = Client(server_url, origin_spec=spec, resilience=True)
+    >>> client = Client(server_url, origin_spec=spec, resilience=Resilience(
+    ...     retry=RetryPolicy(retries=5, backoff=0.2),
+    ...     timeout=10, timeouts={'blueprints_get': 60}))
+
+A failed call is retried, after a jittered exponential backoff (or the
+response Retry-After delay), when its request is idempotent (see
+`Request.idempotent`) and it failed with a retry status (429, 502, 503,
+504 by default, see RetryPolicy), a timeout, or a connection error.
+Other server errors (e.g. 500) are not retried, but are failures of the
+circuit breaker; a throttled (429) call is retried, but is not a failure.  A request that is not idempotent is retried only on
+the 429 and 503 statuses, which the server returns without processing
+the request.
+
+Each host has a circuit breaker: after `failures` consecutive failed
+calls, the calls to the host fail fast, with a CircuitOpenError, for
+`reset_timeout` seconds; then one trial call is sent, and its outcome
+closes or re-opens the circuit.
+
+When the client has hooks, the retries are reported in the RequestEvent
+`retries`, and the backoff delays in the 'backoff' phase; timeouts and
+open circuits are reported as errors (see halutz.metrics).
+"""
+
+import time
+import random
+import threading
+from email.utils import parsedate_tz, mktime_tz
+from collections import namedtuple
+
+import six
+
+from .metrics import current_timer
+
+__all__ = ['Resilience', 'RetryPolicy', 'CircuitBreaker', 'CircuitOpenError',
+           'CircuitInfo', 'IDEMPOTENT_METHODS']
+
+
+# http methods that can be repeated without changing the outcome, per RFC 7231
+IDEMPOTENT_METHODS = ('get', 'head', 'options', 'put', 'delete', 'trace')
+
+CircuitInfo = namedtuple('CircuitInfo', 'state failures opened trips')
+
+
+class CircuitOpenError(RuntimeError):
+    def __init__(self, host, retry_in):
+        super(CircuitOpenError, self).__init__(
+            'circuit open for %s, retry in %.1fs' % (host, retry_in))
+        self.host = host
+        self.retry_in = retry_in
+
+
+class RetryPolicy(object):
+    """
+    Parameters
+    ----------
+    retries : int
+        the maximum number of retries of a call.
+
+    backoff : float
+        the base delay (seconds); the delay before retry `n` (from 0) is
+        random between 0 and `backoff` * 2 ** n ("full jitter"), and at
+        most `max_backoff`.
+
+    max_retry_after : float
+        the longest Retry-After delay (seconds) waited for; a response
+        asking for a longer delay is not retried.
+
+    statuses : tuple
+        the response status codes that are retried.
+    """
+    DEFAULT_STATUSES = (429, 502, 503, 504)
+
+    # the statuses retried for requests that are not idempotent
+    REJECTED_STATUSES = (429, 503)
+
+    def __init__(self, retries=3, backoff=0.1, max_backoff=10.0, max_retry_after=60.0,
+                 statuses=DEFAULT_STATUSES):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.statuses = frozenset(statuses)
+
+    def can_retry(self, request, attempt, status_code=None):
+        """
+        True if the call of `request` can be retried after its `attempt`
+        (from 0) failed; with the `status_code` of its response, or None
+        if there is no response (a timeout, or a connection error).
+        """
+        if attempt >= self.retries:
+            return False
+
+        if request.idempotent:
+            return status_code is None or status_code in self.statuses
+
+        return status_code in self.REJECTED_STATUSES and status_code in self.statuses
+
+    def delay(self, attempt, retry_after=None):
+        """
+        returns the seconds to wait before retrying after `attempt`; or
+        None if the Retry-After delay is too long.
+        """
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_retry_after else None
+
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    @staticmethod
+    def retry_after(http_resp):
+        """ returns the Retry-After delay (seconds) of the response, or None """
+        value = getattr(http_resp, 'headers', {}).get('Retry-After')
+        if not value:
+            return None
+
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+
+        parsed = parsedate_tz(value)
+        return max(0.0, mktime_tz(parsed) - time.time()) if parsed else None
+
+
+class CircuitBreaker(object):
+    """
+    The circuit breaker of a host.  The circuit is 'closed' (calls are
+    sent) until `failures` consecutive calls fail; then 'open' (calls
+    fail fast) for `reset_timeout` seconds; then 'half_open', where one
+    trial call is sent: closing the circuit if it succeeds, else
+    re-opening it.
+    """
+    def __init__(self, host, failures=5, reset_timeout=30.0):
+        self.host = host
+        self.max_failures = failures
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened = None
+        self.trips = 0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def before(self):
+        """
+        called before sending a call; raises CircuitOpenError if the call
+        must not be sent.  Returns True if the call is the trial call, which
+        must be `release`d when done.
+        """
+        with self._lock:
+            if self.state == 'closed':
+                return False
+
+            retry_in = self.opened + self.reset_timeout - time.time()
+            if self.state == 'open' and retry_in <= 0:
+                self.state, self._trial = 'half_open', False
+
+            if self.state == 'half_open' and not self._trial:
+                self._trial = True
+                return True
+
+            raise CircuitOpenError(self.host, max(retry_in, 0.0))
+
+    def success(self):
+        with self._lock:
+            self.state, self.failures, self._trial = 'closed', 0, False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.max_failures:
+                if self.state != 'open':
+                    self.trips += 1
+                self.state, self.opened, self._trial = 'open', time.time(), False
+
+    def release(self):
+        """ ends the trial call; if it had no outcome, the next call is the trial """
+        with self._lock:
+            if self.state == 'half_open':
+                self._trial = False
+
+    def info(self):
+        return CircuitInfo(self.state, self.failures, self.opened, self.trips)
+
+
+class Resilience(object):
+    """
+    The retry policy, per-host circuit breakers, and per-operation
+    timeouts of a client; see the module docs.
+
+    Parameters
+    ----------
+    retry : RetryPolicy
+        True for the default RetryPolicy, None to not retry.
+
+    failures, reset_timeout :
+        the CircuitBreaker parameters; `failures` None to not use
+        circuit breakers.
+
+    timeout : float
+        the default timeout (seconds) of the calls, None for no timeout.
+
+    timeouts : dict
+        (key, value) = (operation id, timeout); the timeout of the calls
+        of the operation, rather than `timeout`.
+    """
+    # the statuses of a throttled call; the host is up, and the call is
+    # neither a failure nor a success of its circuit breaker.
+    THROTTLED_STATUSES = (429,)
+
+    def __init__(self, retry=True, failures=5, reset_timeout=30.0, timeout=None,
+                 timeouts=None):
+        self.retry = RetryPolicy() if retry is True else retry or None
+        self.failures = failures
+        self.reset_timeout = reset_timeout
+        self.timeout = timeout
+        self.timeouts = dict(timeouts or {})
+
+        # (key, value) = (host, CircuitBreaker)
+        self.breakers = dict()
+        self._lock = threading.Lock()
+
+    def breaker(self, host):
+        """ returns the CircuitBreaker of `host`, or None if not used """
+        if not self.failures:
+            return None
+
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            with self._lock:
+                breaker = self.breakers.setdefault(
+                    host, CircuitBreaker(host, self.failures, self.reset_timeout))
+
+        return breaker
+
+    def circuits(self):
+        """ returns the dict of (host, CircuitInfo) """
+        return dict((host, breaker.info()) for host, breaker in six.iteritems(self.breakers))
+
+    def _with_timeout(self, request, params):
+        timeout = self.timeouts.get(request.operation.operation_id, self.timeout)
+        options = params.get('_request_options') or {}
+        if timeout is None or 'timeout' in options:
+            return params
+
+        return dict(params, _request_options=dict(options, timeout=timeout))
+
+    @staticmethod
+    def _is_failure(exc):
+        import bravado.exception as bex
+        return isinstance(exc, (bex.HTTPServerError, bex.BravadoTimeoutError,
+                                bex.BravadoConnectionError))
+
+    def send(self, request, params, send):
+        """
+        Calls `send(params)`, the request call returning the (response, ok,
+        http response) tuple, with the retries, circuit breaker and timeout
+        for `request`.
+        """
+        params = self._with_timeout(request, params)
+        breaker = self.breaker(request.host)
+        policy = self.retry
+        timer = current_timer()
+
+        attempt = 0
+        while True:
+            trial = breaker.before() if breaker else False
+
+            try:
+                result = send(params)
+
+            except Exception as exc:
+                if not self._is_failure(exc):
+                    raise
+
+                if breaker:
+                    breaker.failure()
+
+                http_resp = getattr(exc, 'response', None)
+                status_code = getattr(http_resp, 'status_code', None)
+                if not (policy and policy.can_retry(request, attempt, status_code)):
+                    raise
+
+                reason = exc.__class__.__name__
+                delay = policy.delay(attempt, policy.retry_after(http_resp))
+                if delay is None:
+                    raise
+
+            else:
+                http_resp = result[2]
+                status_code = http_resp.status_code
+                failed = status_code in (policy.statuses if policy else
+                                         RetryPolicy.DEFAULT_STATUSES)
+                throttled = status_code in self.THROTTLED_STATUSES
+                if breaker and failed and not throttled:
+                    breaker.failure()
+                elif breaker and not throttled:
+                    breaker.success()
+
+                if not (failed and policy and policy.can_retry(request, attempt, status_code)):
+                    return result
+
+                reason = 'http_%s' % status_code
+                delay = policy.delay(attempt, policy.retry_after(http_resp))
+                if delay is None:
+                    return result
+
+            finally:
+                # a trial call that raised an error that is not a failure
+                # (e.g. a missing parameter) has no outcome, and is released
+                # so that the next call is the trial.
+                if trial:
+                    breaker.release()
+
+            timer.retry(reason)
+            with timer.phase('backoff'):
+                time.sleep(delay)
+
+            attempt += 1
@@ -0,0 +1,325 @@
+"""
+Client response cache for GET requests.  Responses are cached by
+(resolved path, server url, params), for a TTL that is set per client and
+optionally per operation (operationId or path).  When a cached response expires, and it
+had an ETag or Last-Modified header, the request is revalidated with
+If-None-Match / If-Modified-Since, so an unchanged response costs a 304.
+A successful mutating request (POST, PUT, PATCH, DELETE) invalidates the
+cached responses of its resolved path (e.g. '/devices/7'), and of the
+paths under it, and the cached responses of its collection ('/devices').
+
+    >>> client = Client(server_url, origin_spec=spec,
+    ...                 response_cache=ResponseCache(ttl=60, ttls={'dcim_devices_read': 5}))
+
+The cached value is the response body, decoded and unmarshalled (as the
+bravado calls do) for each hit, so the callers never share (and change)
+the same response data, and a hit returns the same data as a miss.
+
+The DiskBackend files are pickled, and loading a file can run arbitrary
+code; the `cache_dir` must only be writable by trusted users.
+"""
+
+import os
+import json
+import time
+import hashlib
+from os import path
+from collections import namedtuple
+
+import six
+
+from requests.structures import CaseInsensitiveDict
+from bravado_core.response import IncomingResponse
+
+from . import codec
+from .cache import LRUCache
+from .artifacts import dump_artifact, load_artifact, read_artifact_header
+
+__all__ = ['ResponseCache', 'MemoryBackend', 'DiskBackend', 'CacheEntry',
+           'ResponseCacheInfo']
+
+
+# the cached response; `path` is the resolved request path used for the
+# invalidation by path.
+
+CacheEntry = namedtuple('CacheEntry', 'path status_code headers raw_bytes expires')
+
+ResponseCacheInfo = namedtuple('ResponseCacheInfo', 'hits misses revalidated invalidated currsize')
+
+# the response headers kept with the cached response
+CACHED_HEADERS = ('content-type', 'etag', 'last-modified')
+
+# request headers that make the request conditional; these are not cached
+# since the caller is handling the conditional response.
+CONDITIONAL_HEADERS = ('if-none-match', 'if-modified-since')
+
+
+class CachedResponse(IncomingResponse):
+    """ bravado IncomingResponse for a cached response """
+
+    def __init__(self, entry):
+        self.status_code = entry.status_code
+        self.reason = 'OK (cached)'
+        self.headers = CaseInsensitiveDict(entry.headers)
+        self.raw_bytes = entry.raw_bytes
+
+    @property
+    def text(self):
+        return self.raw_bytes.decode('utf-8', 'replace')
+
+    def json(self, **kwargs):
+        if kwargs:
+            return json.loads(self.text, **kwargs)
+        return codec.json_loads(self.raw_bytes)
+
+
+def _path_matches(entry_path, path_prefix, exact=False):
+    if path_prefix is None:
+        return True
+
+    path_prefix = path_prefix.rstrip('/')
+    return entry_path == path_prefix or (
+        not exact and entry_path.startswith(path_prefix + '/'))
+
+
+class MemoryBackend(object):
+    """ in-process LRU backend; `maxsize` is the number of cached responses """
+
+    def __init__(self, maxsize=1024):
+        self.entries = LRUCache(maxsize=maxsize)
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, entry):
+        self.entries.put(key, entry)
+
+    def invalidate(self, path_prefix=None, exact=False):
+        """
+        removes the entries of paths under `path_prefix` (all, if None), or
+        only of the path when `exact`; returns the count
+        """
+        keys = [key for key in self.entries.keys()
+                if _path_matches(key[0], path_prefix, exact)]
+        for key in keys:
+            self.entries.invalidate(key)
+        return len(keys)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class DiskBackend(object):
+    """
+    Directory backend, shared by the processes using the same `cache_dir`;
+    each response is a halutz artifact file.  When there are more than
+    `maxsize` files, the least recently used are removed.
+
+    The artifact files are pickled, and are loaded as trusted; the
+    `cache_dir` must not be writable by other (untrusted) users.
+    """
+    KIND = 'response'
+    file_spec = "{key}.halutz-resp"
+
+    def __init__(self, cache_dir, maxsize=4096):
+        self.cache_dir = cache_dir
+        self.maxsize = maxsize
+        if not path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+
+    @staticmethod
+    def _key_text(key):
+        return json.dumps(key, sort_keys=True, default=str)
+
+    def filepath(self, key):
+        digest = hashlib.sha256(self._key_text(key).encode('utf-8')).hexdigest()
+        return path.join(self.cache_dir, self.file_spec.format(key=digest))
+
+    def _files(self):
+        return [path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                if name.endswith(self.file_spec.format(key=''))]
+
+    def get(self, key):
+        filepath = self.filepath(key)
+        header, entry = load_artifact(filepath, kind=self.KIND, key=self._key_text(key))
+        if entry:
+            os.utime(filepath, None)
+        return entry
+
+    def put(self, key, entry):
+        dump_artifact(self.filepath(key), kind=self.KIND, key=self._key_text(key),
+                      payload=entry, path=entry.path)
+
+        files = self._files()
+        if self.maxsize is not None and len(files) > self.maxsize:
+            files.sort(key=path.getmtime)
+            for filepath in files[:len(files) - self.maxsize]:
+                self._remove(filepath)
+
+    @staticmethod
+    def _remove(filepath):
+        try:
+            os.remove(filepath)
+        except OSError:
+            pass
+
+    def invalidate(self, path_prefix=None, exact=False):
+        removed = 0
+        for filepath in self._files():
+            if path_prefix is not None:
+                with open(filepath, 'rb') as ifile:
+                    try:
+                        header = read_artifact_header(ifile) or {}
+                    except ValueError:
+                        header = {}
+                if not _path_matches(header.get('path', ''), path_prefix, exact):
+                    continue
+
+            self._remove(filepath)
+            removed += 1
+
+        return removed
+
+    def __len__(self):
+        return len(self._files())
+
+
+class ResponseCache(object):
+    """
+    Parameters
+    ----------
+    backend : MemoryBackend | DiskBackend
+        where the responses are cached; by default a MemoryBackend.
+
+    ttl : float
+        the number of seconds a cached response is used without revalidating.
+
+    ttls : dict
+        the TTL for specific operations; (key, value) = (operationId or path,
+        seconds).  A TTL of 0 disables the caching for the operation.
+    """
+    DEFAULT_TTL = 60
+
+    def __init__(self, backend=None, ttl=DEFAULT_TTL, ttls=None):
+        # not `backend or ...`: an empty backend is falsy (its len is 0)
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        self.hits = self.misses = self.revalidated = self.invalidated = 0
+
+    def ttl_for(self, request):
+        return self.ttls.get(request.operation.operation_id,
+                             self.ttls.get(request.path, self.ttl))
+
+    @staticmethod
+    def resolved_path(request, params):
+        """ returns the request path, with the values of its path `params` """
+        resolved = request.path
+        for name, param in six.iteritems(request.params):
+            if param.param_spec['in'] == 'path' and name in params:
+                resolved = resolved.replace('{%s}' % name, six.text_type(params[name]))
+        return resolved
+
+    @classmethod
+    def key(cls, request, params):
+        # the path is first, see MemoryBackend.invalidate; the server url so
+        # that a backend shared by clients of different servers is not mixed.
+        return (cls.resolved_path(request, params), request.client.server_url,
+                json.dumps(params, sort_keys=True, default=str))
+
+    @staticmethod
+    def _request_headers(params):
+        return (params.get('_request_options') or {}).get('headers') or {}
+
+    def cacheable(self, request, params):
+        if request.method.lower() != 'get' or not self.ttl_for(request):
+            return False
+
+        headers = self._request_headers(params)
+        return not any(name.lower() in CONDITIONAL_HEADERS for name in headers)
+
+    def _store(self, key, request, http_resp, now):
+        cache_control = http_resp.headers.get('cache-control') or ''
+        if http_resp.status_code != 200 or 'no-store' in cache_control:
+            return
+
+        headers = dict((name, http_resp.headers[name]) for name in CACHED_HEADERS
+                       if http_resp.headers.get(name))
+
+        self.backend.put(key, CacheEntry(
+            path=key[0], status_code=http_resp.status_code, headers=headers,
+            raw_bytes=http_resp.raw_bytes, expires=now + self.ttl_for(request)))
+
+    def _hit(self, request, entry):
+        http_resp = CachedResponse(entry)
+        return request._unmarshal(http_resp), True, http_resp
+
+    def _conditional(self, params, entry):
+        """ returns the params with the revalidation headers for the cached `entry` """
+        options = dict(params.get('_request_options') or {})
+        headers = dict(options.get('headers') or {})
+
+        if entry.headers.get('etag'):
+            headers['If-None-Match'] = entry.headers['etag']
+        if entry.headers.get('last-modified'):
+            headers['If-Modified-Since'] = entry.headers['last-modified']
+
+        options['headers'] = headers
+        return dict(params, _request_options=options)
+
+    def send(self, request, params):
+        """
+        Sends the `request` (see `Request._send`) through the cache; returns
+        the (response, ok, http response) tuple.
+        """
+        if not self.cacheable(request, params):
+            result = request._send(params)
+            if result[1] and request.method.lower() != 'get':
+                self._invalidate_write(request, params)
+            return result
+
+        key = self.key(request, params)
+        entry = self.backend.get(key)
+        now = time.time()
+
+        if entry and entry.expires > now:
+            self.hits += 1
+            return self._hit(request, entry)
+
+        self.misses += 1
+
+        if entry and (entry.headers.get('etag') or entry.headers.get('last-modified')):
+            resp_data, ok, http_resp = request._send(self._conditional(params, entry))
+            if ok and http_resp.status_code == 304:
+                self.revalidated += 1
+                entry = entry._replace(expires=now + self.ttl_for(request))
+                self.backend.put(key, entry)
+                return self._hit(request, entry)
+        else:
+            resp_data, ok, http_resp = request._send(params)
+
+        if ok:
+            self._store(key, request, http_resp, now)
+
+        return resp_data, ok, http_resp
+
+    def _invalidate_write(self, request, params):
+        # the written path, and the paths under it; and its collection, but
+        # not the other items of the collection.
+        written = self.resolved_path(request, params).rstrip('/')
+        self.invalidate(written)
+
+        collection = written.rpartition('/')[0]
+        if collection:
+            self.invalidate(collection, exact=True)
+
+    def invalidate(self, path_prefix=None, exact=False):
+        """
+        removes the cached responses for the paths under `path_prefix`, or
+        all if None; or only for the path when `exact` is True
+        """
+        self.invalidated += self.backend.invalidate(path_prefix, exact)
+
+    def cache_info(self):
+        return ResponseCacheInfo(self.hits, self.misses, self.revalidated,
+                                 self.invalidated, len(self.backend))
@@ -0,0 +1,100 @@
+"""
+Request coalescing ("single-flight").  Concurrent identical calls, of the
+same idempotent request with the same params, share a single in-flight
+HTTP request: the first caller sends it, and the other callers wait for,
+and receive, its result.  Each waiting caller gets its own (deep) copy of
+the response data of the first caller, so all the callers get the same
+data, and no caller changes the data of another.
+
+    >>> client = Client(server_url, origin_spec=spec, single_flight=True)
+"""
+
+import copy
+import json
+import threading
+from collections import namedtuple
+
+__all__ = ['SingleFlight', 'SingleFlightInfo']
+
+
+SingleFlightInfo = namedtuple('SingleFlightInfo', 'calls shared in_flight')
+
+
+class _Call(object):
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = self.error = None
+
+
+class SingleFlight(object):
+    # only requests of these methods are coalesced
+    METHODS = ('get', 'head', 'options')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = dict()
+        self.calls = self.shared = 0
+
+    def do(self, key, func):
+        """
+        Calls `func()` unless there is a call with the same `key` in-flight,
+        in which case its result is used; returns the (result, shared) tuple.
+        If the call raises an exception, it is raised to all the callers.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+        except Exception as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, False
+
+    @staticmethod
+    def key(request, params):
+        # a SingleFlight can be shared by the clients of several servers
+        return (request.client.server_url, request.method, request.path,
+                json.dumps(params, sort_keys=True, default=str))
+
+    def send(self, request, params):
+        """
+        Sends the `request` (see `Request._send_request`), sharing the call
+        with any identical request in-flight; returns the (response, ok,
+        http response) tuple.
+        """
+        if request.method.lower() not in self.METHODS:
+            return request._send_request(params)
+
+        result, shared = self.do(self.key(request, params),
+                                 lambda: request._send_request(params))
+        if not shared:
+            return result
+
+        resp_data, ok, http_resp = result
+        if ok and resp_data is not None:
+            resp_data = copy.deepcopy(resp_data)
+
+        return resp_data, ok, http_resp
+
+    def info(self):
+        return SingleFlightInfo(self.calls, self.shared, len(self._calls))
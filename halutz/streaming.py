@@ -0,0 +1,270 @@
+"""
+Incremental decoding of large (list) responses.  Rather than decoding the
+whole response body, the items of one top-level property (for example the
+'items' or 'results' list of an inventory endpoint) are decoded, and
+yielded, one at a time as the body is read from the connection.  Array
+items are yielded as each item value; object items (keyed by id/name) are
+yielded as (key, value) pairs.
+
+JSON bodies are scanned with `ijson` when it is installed, and otherwise
+with a buffered scanner using the standard library decoder.  msgpack
+bodies are read with a `msgpack.Unpacker`.
+"""
+
+import re
+import json
+import codecs
+
+import six
+
+try:
+    import ijson
+    if not hasattr(ijson, 'kvitems'):      # ijson < 3.0
+        ijson = None
+except ImportError:
+    ijson = None
+
+from .codec import shared_keys_hook
+
+__all__ = ['ItemStream', 'iter_items', 'iter_json_items', 'iter_msgpack_items']
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# the characters that can follow a complete value, within the body
+_VALUE_END = ' \t\n\r,]}:'
+
+
+class _ChunkReader(object):
+    """ file-like `read(size)` over an iterable of byte chunks """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buf = b''
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buf) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buf += chunk
+
+        if size < 0:
+            data, self._buf = self._buf, b''
+        else:
+            data, self._buf = self._buf[:size], self._buf[size:]
+
+        return data
+
+
+class _JSONScanner(object):
+    """
+    Scans JSON text from an iterable of byte chunks; only the text not yet
+    consumed (typically less than one chunk) is kept in the buffer.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decode = codecs.getincrementaldecoder('utf-8')().decode
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+        # json.loads shares the key strings of all the objects in a document,
+        # but each item here is decoded on its own; so the keys of all the
+        # items are shared instead.
+
+        self._decoder = json.JSONDecoder(object_pairs_hook=shared_keys_hook())
+
+    def _more(self):
+        """ reads the next chunk into the buffer; returns False at the end of the body """
+        for chunk in self._chunks:
+            text = self._decode(chunk)
+            if text:
+                self.buf = self.buf[self.pos:] + text
+                self.pos = 0
+                return True
+
+        self._decode(b'', True)
+        self.eof = True
+        return False
+
+    def _error(self, expected):
+        return ValueError("expected %s at: %r" % (
+            expected, self.buf[self.pos:self.pos + 40] or '<end of body>'))
+
+    def peek(self):
+        """ returns the next non-whitespace character, or '' at the end of the body """
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._more():
+                return ''
+
+    def expect(self, chars):
+        """ consumes, and returns, the next character; which must be one of `chars` """
+        char = self.peek()
+        if not char or char not in chars:
+            raise self._error(' or '.join(repr(each) for each in chars))
+
+        self.pos += 1
+        return char
+
+    def value(self):
+        """ decodes, and returns, the next JSON value """
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buf, self.pos)
+
+                # a value that is not followed by a delimiter could be
+                # incomplete (a number split across chunks, e.g. '3.' and
+                # '5'); unless there is no more data.
+
+                if self.eof or (end < len(self.buf) and self.buf[end] in _VALUE_END):
+                    self.pos = end
+                    return value
+
+            except ValueError:
+                if self.eof:
+                    raise
+
+            self._more()
+
+
+def _scan_json_items(chunks, items_key):
+    scan = _JSONScanner(chunks)
+    scan.expect('{')
+
+    if scan.peek() == '}':
+        raise KeyError(items_key)
+
+    while True:
+        key = scan.value()
+        scan.expect(':')
+
+        if key != items_key:
+            scan.value()
+            if scan.expect(',}') == '}':
+                raise KeyError(items_key)
+            continue
+
+        close = ']' if scan.expect('[{') == '[' else '}'
+
+        if scan.peek() == close:
+            return
+
+        while True:
+            if close == '}':
+                item_key = scan.value()
+                scan.expect(':')
+                yield item_key, scan.value()
+            else:
+                yield scan.value()
+
+            if scan.expect(',' + close) == close:
+                return
+
+
+def iter_json_items(chunks, items_key, items_type='array'):
+    """
+    Yields the items of the top-level `items_key` property of the JSON
+    document read from the iterable of byte `chunks`.  The `items_type`
+    ('array' or 'object') is the schema type of the property.
+    """
+    if not ijson:
+        return _scan_json_items(chunks, items_key)
+
+    reader = _ChunkReader(chunks)
+    if items_type == 'object':
+        return ijson.kvitems(reader, items_key, use_float=True)
+
+    return ijson.items(reader, items_key + '.item', use_float=True)
+
+
+def iter_msgpack_items(chunks, items_key, items_type='array'):
+    """
+    Yields the items of the top-level `items_key` property of the msgpack
+    document read from the iterable of byte `chunks`.  The `items_type`
+    ('array' or 'object') is the schema type of the property.
+    """
+    import msgpack
+
+    unpacker = msgpack.Unpacker(_ChunkReader(chunks), raw=False,
+                                read_size=CHUNK_SIZE,
+                                object_pairs_hook=shared_keys_hook())
+
+    for _ in six.moves.range(unpacker.read_map_header()):
+        if unpacker.unpack() != items_key:
+            unpacker.skip()
+            continue
+
+        if items_type == 'object':
+            for _ in six.moves.range(unpacker.read_map_header()):
+                yield unpacker.unpack(), unpacker.unpack()
+        else:
+            for _ in six.moves.range(unpacker.read_array_header()):
+                yield unpacker.unpack()
+        return
+
+    raise KeyError(items_key)
+
+
+def iter_items(response, items_key, items_type='array', chunk_size=CHUNK_SIZE):
+    """
+    Yields the items of the top-level `items_key` property of a (streaming)
+    requests response body; the response is closed when the items are
+    exhausted, or the generator is closed.
+    """
+    content_type = response.headers.get('content-type', '').lower()
+    chunks = response.iter_content(chunk_size)
+
+    try:
+        if 'msgpack' in content_type:
+            items = iter_msgpack_items(chunks, items_key, items_type)
+        elif 'json' in content_type:
+            items = iter_json_items(chunks, items_key, items_type)
+        else:
+            raise ValueError("unable to stream content-type: %s" % content_type)
+
+        for item in items:
+            yield item
+
+    finally:
+        response.close()
+
+
+class ItemStream(object):
+    """
+    Iterator of the items of a streaming response (see `iter_items`); the
+    requests `response` is available to check the status and headers before
+    the items are read.  A 304 (not modified) response has no items.
+    """
+
+    def __init__(self, response, items_key, items_type='array'):
+        self.response = response
+        self.items_key = items_key
+        self.items_type = items_type
+        self._items = None
+
+    @property
+    def not_modified(self):
+        return self.response.status_code == 304
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._items is None:
+            self._items = (iter(()) if self.not_modified else
+                           iter_items(self.response, self.items_key, self.items_type))
+        return next(self._items)
+
+    next = __next__
+
+    def close(self):
+        if self._items is not None:
+            self._items.close()
+        self.response.close()
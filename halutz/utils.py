@@ -1,8 +1,7 @@
 
 import six
-# noinspection PyPackageRequirements
-from inflection import parameterize, underscore, camelize
-from bravado_core.model import MODEL_MARKER
+
+# inflection and bravado_core are imported when the functions are called
 
 MODEL_NAME_SUFFIX = 'Body'
 
@@ -24,6 +23,9 @@ def humanize_api_path(api_path):
     -------
     str - humazined form.
     """
+    # noinspection PyPackageRequirements
+    from inflection import parameterize, underscore, camelize
+
     return reduce(lambda val, func: func(val),
                   [parameterize, underscore, camelize],
                   unicode(api_path))
@@ -42,6 +44,9 @@ def modeltag_nonref_schemas(spec):
     spec : dict
         The OpenApi spec dictionary
     """
+    # noinspection PyPackageRequirements
+    from inflection import camelize
+    from bravado_core.model import MODEL_MARKER
 
     for path_name, path_data in six.iteritems(spec['paths']):
         for path_cmd, cmd_data in six.iteritems(path_data):
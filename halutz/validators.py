@@ -0,0 +1,349 @@
+"""
+Compiles JSON-schemas into plain python validator functions.  The
+compiler emits python source, so the same validators can either be
+written into a generated module (see :mod:`halutz.codegen`) or exec'd at
+runtime (see :meth:`ValidatorCompiler.compile`).
+
+Each generated function has the signature `(value, path, errors)`, and
+appends a message for each validation error found to the `errors` list.
+The supported keywords are: type, enum, required, properties,
+additionalProperties, items, minItems, maxItems, minLength, maxLength,
+pattern, minimum, maximum, exclusiveMinimum, exclusiveMaximum, allOf,
+anyOf, oneOf, and $ref.  Other keywords (format, etc.) are ignored.
+"""
+
+import re
+import six
+from collections import OrderedDict
+
+__all__ = ['ValidatorCompiler', 'MISSING', 'TYPE_CHECKS']
+
+
+class _Missing(object):
+    def __repr__(self):
+        return 'MISSING'
+
+    def __reduce__(self):
+        # pickled by reference, so the unpickled value is the same object
+        return 'MISSING'
+
+
+MISSING = _Missing()
+
+# (key, value) = (json-schema type, python expression that checks `v`)
+
+TYPE_CHECKS = {
+    'string': "isinstance(v, string_types)",
+    'integer': "(isinstance(v, integer_types) and not isinstance(v, bool))",
+    'number': "(isinstance(v, (float,) + integer_types) and not isinstance(v, bool))",
+    'boolean': "isinstance(v, bool)",
+    'object': "isinstance(v, dict)",
+    'array': "isinstance(v, (list, tuple))",
+    'null': "v is None"
+}
+
+# the names the generated source depends on
+
+RUNTIME = {
+    're': re,
+    'MISSING': MISSING,
+    'string_types': six.string_types,
+    'integer_types': six.integer_types
+}
+
+_LEAF_KEYWORDS = {'type', 'format', 'description', 'title', 'readOnly',
+                  'example', 'default', 'x-nullable'}
+
+
+def _ident(name):
+    ident = re.sub(r'\W', '_', name)
+    return ident if not ident[:1].isdigit() else '_' + ident
+
+
+class ValidatorCompiler(object):
+    """
+    Parameters
+    ----------
+    deref : callable
+        used to resolve '$ref' schemas; typically `client.deref`.  Each
+        referenced schema is compiled (once) into its own function.
+
+    prefix : str
+        the name prefix of the generated functions.
+    """
+    def __init__(self, deref, prefix='_validate_'):
+        self.deref = deref
+        self.prefix = prefix
+        self.functions = OrderedDict()
+        self.constants = dict()
+        self.constant_lines = list()
+        self._schema_funcs = dict()
+        self._namespace = dict(RUNTIME)
+        self._compiled_constants = 0
+
+    # -------------------------------------------------------------------------
+    # public API
+    # -------------------------------------------------------------------------
+
+    def function_for(self, schema, name=None):
+        """
+        Returns the name of the validator function for `schema`, generating
+        the source for it (and the schemas it references) if needed.
+        """
+        if '$ref' in schema:
+            schema_key = schema['$ref']
+            name = schema['$ref'].rpartition('/')[-1]
+        elif self._is_leaf(schema):
+            # leaf schemas that only check the type share one function
+            type_text = self._type_check(schema)[1] or 'any'
+            schema_key = ('leaf', type_text)
+            name = 'leaf_' + type_text.replace('|', '_or_')
+        else:
+            schema_key = id(schema)
+
+        func_name = self._schema_funcs.get(schema_key)
+        if func_name:
+            return func_name
+
+        func_name = self._unique_name(self.prefix + _ident(name or 'schema'))
+        self._schema_funcs[schema_key] = func_name
+
+        # reserve the name before generating the body, so that recursive
+        # schemas refer to this function.
+
+        self.functions[func_name] = ''
+        self.functions[func_name] = self._function_source(func_name, self.deref(schema))
+        return func_name
+
+    def source(self):
+        """ returns the python source of all the generated functions """
+        return '\n'.join(self.constant_lines + [''] + list(self.functions.values()))
+
+    def compile(self, schema, name=None):
+        """
+        Returns a validator function for `schema`; the function takes the
+        value to check and returns the list of validation errors.
+        """
+        func_name = self.function_for(schema, name)
+
+        pending = [f_name for f_name in self.functions if f_name not in self._namespace]
+        if pending:
+            code = '\n'.join(
+                self.constant_lines[self._compiled_constants:] +
+                [self.functions[f_name] for f_name in pending])
+            self._compiled_constants = len(self.constant_lines)
+            six.exec_(compile(code, '<halutz-validators>', 'exec'), self._namespace)
+
+        validate = self._namespace[func_name]
+
+        def validator(value, path='$'):
+            errors = []
+            validate(value, path, errors)
+            return errors
+
+        return validator
+
+    # -------------------------------------------------------------------------
+    # source generation
+    # -------------------------------------------------------------------------
+
+    def _unique_name(self, name):
+        unique, count = name, 1
+        while unique in self.functions:
+            count += 1
+            unique = "%s_%d" % (name, count)
+        return unique
+
+    def _constant(self, value, factory=repr):
+        """ returns the module-level name holding `value` (a pattern, set of names, etc.) """
+        const_key = (factory.__name__, repr(value))
+        c_name = self.constants.get(const_key)
+        if not c_name:
+            c_name = self.constants[const_key] = '_const_%d' % len(self.constants)
+            self.constant_lines.append("%s = %s" % (c_name, factory(value)))
+        return c_name
+
+    def _pattern(self, pattern):
+        return self._constant(pattern, lambda value: "re.compile(%r)" % value)
+
+    def _names(self, names):
+        return self._constant(sorted(names), lambda value: "frozenset(%r)" % (value,))
+
+    @staticmethod
+    def _text(value):
+        # schema values placed into an error message format string
+        return str(value).replace('%', '%%')
+
+    @staticmethod
+    def _error(indent, message, *args):
+        """ returns the line that appends `message` % `args` to the errors list """
+        return "%serrors.append(%r %% (%s,))" % (' ' * indent, message, ', '.join(args))
+
+    def _is_leaf(self, schema):
+        return '$ref' not in schema and not (set(schema) - _LEAF_KEYWORDS)
+
+    def _type_check(self, schema):
+        """ returns (python expression checking the type of `v`, type text), or (None, None) """
+        s_type = schema.get('type')
+        if not s_type:
+            return None, None
+
+        s_types = s_type if isinstance(s_type, list) else [s_type]
+        if schema.get('x-nullable'):
+            s_types = s_types + ['null']
+
+        checks = [TYPE_CHECKS[each] for each in s_types if each in TYPE_CHECKS]
+        if not checks:
+            return None, None
+
+        return ' or '.join(checks), self._text('|'.join(s_types))
+
+    def _check_value(self, schema, value_expr, path_expr, indent, name):
+        """ returns the lines that validate `value_expr` against `schema` """
+        pad = ' ' * indent
+
+        if self._is_leaf(schema):
+            check, type_text = self._type_check(schema)
+            if not check:
+                return []
+            return [
+                pad + "v = %s" % value_expr,
+                pad + "if not (%s):" % check,
+                self._error(indent + 4, '%s: expected ' + type_text + ', got %r', path_expr, 'v')]
+
+        return [pad + "%s(%s, %s, errors)" % (
+            self.function_for(schema, name), value_expr, path_expr)]
+
+    def _function_source(self, func_name, schema):
+        body = []
+        add = body.append
+
+        check, type_text = self._type_check(schema)
+        if check:
+            add("    v = value")
+            add("    if not (%s):" % check)
+            add(self._error(8, '%s: expected ' + type_text + ', got %r', 'path', 'v'))
+            add("        return")
+
+        if 'enum' in schema:
+            add("    if value not in %s:" % self._constant(list(schema['enum'])))
+            add(self._error(8, '%s: %r is not one of the allowed values', 'path', 'value'))
+
+        # nested schema functions are named after this function
+        name = func_name[len(self.prefix):]
+
+        self._object_checks(schema, add, name)
+        self._array_checks(schema, add, name)
+        self._scalar_checks(schema, add)
+        self._combinator_checks(schema, add, name)
+
+        return '\n'.join(
+            ["def %s(value, path, errors):" % func_name] + (body or ["    pass"]) + [''])
+
+    def _object_checks(self, schema, add, name):
+        props = schema.get('properties') or {}
+        required = schema.get('required') or []
+        addl = schema.get('additionalProperties', True)
+
+        if not (props or required or addl is not True):
+            return
+
+        add("    if isinstance(value, dict):")
+        for prop_name in required:
+            add("        if %r not in value:" % prop_name)
+            add(self._error(12, '%s: ' + self._text(repr(prop_name)) + ' is a required property',
+                            'path'))
+
+        for prop_name, prop_schema in six.iteritems(props):
+            lines = self._check_value(
+                prop_schema, 'item', "path + %r" % ('.' + prop_name), indent=12,
+                name=name + '_' + _ident(prop_name))
+            if not lines:
+                continue
+            add("        item = value.get(%r, MISSING)" % prop_name)
+            add("        if item is not MISSING:")
+            for line in lines:
+                add(line)
+
+        if addl is False:
+            add("        for name in value:")
+            add("            if name not in %s:" % self._names(props))
+            add(self._error(16, '%s: unexpected property %r', 'path', 'name'))
+
+        elif isinstance(addl, dict):
+            lines = self._check_value(addl, 'item', "path + '.' + str(name)", indent=12,
+                                      name=name + '_value')
+            if lines:
+                add("        for name, item in value.items():")
+                if props:
+                    add("            if name in %s:" % self._names(props))
+                    add("                continue")
+                for line in lines:
+                    add(line)
+
+    def _array_checks(self, schema, add, name):
+        items = schema.get('items')
+        if not (isinstance(items, dict) or 'minItems' in schema or 'maxItems' in schema):
+            return
+
+        add("    if isinstance(value, (list, tuple)):")
+        if 'minItems' in schema:
+            add("        if len(value) < %d:" % schema['minItems'])
+            add(self._error(12, '%s: expected at least %d items', 'path', str(schema['minItems'])))
+        if 'maxItems' in schema:
+            add("        if len(value) > %d:" % schema['maxItems'])
+            add(self._error(12, '%s: expected at most %d items', 'path', str(schema['maxItems'])))
+
+        if isinstance(items, dict):
+            lines = self._check_value(items, 'item', "'%s[%d]' % (path, index)", indent=12,
+                                      name=name + '_item')
+            if lines:
+                add("        for index, item in enumerate(value):")
+                for line in lines:
+                    add(line)
+
+    def _scalar_checks(self, schema, add):
+        if any(kw in schema for kw in ('minLength', 'maxLength', 'pattern')):
+            add("    if isinstance(value, string_types):")
+            if 'minLength' in schema:
+                add("        if len(value) < %d:" % schema['minLength'])
+                add(self._error(12, '%s: shorter than %d', 'path', str(schema['minLength'])))
+            if 'maxLength' in schema:
+                add("        if len(value) > %d:" % schema['maxLength'])
+                add(self._error(12, '%s: longer than %d', 'path', str(schema['maxLength'])))
+            if 'pattern' in schema:
+                add("        if not %s.search(value):" % self._pattern(schema['pattern']))
+                add(self._error(12, '%s: does not match ' + self._text(schema['pattern']), 'path'))
+
+        for kw, op, exclusive_op in (('minimum', '<', '<='), ('maximum', '>', '>=')):
+            if kw not in schema:
+                continue
+            exclusive = schema.get('exclusive' + kw[0].upper() + kw[1:]) is True
+            add("    if (isinstance(value, (float,) + integer_types) and not isinstance(value, bool) and")
+            add("            value %s %r):" % (exclusive_op if exclusive else op, schema[kw]))
+            add(self._error(8, '%s: %r is out of range (' + kw + ' ' + self._text(schema[kw]) + ')',
+                            'path', 'value'))
+
+    def _combinator_checks(self, schema, add, name):
+        for index, sub_schema in enumerate(schema.get('allOf') or []):
+            for line in self._check_value(sub_schema, 'value', 'path', indent=4,
+                                          name='%s_all%d' % (name, index)):
+                add(line)
+
+        for keyword in ('anyOf', 'oneOf'):
+            sub_schemas = schema.get(keyword)
+            if not sub_schemas:
+                continue
+
+            add("    passed = 0")
+            for index, sub_schema in enumerate(sub_schemas):
+                sub_name = '%s_%s%d' % (name, keyword[:3].lower(), index)
+                add("    sub_errors = []")
+                add("    %s(value, path, sub_errors)" % self.function_for(sub_schema, sub_name))
+                add("    passed += not sub_errors")
+            if keyword == 'anyOf':
+                add("    if not passed:")
+                add(self._error(8, '%s: does not match any of the allowed schemas', 'path'))
+            else:
+                add("    if passed != 1:")
+                add(self._error(8, '%s: must match exactly one schema, matched %d', 'path', 'passed'))
@@ -0,0 +1,137 @@
+"""
+Lightweight, lazy, response models.  A view wraps the decoded response
+data (it is not copied) together with its schema.  Properties are read
+with attribute (or item) access, and nested objects and arrays are only
+wrapped in views when they are accessed.  Validation against the schema
+is done on demand with `validate()`, using a compiled validator.
+Properties whose names are also Mapping methods (items, keys, get, ...)
+are read using item access, e.g. `view['items']`.
+
+Views are used when the client (or request) `model_response` is set to
+'view'.
+"""
+
+import six
+
+try:
+    from collections.abc import Mapping, Sequence
+except ImportError:     # pragma: no cover, py2
+    from collections import Mapping, Sequence
+
+from .models import ValidationError
+
+__all__ = ['ObjectView', 'ArrayView', 'make_view']
+
+
+def make_view(data, schema, factory):
+    """ returns a view of `data` for its `schema`, or the data as-is when it is not an object/array """
+    if isinstance(data, dict):
+        return ObjectView(data, schema, factory)
+    if isinstance(data, list):
+        return ArrayView(data, schema, factory)
+    return data
+
+
+class _View(object):
+    __slots__ = ('_data', '_schema', '_factory', '_views')
+
+    def __init__(self, data, schema, factory):
+        self._data = data
+        self._schema = factory.deref(schema) if schema else {}
+        self._factory = factory
+        self._views = None
+
+    def _view(self, key, value, schema):
+        if not isinstance(value, (dict, list)):
+            return value
+
+        if self._views is None:
+            self._views = dict()
+
+        view = self._views.get(key)
+        if view is None:
+            view = self._views[key] = make_view(value, schema, self._factory)
+        return view
+
+    def for_json(self):
+        """ returns the underlying response data """
+        return self._data
+
+    def validate(self):
+        errors = self._factory.schema_validator(self._schema)(self._data)
+        if errors:
+            raise ValidationError(errors)
+        return True
+
+    def __eq__(self, other):
+        return self._data == (other._data if isinstance(other, _View) else other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+
+class ObjectView(_View, Mapping):
+    __slots__ = ()
+
+    def _prop_schema(self, name):
+        schema = self._schema
+        prop_schema = (schema.get('properties') or {}).get(name)
+        if prop_schema is None:
+            prop_schema = schema.get('additionalProperties')
+
+        return prop_schema if isinstance(prop_schema, dict) else None
+
+    def __getitem__(self, name):
+        return self._view(name, self._data[name], self._prop_schema(name))
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        try:
+            return self[name]
+        except KeyError:
+            # properties defined in the schema, but not in the data, are None
+            if name in (self._schema.get('properties') or {}):
+                return None
+            raise AttributeError("%s has no property '%s'" % (
+                self.__class__.__name__, name))
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, name):
+        return name in self._data
+
+    def __dir__(self):
+        return list(self._data)
+
+    def __repr__(self):
+        return "<%s %s attributes: %s>" % (
+            self.__class__.__name__,
+            self._schema.get('x-model') or self._schema.get('title') or '',
+            ', '.join(sorted(self._data)))
+
+
+class ArrayView(_View, Sequence):
+    __slots__ = ()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[each] for each in six.moves.range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self._data)
+
+        return self._view(index, self._data[index], self._schema.get('items'))
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return "<%s [%d items]>" % (self.__class__.__name__, len(self._data))
@@ -23,6 +23,10 @@ setup(
     license='MIT',
     zip_safe=False,
     install_requires=requirements('requirements.txt'),
+    extras_require={
+        'aio': ['aiohttp'],
+        'streaming': ['ijson']
+    },
     keywords=('serialization', 'rest', 'json', 'api', 'marshal',
               'marshalling', 'deserialization', 'validation', 'schema',
               'jsonschema', 'swagger', 'openapi', 'networking', 'automation'),
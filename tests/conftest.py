@@ -0,0 +1,23 @@
+import pytest
+
+from .mock_server import MockServer, make_items
+
+
+@pytest.fixture(scope='module')
+def server():
+    """ the local test server, see tests.mock_server """
+    with MockServer(make_items(3)) as mock:
+        yield mock
+
+
+@pytest.fixture
+def spec(server):
+    """
+    the spec of the server, with 2 resources; the Resource0 items have a
+    'created' date-time property.  The server items and calls are reset.
+    """
+    server.set_items(make_items(3))
+    spec = server.spec(2)
+    spec['definitions']['Resource0']['properties']['created'] = {
+        'type': 'string', 'format': 'date-time'}
+    return spec
@@ -0,0 +1,254 @@
+"""
+A local HTTP server for the tests, serving the spec of `make_spec`.  Each
+resource collection serves the same list of items:
+
+    GET     /api/<resource>             {'items': [...], 'count': n}, sliced by offset/limit
+    GET     /api/<resource>/<id>        the item with the id, or 404
+    POST    /api/<resource>             the request body, 201
+    PUT     /api/<resource>/<id>        the request body
+    DELETE  /api/<resource>/<id>        204
+
+The list responses are paged by the offset/limit, or page/page_size,
+query params; when `paging` is 'cursor' they are paged by the cursor
+query param, and have the 'next_cursor' rather than the 'count'.
+
+The response bodies are msgpack when the request accepts it, otherwise
+JSON.  The 200 GET responses have an ETag, and a GET with a matching If-None-Match gets
+a 304.  The calls are recorded in `calls`; and `queue` sets the (status,
+headers, body) responses of the next calls to a path.
+"""
+import json
+import hashlib
+import threading
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs
+
+__all__ = ['MockServer', 'make_spec', 'make_items']
+
+
+Call = namedtuple('Call', 'method path query headers body')
+
+
+def make_spec(n_resources=2, n_props=3):
+    """ returns a swagger spec with `n_resources` collections, of 5 operations each """
+    paths, definitions = dict(), dict()
+
+    for r_num in range(n_resources):
+        rsrc, model = 'resource%d' % r_num, 'Resource%d' % r_num
+        model_ref = {'$ref': '#/definitions/%s' % model}
+        tags = [rsrc]
+
+        props = {'id': {'type': 'string'}, 'label': {'type': 'string'}}
+        props.update(('prop_%d' % i, {'type': ['string', 'integer', 'boolean'][i % 3]})
+                     for i in range(n_props))
+        definitions[model] = {'type': 'object', 'required': ['label'], 'properties': props}
+        definitions[model + 'List'] = {
+            'type': 'object',
+            'properties': {
+                'items': {'type': 'array', 'items': model_ref},
+                'count': {'type': 'integer'}}}
+
+        id_param = {'name': 'id', 'in': 'path', 'type': 'string', 'required': True}
+        body_param = {'name': 'data', 'in': 'body', 'required': True, 'schema': model_ref}
+
+        paths['/api/%s' % rsrc] = {
+            'get': {
+                'operationId': 'list_%s' % rsrc, 'tags': tags,
+                'parameters': [
+                    {'name': 'offset', 'in': 'query', 'type': 'integer'},
+                    {'name': 'limit', 'in': 'query', 'type': 'integer'}],
+                'responses': {'200': {
+                    'description': 'ok',
+                    'schema': {'$ref': '#/definitions/%sList' % model}}}},
+            'post': {
+                'operationId': 'create_%s' % rsrc, 'tags': tags,
+                'parameters': [body_param],
+                'responses': {'201': {'description': 'ok', 'schema': model_ref}}}}
+
+        paths['/api/%s/{id}' % rsrc] = {
+            'get': {
+                'operationId': 'get_%s' % rsrc, 'tags': tags,
+                'parameters': [id_param],
+                'responses': {'200': {'description': 'ok', 'schema': model_ref}}},
+            'put': {
+                'operationId': 'update_%s' % rsrc, 'tags': tags,
+                'parameters': [id_param, body_param],
+                'responses': {'200': {'description': 'ok', 'schema': model_ref}}},
+            'delete': {
+                'operationId': 'delete_%s' % rsrc, 'tags': tags,
+                'parameters': [id_param],
+                'responses': {'204': {'description': 'deleted'}}}}
+
+    return {
+        'swagger': '2.0',
+        'info': {'title': 'halutz tests', 'version': '1.0'},
+        'host': 'localhost',
+        'schemes': ['http'],
+        'consumes': ['application/json'],
+        'produces': ['application/json'],
+        'paths': paths,
+        'definitions': definitions}
+
+
+def make_items(n_items, n_props=3):
+    """ returns a list of `n_items` items of the `make_spec` item schema """
+    return [
+        dict({'id': 'id-%d' % i, 'label': 'item-%d' % i},
+             **dict(('prop_%d' % p, [str(p), p, bool(p % 2)][p % 3]) for p in range(n_props)))
+        for i in range(n_items)]
+
+
+class _HTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _encode(self, body, headers):
+        # msgpack when the request accepts it, otherwise JSON
+        accept = self.headers.get('Accept') or ''
+        for content_type in ('application/x-msgpack', 'application/msgpack'):
+            if content_type in accept:
+                import msgpack
+                headers.setdefault('Content-Type', content_type)
+                return msgpack.packb(body, use_bin_type=True)
+
+        return json.dumps(body).encode('utf-8')
+
+    def _send(self, status, body=None, headers=None):
+        headers = dict(headers or {})
+        body = b'' if body is None else body
+        if not isinstance(body, bytes):
+            body = self._encode(body, headers)
+
+        if body and status == 200 and self.command == 'GET':
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()
+            if self.headers.get('If-None-Match') == etag:
+                status, body = 304, b''
+            headers['ETag'] = etag
+
+        self.send_response(status)
+        if body:
+            headers.setdefault('Content-Type', 'application/json')
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        path, _, query = self.path.partition('?')
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        server = self.server.mock
+        server.calls.append(Call(self.command, path, parse_qs(query), dict(self.headers), body))
+
+        queued = server.next_response(path)
+        if queued:
+            return self._send(*queued)
+
+        parts = path.strip('/').split('/')
+        if self.command == 'GET' and len(parts) == 2:
+            return self._send(200, server.list_body(parse_qs(query)))
+
+        if self.command == 'GET' and len(parts) == 3:
+            item = server.item(parts[2])
+            return self._send(200, item) if item else self._send(404, {'error': 'not found'})
+
+        # the request body is echoed, with its content type
+        echo_headers = {'Content-Type': self.headers.get('Content-Type') or 'application/json'}
+
+        if self.command == 'POST' and len(parts) == 2:
+            return self._send(201, body, echo_headers)
+
+        if self.command == 'PUT' and len(parts) == 3:
+            return self._send(200, body, echo_headers)
+
+        if self.command == 'DELETE' and len(parts) == 3:
+            return self._send(204)
+
+        self._send(404, {'error': 'not found'})
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+
+class MockServer(object):
+    """ the test server, on a free localhost port; `url` is set once started """
+
+    def __init__(self, items=None):
+        self.url = None
+        self.port = None
+        self.calls = []
+        self._queued = dict()
+        self._httpd = None
+        self.set_items(make_items(3) if items is None else items)
+
+    def set_items(self, items):
+        """ replaces the items of the collections; and resets the paging, calls and queued responses """
+        self.items = items
+        self.paging = None
+        self.calls = []
+        self._queued.clear()
+
+    def list_body(self, query):
+        params = dict((name, int(values[0])) for name, values in query.items()
+                      if values[0].isdigit())
+        offset, limit = params.get('offset', 0), params.get('limit')
+
+        if 'page' in params:
+            limit = params.get('page_size', 100)
+            offset = (params['page'] - 1) * limit
+
+        if self.paging == 'cursor':
+            offset, limit = params.get('cursor', 0), limit or 2
+            more = offset + limit < len(self.items)
+            return {'items': self.items[offset:offset + limit],
+                    'next_cursor': str(offset + limit) if more else None}
+
+        end = None if limit is None else offset + limit
+        return {'items': self.items[offset:end], 'count': len(self.items)}
+
+    def item(self, item_id):
+        return next((item for item in self.items if item['id'] == item_id), None)
+
+    def queue(self, path, *responses):
+        """ the (status, headers, body) responses of the next calls to `path` """
+        self._queued.setdefault(path, []).extend(responses)
+
+    def next_response(self, path):
+        queued = self._queued.get(path)
+        return queued.pop(0) if queued else None
+
+    def spec(self, n_resources=2, n_props=3):
+        """ returns the `make_spec` spec, with the host of this server """
+        spec = make_spec(n_resources, n_props)
+        spec['host'] = '127.0.0.1:%d' % self.port
+        return spec
+
+    def start(self):
+        self._httpd = _HTTPServer(('127.0.0.1', 0), _Handler)
+        self._httpd.mock = self
+        self.port = self._httpd.server_address[1]
+        self.url = 'http://127.0.0.1:%d' % self.port
+
+        thread = threading.Thread(target=self._httpd.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from halutz.client import Client
+from halutz.aio import AsyncClient
+
+
+def _run(client, coro_fn):
+    async def main():
+        async with client:
+            return await coro_fn()
+    return asyncio.run(main())
+
+
+def test_gather(server, spec):
+    client = AsyncClient(server.url, origin_spec=spec, max_concurrency=2)
+    rqst = client.request.resource0.get_resource0
+    ids = [item['id'] for item in server.items] * 4
+
+    results = _run(client, lambda: asyncio.gather(*[rqst(id=item_id) for item_id in ids]))
+
+    assert [(resp['id'], ok) for resp, ok in results] == [(item_id, True) for item_id in ids]
+    assert client.aio_session is None
+
+
+def test_query_and_body(server, spec):
+    client = AsyncClient(server.url, origin_spec=spec)
+    body = dict(server.items[0], label='updated')
+
+    async def calls():
+        listed = await client.request.resource1.list_resource1(offset=1, limit=2)
+        updated = await client.request.resource1.update_resource1(id='id-0', data=body)
+        return listed, updated
+
+    (listed, ok), (updated, updated_ok) = _run(client, calls)
+
+    assert ok and updated_ok
+    assert listed['items'] == server.items[1:3]
+    assert updated == body
+    assert server.calls[0].query == {'offset': ['1'], 'limit': ['2']}
+
+
+def test_client_error(server, spec):
+    client = AsyncClient(server.url, origin_spec=spec)
+    resp, ok = _run(client, lambda: client.request.resource0.get_resource0(id='missing'))
+
+    assert not ok
+    assert resp[0].status_code == 404
+
+
+def test_hooks(server, spec):
+    events = []
+    client = AsyncClient(server.url, origin_spec=spec, metrics=True)
+    client.hooks.append(events.append)
+    rqst = client.request.resource1.get_resource1
+
+    _run(client, lambda: asyncio.gather(rqst(id='id-0'), rqst(id='missing')))
+
+    assert sorted((event.status_code, event.ok) for event in events) == [
+        (200, True), (404, False)]
+    assert all(event.phases['total'] >= event.phases['http'] for event in events)
+    assert client.metrics.as_dict()['get_resource1']['statuses'] == {'200': 1, '404': 1}
+
+
+def test_sync_calls_not_supported(server, spec):
+    client = AsyncClient(server.url, origin_spec=spec)
+    rqst = client.request.resource0.list_resource0
+
+    for call in (lambda: rqst.invoke(),
+                 lambda: rqst.stream('items'),
+                 lambda: rqst.paginate(),
+                 lambda: rqst.map([{}])):
+        with pytest.raises(TypeError):
+            call()
+
+    with pytest.raises(RuntimeError):
+        client.batch()
+
+
+def test_not_modified(server, spec):
+    etag = Client(server.url, origin_spec=spec).request.resource1.get_resource1.invoke(
+        id='id-0')[2].headers['ETag']
+
+    events = []
+    client = AsyncClient(server.url, origin_spec=spec)
+    client.hooks.append(events.append)
+    rqst = client.request.resource1.get_resource1
+
+    resp = _run(client, lambda: rqst(id='id-0', _request_options={
+        'headers': {'If-None-Match': etag}}))
+
+    assert resp == (None, True)
+    assert (events[0].status_code, events[0].ok) == (304, True)
@@ -0,0 +1,86 @@
+import json
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from halutz.client import Client
+
+
+def test_run_in_call_order(server, spec):
+    client = Client(server.url, origin_spec=spec)
+    rqst = client.request.resource1.get_resource1
+
+    batch = client.batch(max_workers=4)
+    batch.extend(rqst, [{'id': 'id-2'}, {'id': 'missing'}, {'id': 'id-0'}])
+    batch.add(rqst)
+
+    results = batch.run()
+
+    assert [result.index for result in results] == [0, 1, 2, 3]
+    assert [result.ok for result in results] == [True, False, True, False]
+    assert results[0].resp['label'] == 'item-2'
+    assert results[1].resp[0].status_code == 404 and results[1].error is None
+
+    # the missing id parameter is raised by the call, and captured
+    assert results[3].resp is None and results[3].error is not None
+
+
+def test_body_captured_when_added(server, spec):
+    client = Client(server.url, origin_spec=spec)
+    rqst = client.request.resource1.update_resource1
+
+    batch = client.batch()
+    for label in ('first', 'second'):
+        rqst.data.label = label
+        batch.add(rqst, id='id-0')
+
+    assert [result.resp['label'] for result in batch.run()] == ['first', 'second']
+    assert sorted(json.loads(call.body.decode())['label'] for call in server.calls) == [
+        'first', 'second']
+
+
+def test_map(server, spec):
+    client = Client(server.url, origin_spec=spec)
+    rqst = client.request.resource1.get_resource1
+    params = [{'id': item['id']} for item in server.items]
+
+    ordered = rqst.map(params, max_workers=3)
+    assert [result.resp['id'] for result in ordered] == [item['id'] for item in server.items]
+
+    completed = list(rqst.map(params, ordered=False))
+    assert sorted(result.index for result in completed) == [0, 1, 2]
+    assert all(result.ok for result in completed)
+
+
+def test_caller_session_is_kept(server, spec):
+    session = requests.Session()
+    adapter = HTTPAdapter(max_retries=7)
+    session.mount('http://', adapter)
+
+    client = Client(server.url, origin_spec=spec, session=session)
+    batch = client.batch(max_workers=20)
+    batch.add(client.request.resource0.list_resource0)
+
+    assert session.get_adapter('http://') is adapter
+    assert adapter.max_retries.total == 7
+    assert all(result.ok for result in batch.run())
+
+
+def test_client_session_pool_is_sized(server, spec):
+    client = Client(server.url, origin_spec=spec)
+    session = client.swagger_spec.http_client.session
+
+    client.batch(max_workers=5)
+    default = session.get_adapter('http://')
+
+    client.batch(max_workers=20)
+    adapter = session.get_adapter('http://')
+    assert adapter is not default
+    assert adapter.poolmanager.connection_pool_kw['maxsize'] == 20
+
+    # an adapter mounted by the caller on the client session is kept
+    mounted = HTTPAdapter(max_retries=7)
+    session.mount('https://', mounted)
+    client.batch(max_workers=40)
+    assert session.get_adapter('https://') is mounted
+    assert session.get_adapter('http://').poolmanager.connection_pool_kw['maxsize'] == 40
@@ -0,0 +1,21 @@
+import argparse
+
+from benchmarks import suite
+
+
+def test_suite_smoke():
+    args = argparse.Namespace(only=None, sizes=['small'], items=[50], calls=5, workers=2,
+                              repeat=1)
+    report = suite.run(args)
+
+    assert list(report['results']) == list(suite.BENCHMARKS)
+    assert report['results']['indexer']['50_streaming_items_per_sec'] > 0
+    assert suite.compare(report['results'], report['results'], 0.2) == []
+
+
+def test_compare():
+    baseline = {'call': {'get_per_sec': 100.0, 'list_sec': 1.0, 'classes': 3}}
+    results = {'call': {'get_per_sec': 70.0, 'list_sec': 1.1, 'classes': 30}}
+
+    assert suite.compare(results, baseline, 0.2) == [('call.get_per_sec', 70.0, 100.0)]
+    assert suite.compare(results, baseline, 0.5) == []
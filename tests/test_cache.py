@@ -0,0 +1,60 @@
+from halutz.cache import LRUCache
+from halutz.client import Client
+
+
+def test_lru_eviction_and_stats():
+    cache = LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+
+    assert cache.get('a') == 1          # 'b' is now the least recently used
+    cache.put('c', 3)
+
+    assert 'b' not in cache and 'a' in cache and 'c' in cache
+    assert cache.get('b') is None
+    assert cache.cache_info() == (1, 1, 1, 2, 2)
+
+    cache.invalidate('a')
+    assert len(cache) == 1
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_get_or_create():
+    cache = LRUCache(maxsize=None)
+    created = []
+
+    def create():
+        created.append(1)
+        return 'value'
+
+    assert cache.get_or_create('key', create) == 'value'
+    assert cache.get_or_create('key', create) == 'value'
+    assert len(created) == 1
+    assert cache.cache_info().maxsize is None
+
+
+def test_model_class_cache(server, spec):
+    spec['paths']['/api/resource1']['post']['parameters'][0]['schema'] = {
+        'type': 'object', 'properties': {'name': {'type': 'string'}}}
+    client = Client(server.url, origin_spec=spec, model_cache_size=1)
+    build = client.build
+
+    resource0 = build.model_class('Resource0')
+    assert build.model_class('Resource0') is resource0
+    build.model_class('Resource1')
+
+    info = build.cache_info()
+    assert (info.hits, info.misses, info.evictions, info.maxsize, info.currsize) == (1, 2, 1, 1, 1)
+    assert build.model_class('Resource0') is not resource0
+
+    # an anonymous schema is cached by its content, and is not added to
+    # the spec definitions
+    definitions = set(client.definitions)
+    body_cls = client.request.resource1.create_resource1.template.body_type
+    assert client.request.resource1.create_resource1.template.body_type is body_cls
+    assert set(client.definitions) == definitions
+    assert build.resp_class(client.request.resource1.delete_resource1, 204) is None
+
+    build.invalidate()
+    assert build.cache_info().currsize == 0
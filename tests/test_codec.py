@@ -0,0 +1,93 @@
+import msgpack
+import pytest
+
+from benchmarks import import_time
+
+from halutz import codec
+from halutz.client import Client
+
+
+def _msgpack_spec(spec):
+    spec['produces'] = ['application/x-msgpack', 'application/json']
+    spec['consumes'] = [codec.msgpack_body_type(), 'application/json']
+    return spec
+
+
+def test_msgpack_responses(server, spec):
+    expected, ok = Client(server.url, origin_spec=spec).request.resource1.list_resource1()
+
+    client = Client(server.url, origin_spec=_msgpack_spec(spec), use_msgpack=True)
+    resp, ok, http_resp = client.request.resource1.list_resource1.invoke()
+
+    assert ok and resp == expected
+    assert http_resp.headers['Content-Type'] == 'application/x-msgpack'
+    assert server.calls[-1].headers['Accept'].startswith('application/x-msgpack')
+
+    resp, ok = client.request.resource1.get_resource1(id='id-2')
+    assert ok and resp['label'] == 'item-2'
+
+
+def test_msgpack_body(server, spec):
+    client = Client(server.url, origin_spec=_msgpack_spec(spec), use_msgpack=True)
+    rqst = client.request.resource1.update_resource1
+    rqst.data.label = 'updated'
+
+    resp, ok = rqst(id='id-0')
+    assert ok and resp['label'] == 'updated'
+
+    call = server.calls[-1]
+    assert call.headers['Content-Type'] == codec.msgpack_body_type()
+    assert msgpack.unpackb(call.body, raw=False) == {'label': 'updated'}
+
+
+def test_json_without_msgpack(server, spec):
+    # the operations that do not produce msgpack are negotiated as JSON
+    client = Client(server.url, origin_spec=spec, use_msgpack=True)
+    resp, ok, http_resp = client.request.resource1.get_resource1.invoke(id='id-0')
+    assert ok and http_resp.headers['Content-Type'] == 'application/json'
+    assert 'msgpack' not in server.calls[-1].headers.get('Accept', '')
+
+
+def test_msgpack_loads():
+    data = msgpack.packb([{'name': 'a'}, {'name': 'b'}], use_bin_type=True)
+
+    assert codec.msgpack_loads(data) == [{'name': 'a'}, {'name': 'b'}]
+    assert codec.msgpack_loads(data, raw=True) == [{b'name': b'a'}, {b'name': b'b'}]
+
+    first, second = codec.msgpack_loads(bytearray(data), intern_keys=True)
+    assert [key for key in first][0] is [key for key in second][0]
+
+
+@pytest.fixture
+def json_loads():
+    yield
+    codec.use_json()
+
+
+def test_use_json(server, spec, json_loads):
+    decoded = []
+
+    def loads(data):
+        decoded.append(data)
+        return codec._std_json_loads(data)
+
+    codec.use_json(loads=loads)
+    resp, ok = Client(server.url, origin_spec=spec).request.resource1.get_resource1(id='id-1')
+
+    assert ok and resp['label'] == 'item-1'
+    assert len(decoded) == 1 and isinstance(decoded[0], bytes)
+
+    codec.use_json()
+    assert codec.json_loads is codec._std_json_loads
+    assert codec.json_loads(b'{"a": [1]}') == {'a': [1]}
+
+
+def test_std_json_default(json_loads):
+    # the stdlib json is the default decoder, and orjson is not imported
+    # unless the caller selects it.
+    result = import_time.run('halutz.codec', repeat=1, deferred=('orjson',))
+    assert result['loaded_deferred'] == []
+
+    orjson = pytest.importorskip('orjson')
+    codec.use_json(loads=orjson.loads)
+    assert codec.json_loads(b'{"a": [1]}') == {'a': [1]}
@@ -0,0 +1,62 @@
+import sys
+import json
+import importlib
+
+import pytest
+
+from halutz.client import Client
+from halutz.models import CompiledModel, ValidationError
+from halutz import codegen
+
+
+@pytest.fixture
+def models(server, spec, tmpdir, monkeypatch):
+    """ the module generated for the spec, imported as `test_models` """
+    Client(server.url, origin_spec=spec).build.generate_models(str(tmpdir.join('test_models.py')))
+    monkeypatch.syspath_prepend(str(tmpdir))
+    monkeypatch.delitem(sys.modules, 'test_models', raising=False)
+    return importlib.import_module('test_models')
+
+
+def test_generated_models(server, spec, models):
+    assert set(['Resource0', 'Resource1', 'Resource0List']) <= set(models.MODELS)
+
+    client = Client(server.url, origin_spec=spec, models=models)
+    resource1 = client.build.model_class('Resource1')
+    assert resource1 is models.MODELS['Resource1']
+    assert issubclass(resource1, CompiledModel)
+
+    item = resource1(id='x', label='a label', prop_1=5, prop_2=None)
+    assert item.for_json() == {'id': 'x', 'label': 'a label', 'prop_1': 5}
+    assert item.prop_0 is None and item.prop_2 is None
+
+    with pytest.raises(ValidationError):
+        item.prop_1 = 'not an integer'
+
+    with pytest.raises(ValidationError):
+        resource1(id='x').validate()
+
+
+def test_generated_same_as_runtime(server, spec, models):
+    results = []
+    for each_models in (None, models):
+        client = Client(server.url, origin_spec=spec, models=each_models)
+        client.model_response = True
+
+        rqst = client.request.resource1.update_resource1
+        rqst.data.label = 'updated'
+        rqst.data.prop_1 = 7
+        resp, ok = rqst(id='id-0')
+        assert ok
+        results.append(resp.for_json())
+
+    assert results[0] == results[1] == {'label': 'updated', 'prop_1': 7}
+
+
+def test_main(spec, tmpdir, monkeypatch):
+    spec_file, output = tmpdir.join('spec.json'), tmpdir.join('main_models.py')
+    spec_file.write(json.dumps(spec))
+    monkeypatch.setattr(sys, 'argv', ['codegen', str(spec_file), str(output)])
+
+    codegen.main()
+    assert 'MODELS = {' in output.read()
@@ -0,0 +1,26 @@
+import pytest
+
+from benchmarks.import_time import run, DEFERRED
+
+
+# the modules imported by the caller; those that need the deferred
+# dependencies (e.g. halutz.aio, halutz.response_cache) are imported when
+# their feature is used, and are not checked.
+
+@pytest.mark.parametrize('module', [
+    'halutz', 'halutz.client', 'halutz.indexer', 'halutz.resilience',
+    'halutz.ratelimit', 'halutz.operations'])
+def test_import_time(module):
+    # a budget above the 0.1s of benchmarks.import_time, for busy test machines
+    result = run(module, budget=0.25, repeat=3)
+
+    assert result['loaded_deferred'] == [], result
+    assert result['import_sec'] <= result['budget_sec'], result
+
+
+def test_deferred_are_detected():
+    # the check reports a deferred dependency that is imported
+    result = run('halutz.aio', budget=10.0, repeat=1)
+    assert set(['bravado', 'requests']) <= set(result['loaded_deferred'])
+    assert set(result['loaded_deferred']) <= set(DEFERRED)
+
@@ -0,0 +1,253 @@
+import pytest
+
+from halutz.client import Client
+from halutz.indexer import Indexer
+
+from .mock_server import make_items
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_refresh(server, spec, streaming):
+    client = Client(server.url, origin_spec=spec)
+    indexer = Indexer(client.request.resource1.list_resource1, name_from='label',
+                      streaming=streaming).run()
+    assert indexer.etag
+
+    # not modified: a conditional request, and no changes
+    changes = indexer.refresh()
+    assert changes == ([], [], [], [])
+    assert server.calls[-1].headers['If-None-Match'] == indexer.etag
+
+    items = make_items(4)[1:]
+    items[0]['label'] = 'renamed'
+    items[1]['prop_1'] = 100
+    server.set_items(items)
+
+    changes = indexer.refresh()
+    assert changes.added == ['id-3']
+    assert changes.removed == ['id-0']
+    assert changes.renamed == ['id-1']
+    assert changes.changed == ['id-1', 'id-2']
+
+    assert sorted(indexer.names) == ['item-2', 'item-3', 'renamed']
+    assert indexer['item-2'].value['prop_1'] == 100
+    assert indexer.catalog == Indexer(indexer.rqst, name_from='label').run().catalog
+
+
+def test_invoke_not_modified(server, spec):
+    client = Client(server.url, origin_spec=spec)
+    rqst = client.request.resource1.get_resource1
+
+    item, ok, http_resp = rqst.invoke(id='id-0')
+    etag = http_resp.headers['ETag']
+
+    resp, ok, http_resp = rqst.invoke(id='id-0', _request_options={
+        'headers': {'If-None-Match': etag}})
+    assert (resp, ok, http_resp.status_code) == (None, True, 304)
+
+
+class _NotModified(object):
+    status_code = 304
+    headers = {}
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_streaming_not_modified_is_closed(server, spec, monkeypatch):
+    from halutz.request import Request
+    from halutz.streaming import ItemStream
+
+    client = Client(server.url, origin_spec=spec)
+    indexer = Indexer(client.request.resource1.list_resource1, name_from='label',
+                      streaming=True).run()
+    assert len(indexer) == 3
+
+    response = _NotModified()
+    monkeypatch.setattr(Request, 'stream', lambda rqst, items_key, **params: (
+        ItemStream(response, items_key), True))
+
+    assert indexer._fetch() is None
+    assert response.closed
+
+
+def test_stream_error_is_closed(server, spec, monkeypatch):
+    import requests
+
+    closed = []
+    close = requests.Response.close
+    monkeypatch.setattr(requests.Response, 'close', lambda resp: (
+        closed.append(resp.status_code), close(resp)))
+
+    client = Client(server.url, origin_spec=spec)
+    server.queue('/api/resource1', (404, {}, {'error': 'not found'}))
+    resp, ok = client.request.resource1.list_resource1.stream('items')
+
+    assert not ok
+    assert closed == [404]
+
+
+def _site_items():
+    items = make_items(4)
+    for item, site in zip(items, ['east', 'west', 'east', None]):
+        if site:
+            item['site'] = {'name': site}
+    return items
+
+
+def test_secondary_indexes(server, spec):
+    server.set_items(_site_items())
+    client = Client(server.url, origin_spec=spec)
+    indexer = Indexer(client.request.resource1.list_resource1, name_from='label').run()
+
+    indexer.add_index('site', key='site.name')
+    indexer.add_index('site_label', key=['site.name', 'label'], unique=True)
+    indexer.add_index('number', key=lambda item: int(item['id'].split('-')[1]), unique=True)
+
+    assert sorted(indexer.ids_by('site', 'east')) == ['id-0', 'id-2']
+    assert indexer.ids_by('site', 'north') == []
+    assert indexer.find_by('site_label', ('west', 'item-1')).name == 'item-1'
+    assert indexer.find_by('site_label', ('west', 'item-0')) is None
+    assert indexer.find_by('number', 3).name == 'item-3'
+    assert sorted(item.name for item in indexer.find_by('site', 'east')) == ['item-0', 'item-2']
+
+    # the item without a site is not indexed
+    assert len(indexer.indexes['site']) == 2
+    assert len(indexer.indexes['site_label']) == 3
+
+    with pytest.raises(ValueError):
+        indexer.add_index('unique_site', key='site.name', unique=True)
+
+
+def test_secondary_indexes_refresh(server, spec):
+    server.set_items(_site_items())
+    client = Client(server.url, origin_spec=spec)
+    indexer = Indexer(client.request.resource1.list_resource1, name_from='label').run()
+    indexer.add_index('site', key='site.name')
+
+    items = _site_items()[1:]
+    items[1]['site'] = {'name': 'west'}
+    items[2]['site'] = {'name': 'east'}
+    server.set_items(items)
+    indexer.refresh()
+
+    assert sorted(indexer.ids_by('site', 'west')) == ['id-1', 'id-2']
+    assert indexer.ids_by('site', 'east') == ['id-3']
+
+
+def test_index_list_and_dict_values(server, spec):
+    items = make_items(3)
+    items[0]['tags'] = ['a', 'b']
+    items[1]['tags'] = ['a', ['b', 'c']]
+    items[2]['tags'] = {'a': 1}
+    server.set_items(items)
+
+    client = Client(server.url, origin_spec=spec)
+    indexer = Indexer(client.request.resource1.list_resource1, name_from='label')
+    indexer.add_index('tags')
+    indexer.add_index('label_tags', key=['label', 'tags'], unique=True)
+    indexer.run()
+
+    assert len(indexer) == 3
+    assert indexer.ids_by('tags', ['a', 'b']) == ['id-0']
+    assert indexer.ids_by('tags', ('a', ('b', 'c'))) == ['id-1']
+    assert indexer.find_by('label_tags', ['item-1', ['a', ['b', 'c']]]).name == 'item-1'
+
+    # the dict value is not hashable, and the item is not indexed
+    assert len(indexer.indexes['tags']) == 2
+    assert indexer.find_by('label_tags', ['item-2', {'a': 1}]) is None
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_snapshot(server, spec, tmpdir, compact):
+    server.set_items(_site_items())
+    client = Client(server.url, origin_spec=spec)
+    rqst = client.request.resource1.list_resource1
+    snapshot = str(tmpdir.join('resource1.snapshot'))
+
+    indexer = Indexer(rqst, name_from='label', compact=compact).run(limit=3)
+    indexer.save_snapshot(snapshot)
+
+    loaded = Indexer(rqst, name_from='label', compact=compact)
+    loaded.add_index('site', key='site.name')
+    assert loaded.load_snapshot(snapshot, limit=3)
+
+    assert loaded.catalog == indexer.catalog
+    assert loaded.names == indexer.names
+    assert loaded.etag == indexer.etag and loaded.run_kwargs == {'limit': 3}
+    assert sorted(loaded.ids_by('site', 'east')) == ['id-0', 'id-2']
+
+    # the loaded etag makes the refresh a conditional request
+    assert loaded.refresh() == ([], [], [], [])
+
+    assert not Indexer(rqst, name_from='label', compact=compact).load_snapshot(snapshot)
+    assert not Indexer(rqst, name_from='label', compact=compact).load_snapshot(
+        snapshot, max_age=-1, limit=3)
+    assert not Indexer(rqst, name_from='label', compact=not compact).load_snapshot(
+        snapshot, limit=3)
+
+
+def test_run_cached(server, spec, tmpdir):
+    client = Client(server.url, origin_spec=spec)
+    rqst = client.request.resource1.list_resource1
+    snapshot = str(tmpdir.join('resource1.snapshot'))
+
+    first = Indexer(rqst, name_from='label').run_cached(snapshot, max_age=60)
+    assert len(server.calls) == 1
+
+    second = Indexer(rqst, name_from='label').run_cached(snapshot, max_age=60)
+    assert len(server.calls) == 1
+    assert second.catalog == first.catalog
+
+
+def test_snapshot_key(server, spec, tmpdir):
+    client = Client(server.url, origin_spec=spec)
+    rqst = client.request.resource1.list_resource1
+    snapshot = str(tmpdir.join('resource1.snapshot'))
+
+    indexer = Indexer(rqst, name_from='label')
+    key = indexer.snapshot_key()
+    indexer.run().save_snapshot(snapshot)
+
+    # the key does not change when the items are ingested
+    assert indexer.snapshot_key() == key
+    assert Indexer(rqst, name_from='label').load_snapshot(snapshot)
+
+    assert not Indexer(rqst, name_from='prop_0').load_snapshot(snapshot)
+    assert not Indexer(rqst, name_from='label', id_from='prop_0').load_snapshot(snapshot)
+    assert not Indexer(rqst, name_from=_item_label).load_snapshot(snapshot)
+
+    other = Client('http://127.0.0.1:1', origin_spec=dict(spec, host='127.0.0.1:1'))
+    assert not Indexer(other.request.resource1.list_resource1,
+                       name_from='label').load_snapshot(snapshot)
+
+
+def _item_label(item):
+    return item['label']
+
+
+def test_snapshot_of_lambdas(server, spec, tmpdir):
+    client = Client(server.url, origin_spec=spec)
+    rqst = client.request.resource1.list_resource1
+    snapshot = str(tmpdir.join('resource1.snapshot'))
+
+    def nested_label(item):
+        return item['label']
+
+    # the lambdas, and nested functions, are not told apart by their names
+    for name_from in (lambda item: item['label'], nested_label):
+        with pytest.raises(ValueError):
+            Indexer(rqst, name_from=name_from).run_cached(snapshot)
+
+    Indexer(rqst, name_from=lambda item: item['label'],
+            snapshot_name='by-label').run().save_snapshot(snapshot)
+
+    assert Indexer(rqst, name_from=lambda item: item['label'],
+                   snapshot_name='by-label').load_snapshot(snapshot)
+    assert not Indexer(rqst, name_from=lambda item: item['id'],
+                       snapshot_name='by-id').load_snapshot(snapshot)
+
+    # a module function is keyed by its name
+    Indexer(rqst, name_from=_item_label).run().save_snapshot(snapshot)
+    assert Indexer(rqst, name_from=_item_label).load_snapshot(snapshot)
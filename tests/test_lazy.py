@@ -0,0 +1,74 @@
+from copy import deepcopy
+
+import pytest
+
+from halutz.client import Client
+from halutz.lazy import LazySpec
+
+
+def test_operations_built_on_first_use(server, spec):
+    client = Client(server.url, origin_spec=spec, lazy=True)
+    assert client.swagger_spec.operations == {}
+
+    resp, ok = client.request.resource0.get_resource0(id='id-2')
+    assert ok and resp['label'] == 'item-2'
+    assert list(client.swagger_spec.operations) == [('/api/resource0/{id}', 'get')]
+
+
+@pytest.mark.parametrize('model_response', [False, True])
+def test_lazy_same_as_eager(server, spec, model_response):
+    results = []
+    for lazy in (False, True):
+        client = Client(server.url, origin_spec=spec, lazy=lazy)
+        client.model_response = model_response
+
+        listed, ok = client.request.resource0.list_resource0(offset=1, limit=2)
+        assert ok
+
+        rqst = client.request.resource1.update_resource1
+        rqst.data.label = 'updated'
+        updated, ok = rqst(id='id-0')
+        assert ok
+
+        if model_response:
+            listed, updated = listed.as_dict(), updated.as_dict()
+        results.append((listed, updated))
+
+    assert results[0] == results[1]
+    assert results[0][1]['label'] == 'updated'
+
+
+@pytest.mark.parametrize('config', [
+    {'use_models': True},
+    {'internally_dereference_refs': True},
+    {'use_spec_url_for_base_path': True}])
+def test_lazy_spec_config(server, spec, config):
+    from bravado.client import SwaggerClient
+    from bravado.config import bravado_config_from_config_dict
+    from bravado.requests_client import RequestsClient
+    from bravado_core.spec import Spec
+
+    config = dict(config, validate_responses=False, bravado=bravado_config_from_config_dict({}))
+    spec_url = server.url + '/swagger.json'
+
+    if config.get('use_spec_url_for_base_path'):
+        # the '/api' base path is the path of the spec url
+        spec_url = server.url + '/api'
+        spec['paths'] = dict((path_name[len('/api'):], path_spec)
+                             for path_name, path_spec in spec['paths'].items())
+
+    results = []
+    for spec_type in (Spec, LazySpec):
+        swagger_spec = spec_type.from_dict(
+            deepcopy(spec), origin_url=spec_url, http_client=RequestsClient(), config=config)
+        resource0 = SwaggerClient(swagger_spec).resource0
+
+        item = resource0.get_resource0(id='id-1').response().result
+        listed = resource0.list_resource0(limit=2).response().result
+        if config.get('use_models'):
+            item, listed = item._as_dict(), listed._as_dict()
+
+        results.append((swagger_spec.api_url, sorted(swagger_spec.definitions), item, listed))
+
+    assert results[0] == results[1]
+    assert results[0][2]['label'] == 'item-1'
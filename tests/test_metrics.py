@@ -0,0 +1,64 @@
+from halutz.client import Client
+from halutz.metrics import Metrics, Histogram, RequestEvent
+
+
+def test_histogram():
+    histogram = Histogram((1, 2, 5))
+    for value in (0.5, 1, 1.5, 3, 10):
+        histogram.observe(value)
+
+    assert histogram.cumulative() == [(1, 2), (2, 3), (5, 4), ('+Inf', 5)]
+    assert histogram.quantile(0.5) == 2
+    assert histogram.quantile(0.99) == '+Inf'
+    assert histogram.as_dict()['mean'] == 16.0 / 5
+    assert Histogram((1,)).quantile(0.5) is None
+
+
+def test_request_metrics(server, spec):
+    events = []
+    client = Client(server.url, origin_spec=spec, metrics=True)
+    client.hooks.append(events.append)
+    rqst = client.request.resource1.get_resource1
+
+    http_resp = rqst.invoke(id='id-0')[2]
+    assert not rqst(id='missing')[1]
+
+    ok_event, failed_event = events
+    assert (ok_event.operation_id, ok_event.method, ok_event.status_code) == (
+        'get_resource1', 'get', 200)
+    assert ok_event.ok and ok_event.error is None
+    assert set(ok_event.phases) >= {'marshal', 'http', 'unmarshal', 'total'}
+    assert ok_event.response_bytes == len(http_resp.raw_bytes)
+    assert (failed_event.ok, failed_event.status_code, failed_event.error) == (
+        False, 404, 'http_404')
+
+    metrics = client.metrics.as_dict()['get_resource1']
+    assert metrics['statuses'] == {'200': 1, '404': 1}
+    assert metrics['errors'] == {'http_404': 1}
+    assert metrics['latency']['total']['count'] == 2
+
+    client.metrics.reset()
+    assert client.metrics.as_dict() == {}
+
+
+def test_prometheus():
+    metrics = Metrics(buckets=(0.1, 1), size_buckets=(100,), prefix='test')
+    metrics(_event(status_code=200, total=0.05))
+    metrics(_event(status_code=500, total=2, error='http_500', retries=('http_503',)))
+
+    lines = metrics.prometheus().splitlines()
+    assert '# TYPE test_request_seconds histogram' in lines
+    assert 'test_request_seconds_bucket{le="0.1",operation="op",phase="total"} 1' in lines
+    assert 'test_request_seconds_bucket{le="+Inf",operation="op",phase="total"} 2' in lines
+    assert 'test_request_seconds_count{operation="op",phase="total"} 2' in lines
+    assert 'test_payload_bytes_bucket{direction="response",le="100",operation="op"} 2' in lines
+    assert 'test_requests_total{operation="op",status="500"} 1' in lines
+    assert 'test_request_errors_total{error="http_500",operation="op"} 1' in lines
+    assert 'test_request_retries_total{operation="op",reason="http_503"} 1' in lines
+
+
+def _event(status_code, total, error=None, retries=()):
+    return RequestEvent(
+        operation_id='op', method='GET', path='/op', status_code=status_code,
+        ok=error is None, phases={'total': total}, request_bytes=0,
+        response_bytes=10, error=error, retries=retries)
@@ -0,0 +1,111 @@
+import pytest
+
+from halutz.client import Client
+
+
+def _versions_spec(spec):
+    # a path with an integer path param, and a templated segment with a suffix
+    spec['paths']['/api/resource1/{id}/versions/{version}'] = {'get': {
+        'operationId': 'get_resource1_version', 'tags': ['resource1'],
+        'parameters': [{'name': 'id', 'in': 'path', 'type': 'string', 'required': True},
+                       {'name': 'version', 'in': 'path', 'type': 'integer', 'required': True}],
+        'responses': {'200': {'description': 'ok'}}}}
+    spec['paths']['/api/resource1/{id}.json'] = {'get': {
+        'operationId': 'get_resource1_json', 'tags': ['resource1'],
+        'parameters': [{'name': 'id', 'in': 'path', 'type': 'string', 'required': True}],
+        'responses': {'200': {'description': 'ok'}}}}
+    return spec
+
+
+def test_get_and_methods(server, spec):
+    operations = Client(server.url, origin_spec=spec).operations
+
+    assert operations.get('GET', '/api/resource0/{id}').operation_id == 'get_resource0'
+    assert operations.get('post', '/api/resource0/{id}') is None
+    assert sorted(operations.methods('/api/resource0/{id}')) == ['delete', 'get', 'put']
+    assert operations.methods('/api/missing') is None
+
+
+def test_match(server, spec):
+    operations = Client(server.url, origin_spec=_versions_spec(spec)).operations
+
+    found = operations.match('get', server.url + '/api/resource1/a%20b/versions/3?x=1')
+    assert found.operation.operation_id == 'get_resource1_version'
+    assert found.params == {'id': 'a b', 'version': 3}
+
+    found = operations.match('get', '/api/resource1/abc.json')
+    assert (found.operation.operation_id, found.params) == ('get_resource1_json', {'id': 'abc'})
+
+    assert operations.match('get', '/api/resource1/abc').params == {'id': 'abc'}
+    assert operations.match('get', '/api/resource1/abc/other') is None
+    assert operations.match_path('/api/resource1/abc/versions/x') == (
+        '/api/resource1/{id}/versions/{version}', {'id': 'abc', 'version': 'x'})
+    assert operations.match_path('/api/missing') == (None, None)
+
+
+def test_base_path(server, spec):
+    spec['basePath'] = '/v1'
+    operations = Client(server.url, origin_spec=spec).operations
+
+    assert operations.get('get', '/v1/api/resource0/{id}').operation_id == 'get_resource0'
+    assert operations.match('get', '/v1/api/resource0/abc').params == {'id': 'abc'}
+    assert sorted(operations.methods('/v1/api/resource0')) == ['get', 'post']
+
+
+def test_match_request(server, spec):
+    client = Client(server.url, origin_spec=spec, lazy=True)
+
+    rqst, params = client.match_request('get', '/api/resource1/id-1')
+    resp, ok = rqst(**params)
+    assert ok and resp['label'] == 'item-1'
+
+    # only the matched operation is built
+    assert list(client.swagger_spec.operations) == [('/api/resource1/{id}', 'get')]
+
+    with pytest.raises(RuntimeError):
+        client.match_request('patch', '/api/resource1/id-1')
+
+
+def test_command_and_path_requests(server, spec):
+    client = Client(server.url, origin_spec=spec)
+
+    resp, ok = client.command_request('get', '/api/resource1/{id}')(id='id-2')
+    assert ok and resp['label'] == 'item-2'
+
+    resource = client.path_requests('/api/resource1/{id}')
+    assert resource.get(id='id-0')[0]['label'] == 'item-0'
+
+    with pytest.raises(RuntimeError):
+        client.command_request('get', '/api/missing')
+    with pytest.raises(RuntimeError):
+        client.path_requests('/api/missing')
+
+
+def _search_client(server, spec):
+    # a POST-only literal path, beside the templated /api/resource0/{id}
+    spec['paths']['/api/resource0/search'] = {'post': {
+        'operationId': 'search_resource0', 'tags': ['resource0'],
+        'responses': {'200': {'description': 'ok'}}}}
+    return Client(server.url, origin_spec=spec)
+
+
+def test_match_falls_back_to_template(server, spec):
+    operations = _search_client(server, spec).operations
+
+    found = operations.match('post', '/api/resource0/search')
+    assert found.operation.operation_id == 'search_resource0'
+    assert found.params == {}
+
+    found = operations.match('GET', server.url + '/api/resource0/search')
+    assert found.operation.operation_id == 'get_resource0'
+    assert found.params == {'id': 'search'}
+
+    assert operations.match('delete', '/api/resource0/search').params == {'id': 'search'}
+    assert operations.match('patch', '/api/resource0/search') is None
+
+
+def test_match_path_prefers_literal(server, spec):
+    operations = _search_client(server, spec).operations
+
+    assert operations.match_path('/api/resource0/search') == ('/api/resource0/search', {})
+    assert operations.match_path('/api/resource0/abc') == ('/api/resource0/{id}', {'id': 'abc'})
@@ -0,0 +1,107 @@
+import pytest
+
+from halutz.client import Client
+from halutz.indexer import Indexer
+from halutz.paging import (
+    OffsetPaging, PageNumberPaging, TokenPaging, PagingError, detect_paging)
+
+from .mock_server import make_items
+
+
+def _list_request(spec, *params):
+    """ the list_resource1 request, with its query `params` replaced """
+    if params:
+        spec['paths']['/api/resource1']['get']['parameters'] = [
+            {'name': name, 'in': 'query', 'type': 'string' if name == 'cursor' else 'integer'}
+            for name in params]
+    return Client(spec['x-server-url'], origin_spec=spec).request.resource1.list_resource1
+
+
+@pytest.fixture
+def list_spec(server, spec):
+    server.set_items(make_items(5))
+    spec['x-server-url'] = server.url
+    return spec
+
+
+def _labels(pages):
+    return sorted(item['label'] for page in pages for item in page.items)
+
+
+def test_offset_pages_concurrent(server, list_spec):
+    rqst = _list_request(list_spec)
+    assert isinstance(detect_paging(rqst), OffsetPaging)
+
+    pages = list(rqst.paginate(paging=OffsetPaging(page_size=2)))
+    assert _labels(pages) == ['item-%d' % i for i in range(5)]
+
+    # the pages after the first are addressed from its count, and fetched
+    # concurrently, without their http response.
+    assert pages[0].http_resp is not None
+    assert [page.http_resp for page in pages[1:]] == [None, None]
+    assert sorted(call.query['offset'] for call in server.calls) == [['0'], ['2'], ['4']]
+
+
+def test_offset_pages_without_count(server, list_spec):
+    rqst = _list_request(list_spec)
+    pages = list(rqst.paginate(paging=OffsetPaging(count=None, page_size=2)))
+    assert [page.params['offset'] for page in pages] == [0, 2, 4]
+    assert [len(page.items) for page in pages] == [2, 2, 1]
+    assert all(page.http_resp is not None for page in pages)
+
+
+def test_page_number_pages(server, list_spec):
+    rqst = _list_request(list_spec, 'page', 'page_size')
+    paging = detect_paging(rqst)
+    assert isinstance(paging, PageNumberPaging)
+    assert paging.page_size_param == 'page_size'
+
+    pages = list(rqst.paginate(page_size=2))
+    assert _labels(pages) == ['item-%d' % i for i in range(5)]
+    assert sorted(page.params['page'] for page in pages) == [1, 2, 3]
+
+    pages = list(rqst.paginate(paging=PageNumberPaging(count=None), page_size=2))
+    assert [page.params['page'] for page in pages] == [1, 2, 3]
+
+
+def test_cursor_pages(server, list_spec):
+    server.paging = 'cursor'
+    rqst = _list_request(list_spec, 'cursor', 'limit')
+    paging = detect_paging(rqst)
+    assert isinstance(paging, TokenPaging) and paging.token == 'cursor'
+
+    pages = list(rqst.paginate(limit=2))
+    assert [page.params.get('cursor') for page in pages] == [None, '2', '4']
+    assert [item['label'] for page in pages for item in page.items] == [
+        'item-%d' % i for i in range(5)]
+
+
+def test_page_error(server, list_spec):
+    rqst = _list_request(list_spec)
+    server.queue('/api/resource1', (404, {}, {'error': 'not found'}))
+    with pytest.raises(PagingError):
+        list(rqst.paginate())
+
+
+def test_indexer_paging(server, list_spec):
+    rqst = _list_request(list_spec)
+    indexer = Indexer(rqst, name_from='label', paging=OffsetPaging(page_size=2)).run()
+    assert sorted(indexer.names) == ['item-%d' % i for i in range(5)]
+    assert len(server.calls) == 3
+
+    indexer = Indexer(rqst, name_from='label', paging=True).run()
+    assert isinstance(indexer.paging, OffsetPaging)
+    assert indexer.catalog == Indexer(rqst, name_from='label').run().catalog
+
+
+@pytest.mark.parametrize('paging', [
+    OffsetPaging(count=None, page_size=2),
+    PageNumberPaging(count=None, page_size=2)])
+def test_page_without_items(server, list_spec, paging):
+    # a page whose items are null, or missing, is an empty final page
+    rqst = _list_request(list_spec, 'offset', 'limit', 'page', 'page_size')
+    server.queue('/api/resource1', (200, {}, {'items': None}), (200, {}, {}))
+
+    for _ in range(2):
+        pages = list(rqst.paginate(paging=paging))
+        assert [page.items for page in pages] == [None]
@@ -0,0 +1,108 @@
+import time
+import threading
+
+from halutz.client import Client
+from halutz.indexer import Indexer
+from halutz.ratelimit import (
+    RateLimiter, TokenBucket, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND)
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=10, burst=2)
+    now = bucket.updated
+
+    for _ in range(2):
+        assert bucket.wait_time(now) == 0
+        bucket.take()
+
+    assert abs(bucket.wait_time(now) - 0.1) < 1e-9
+    assert bucket.wait_time(now + 0.1) == 0
+
+    # the tokens are refilled up to the burst
+    assert bucket.wait_time(now + 60) == 0 and bucket.tokens == 2
+
+
+def test_host_and_operation_limits(server, spec):
+    limiter = RateLimiter(rate=100, burst=1, operations={'get_resource1': (10, 1)})
+    client = Client(server.url, origin_spec=spec, rate_limit=limiter, metrics=True)
+    get_item = client.request.resource1.get_resource1
+
+    start = time.time()
+    results = get_item.map([{'id': 'id-0'}] * 4, max_workers=4)
+    assert all(result.ok for result in results)
+    assert time.time() - start >= 0.25
+
+    host = server.url.partition('://')[-1]
+    assert set(limiter.tokens()) == {('host', host), ('operation', 'get_resource1')}
+    assert client.metrics.as_dict()['get_resource1']['latency']['queue']['count'] == 4
+
+    # the other operations only have the host limit
+    start = time.time()
+    for _ in range(3):
+        client.request.resource1.list_resource1()
+    assert time.time() - start < 0.25
+
+
+def test_priority(server, spec):
+    limiter = RateLimiter(rate=20, burst=1)
+    client = Client(server.url, origin_spec=spec, rate_limit=limiter)
+    rqst = client.request.resource1.list_resource1
+    background = rqst.with_priority(PRIORITY_BACKGROUND)
+
+    assert (rqst.priority, background.priority) == (PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND)
+    assert background.operation is rqst.operation
+
+    order = []
+
+    def call(request, name):
+        request()
+        order.append(name)
+
+    # the burst is used, so the background calls wait for their tokens
+    rqst()
+    threads = [threading.Thread(target=call, args=(background, 'background'))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while limiter.waiting() < 4:
+        time.sleep(0.001)
+
+    interactive = threading.Thread(target=call, args=(rqst, 'interactive'))
+    interactive.start()
+    for thread in threads + [interactive]:
+        thread.join()
+
+    assert order.index('interactive') <= 1
+
+
+def test_indexer_priority(server, spec):
+    client = Client(server.url, origin_spec=spec, rate_limit=RateLimiter(rate=100))
+    indexer = Indexer(client.request.resource1.list_resource1, name_from='label')
+
+    assert indexer.priority == PRIORITY_BACKGROUND
+    assert sorted(indexer.run().names) == ['item-0', 'item-1', 'item-2']
+
+
+def test_indexer_fetch_uses_current_request(server, spec, monkeypatch):
+    from halutz.request import Request
+
+    client = Client(server.url, origin_spec=spec)
+    rqst = client.request.resource1.list_resource1
+    indexer = Indexer(rqst, name_from='label')
+
+    # a request setting made after the indexer is created is used
+    rqst.model_response = 'view'
+
+    calls = []
+    invoke = Request.invoke
+
+    def record(each_rqst, **params):
+        calls.append((each_rqst.priority, each_rqst.model_response))
+        return invoke(each_rqst, **params)
+
+    monkeypatch.setattr(Request, 'invoke', record)
+    indexer.run()
+
+    assert calls == [(PRIORITY_BACKGROUND, 'view')]
+    assert rqst.priority == PRIORITY_INTERACTIVE
+    assert len(indexer) == 3
@@ -0,0 +1,55 @@
+import pickle
+
+import pytest
+
+from halutz.client import Client
+from halutz.indexer import Indexer
+from halutz.records import RecordLayout, CompactRecord
+
+from .mock_server import make_items
+
+
+def test_record_mapping():
+    layout = RecordLayout(['id', 'label', 'site'])
+    item = {'id': 'a', 'label': 'A', 'extra': {'nested': [1]}}
+    record = layout.record(item)
+
+    assert isinstance(record, CompactRecord)
+    assert record == item and record.for_json() == item
+    assert dict(record) == item and len(record) == 3
+    assert record['extra'] == {'nested': [1]}
+    assert 'site' not in record and record.get('site') is None
+
+    with pytest.raises(KeyError):
+        record['site']
+
+    assert record != dict(item, label='B')
+    assert pickle.loads(pickle.dumps(record)) == record
+
+
+def test_compact_indexer(server, spec):
+    items = make_items(3)
+    items[2]['not_in_schema'] = 'extra'
+    server.set_items(items)
+
+    client = Client(server.url, origin_spec=spec)
+    rqst = client.request.resource1.list_resource1
+    compact = Indexer(rqst, name_from='label', compact=True).run()
+    loaded = Indexer(rqst, name_from='label').run()
+
+    assert all(isinstance(value, CompactRecord) for value in compact.catalog.values())
+    assert compact.catalog == loaded.catalog
+    assert compact['item-2'].value['not_in_schema'] == 'extra'
+    assert compact['item-1'] is compact['item-1']
+
+    compact.add_index('prop_0')
+    assert sorted(compact.ids_by('prop_0', '0')) == ['id-0', 'id-1', 'id-2']
+
+    changed = make_items(3)
+    changed[1]['label'] = 'renamed'
+    server.set_items(changed)
+    changes = compact.refresh()
+
+    assert changes.renamed == ['id-1'] and changes.changed == ['id-1', 'id-2']
+    assert compact['renamed'].value['label'] == 'renamed'
+    assert isinstance(compact['renamed'].value, CompactRecord)
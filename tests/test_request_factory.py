@@ -0,0 +1,46 @@
+import pytest
+
+from halutz.client import Client
+
+
+def test_cached_templates(server, spec):
+    client = Client(server.url, origin_spec=spec)
+    client.cache_requests = True
+
+    first = client.request.resource1.update_resource1
+    second = client.request.resource1.update_resource1
+
+    assert first is not second
+    assert first.template is second.template
+
+    # each request has its own body, built on first use
+    assert 'data' not in vars(first)
+    first.data.label = 'first'
+    second.data.label = 'second'
+    assert first(id='id-0')[0]['label'] == 'first'
+    assert second(id='id-0')[0]['label'] == 'second'
+
+
+def test_command_request_templates(server, spec):
+    client = Client(server.url, origin_spec=spec)
+    client.cache_requests = True
+
+    first = client.command_request('GET', '/api/resource1/{id}')
+    second = client.command_request('get', '/api/resource1/{id}')
+    assert first.template is second.template
+    assert second(id='id-1')[0]['label'] == 'item-1'
+
+    with pytest.raises(RuntimeError):
+        client.command_request('get', '/api/missing')
+
+
+def test_not_cached_by_default(server, spec):
+    client = Client(server.url, origin_spec=spec)
+
+    first = client.request.resource1.update_resource1
+    second = client.request.resource1.update_resource1
+    assert first.template is not second.template
+    assert first.template.body_param == 'data'
+
+    with pytest.raises(AttributeError):
+        first.not_an_attribute
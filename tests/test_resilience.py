@@ -0,0 +1,207 @@
+import time
+from collections import namedtuple
+
+import pytest
+from bravado.exception import HTTPBadGateway, HTTPServiceUnavailable
+from bravado_core.exception import SwaggerMappingError
+
+from halutz.client import Client
+from halutz.aio import AsyncClient
+from halutz.resilience import Resilience, RetryPolicy, CircuitBreaker, CircuitOpenError
+
+ERROR = {'error': 'unavailable'}
+
+FakeResponse = namedtuple('FakeResponse', 'status_code headers')
+
+
+def _client(server, spec, **options):
+    resilience = Resilience(**dict(dict(retry=RetryPolicy(backoff=0.001)), **options))
+    return Client(server.url, origin_spec=spec, resilience=resilience, metrics=True)
+
+
+def test_retried(server, spec):
+    client = _client(server, spec)
+    rqst = client.request.resource1.get_resource1
+
+    server.queue('/api/resource1/id-0', (503, {}, ERROR), (429, {'Retry-After': '0'}, ERROR))
+    resp, ok = rqst(id='id-0')
+
+    assert ok and resp['label'] == 'item-0'
+    assert len(server.calls) == 3
+    assert client.metrics.as_dict()['get_resource1']['retries'] == {
+        'HTTPServiceUnavailable': 1, 'http_429': 1}
+
+
+def test_retries_exhausted(server, spec):
+    client = _client(server, spec, retry=RetryPolicy(retries=1, backoff=0.001))
+    server.queue('/api/resource1/id-0', *[(502, {}, ERROR)] * 2)
+
+    with pytest.raises(HTTPBadGateway):
+        client.request.resource1.get_resource1(id='id-0')
+    assert len(server.calls) == 2
+
+
+def test_not_idempotent(server, spec):
+    rqst = _client(server, spec).request.resource1.create_resource1
+    rqst.data.label = 'created'
+    assert not rqst.idempotent
+
+    # a 502 could have been processed by the server; a 503 was not
+    server.queue('/api/resource1', (502, {}, ERROR))
+    with pytest.raises(HTTPBadGateway):
+        rqst()
+
+    server.queue('/api/resource1', (503, {}, ERROR))
+    assert rqst()[1]
+    assert len(server.calls) == 3
+
+
+def test_circuit_breaker(server, spec):
+    client = _client(server, spec, retry=None, failures=2, reset_timeout=0.05)
+    rqst = client.request.resource1.get_resource1
+    host = server.url.partition('://')[-1]
+
+    server.queue('/api/resource1/id-0', *[(503, {}, ERROR)] * 2)
+    for _ in range(2):
+        with pytest.raises(HTTPServiceUnavailable):
+            rqst(id='id-0')
+
+    assert client.resilience.circuits()[host].state == 'open'
+    with pytest.raises(CircuitOpenError):
+        rqst(id='id-0')
+    assert len(server.calls) == 2
+
+    # after the reset timeout, the trial call closes the circuit
+    time.sleep(0.06)
+    assert rqst(id='id-0')[1]
+    assert client.resilience.circuits()[host][:2] == ('closed', 0)
+
+
+def test_half_open_trial():
+    breaker = CircuitBreaker('host', failures=1, reset_timeout=0.01)
+    breaker.failure()
+    assert breaker.info().trips == 1
+
+    time.sleep(0.02)
+    breaker.before()
+    with pytest.raises(CircuitOpenError):
+        breaker.before()
+
+    breaker.failure()
+    info = breaker.info()
+    assert (info.state, info.trips) == ('open', 2)
+
+
+def test_timeouts(server, spec):
+    resilience = Resilience(timeout=5, timeouts={'list_resource1': 30})
+    client = Client(server.url, origin_spec=spec, resilience=resilience)
+
+    assert resilience._with_timeout(client.request.resource1.get_resource1, {}) == {
+        '_request_options': {'timeout': 5}}
+    assert resilience._with_timeout(client.request.resource1.list_resource1, {}) == {
+        '_request_options': {'timeout': 30}}
+    assert resilience._with_timeout(client.request.resource1.list_resource1, {
+        '_request_options': {'timeout': 1}}) == {'_request_options': {'timeout': 1}}
+
+
+def test_retry_policy():
+    policy = RetryPolicy(backoff=1, max_backoff=3, max_retry_after=10)
+
+    assert all(0 <= policy.delay(5) <= 3 for _ in range(20))
+    assert policy.delay(0, retry_after=5) == 5
+    assert policy.delay(0, retry_after=20) is None
+
+    class Response(object):
+        headers = {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+
+    assert policy.retry_after(Response) == 0.0
+    Response.headers = {'Retry-After': '7'}
+    assert policy.retry_after(Response) == 7.0
+
+
+@pytest.fixture
+def rqst(spec):
+    client = Client('http://127.0.0.1:1', origin_spec=dict(spec, host='127.0.0.1:1'))
+    return client.request.resource0.get_resource0
+
+
+def responses(*status_codes):
+    """ a `send` function returning a response of each status code in turn """
+    sent = []
+
+    def send(params):
+        status_code = status_codes[len(sent)]
+        sent.append(params)
+        return None, status_code < 400, FakeResponse(status_code, {})
+
+    return send, sent
+
+
+def test_retry_statuses(rqst):
+    resilience = Resilience(retry=RetryPolicy(backoff=0.001), failures=None)
+
+    send, sent = responses(503, 502, 200)
+    assert resilience.send(rqst, {}, send)[1]
+    assert len(sent) == 3
+
+    # a 500 is not a retry status
+    send, sent = responses(500, 200)
+    assert not resilience.send(rqst, {}, send)[1]
+    assert len(sent) == 1
+
+
+def test_failures_without_retry_policy(rqst):
+    resilience = Resilience(retry=None, failures=2)
+    for _ in range(2):
+        resilience.send(rqst, {}, responses(503)[0])
+
+    assert resilience.circuits()[rqst.host].state == 'open'
+
+
+def test_throttled_not_failures(rqst):
+    resilience = Resilience(retry=RetryPolicy(retries=3), failures=2)
+    sent = []
+
+    def send(params):
+        sent.append(params)
+        if len(sent) <= 3:
+            return ERROR, False, FakeResponse(429, {'Retry-After': '0'})
+        return None, True, FakeResponse(200, {})
+
+    # the throttled calls are retried after their Retry-After delay, and
+    # do not open the circuit
+    assert resilience.send(rqst, {}, send)[1]
+    assert len(sent) == 4
+    assert resilience.circuits()[rqst.host].state == 'closed'
+
+    resilience = Resilience(retry=None, failures=2)
+    for _ in range(3):
+        resilience.send(rqst, {}, responses(429)[0])
+    assert resilience.circuits()[rqst.host].failures == 0
+
+
+def test_trial_call_released_on_error(rqst):
+    resilience = Resilience(retry=None, failures=1, reset_timeout=0.05)
+    send, _ = responses(503)
+    resilience.send(rqst, {}, send)
+
+    with pytest.raises(CircuitOpenError):
+        resilience.send(rqst, {}, responses(200)[0])
+
+    time.sleep(0.06)
+
+    def bad_params(params):
+        raise SwaggerMappingError('id is a required parameter')
+
+    with pytest.raises(SwaggerMappingError):
+        resilience.send(rqst, {}, bad_params)
+
+    # the next call is the trial, and closes the circuit
+    assert resilience.send(rqst, {}, responses(200)[0])[1]
+    assert resilience.circuits()[rqst.host].state == 'closed'
+
+
+@pytest.mark.parametrize('option', AsyncClient.UNSUPPORTED)
+def test_async_client_unsupported(spec, option):
+    with pytest.raises(ValueError):
+        AsyncClient('http://127.0.0.1:1', origin_spec=spec, **{option: True})
@@ -0,0 +1,167 @@
+import time
+import datetime
+
+from halutz.client import Client
+from halutz.response_cache import ResponseCache, DiskBackend, CacheEntry
+
+from .mock_server import make_items
+
+
+def _client(server, spec, cache):
+    return Client(server.url, origin_spec=spec, response_cache=cache)
+
+
+def test_hit_and_miss(server, spec):
+    cache = ResponseCache()
+    rqst = _client(server, spec, cache).request.resource1.list_resource1
+
+    miss, ok = rqst()
+    hit, hit_ok = rqst()
+    assert ok and hit_ok
+    assert hit == miss
+    assert len(server.calls) == 1
+    assert cache.cache_info()[:3] == (1, 1, 0)
+
+    # a hit is decoded for each call; the callers do not share the data
+    hit['items'].pop()
+    assert rqst()[0] == miss
+
+    # other params are another response
+    rqst(offset=1)
+    assert len(server.calls) == 2
+
+
+def test_revalidated_when_expired(server, spec):
+    cache = ResponseCache(ttl=0.01)
+    rqst = _client(server, spec, cache).request.resource1.list_resource1
+
+    first, ok, http_resp = rqst.invoke()
+    etag = http_resp.headers['ETag']
+    time.sleep(0.02)
+
+    # the expired response is revalidated, and the 304 is a hit
+    resp, ok, http_resp = rqst.invoke()
+    assert ok and resp == first
+    assert server.calls[-1].headers['If-None-Match'] == etag
+    assert cache.cache_info().revalidated == 1
+
+
+def test_ttls(server, spec):
+    cache = ResponseCache(ttls={'list_resource1': 0})
+    client = _client(server, spec, cache)
+
+    client.request.resource1.list_resource1()
+    client.request.resource1.list_resource1()
+    assert len(server.calls) == 2
+
+    assert not cache.cacheable(client.request.resource1.list_resource1, {})
+    assert cache.cacheable(client.request.resource0.list_resource0, {})
+    assert not cache.cacheable(client.request.resource0.list_resource0, {
+        '_request_options': {'headers': {'If-None-Match': '"etag"'}}})
+
+
+def test_invalidated_by_write(server, spec):
+    cache = ResponseCache()
+    client = _client(server, spec, cache)
+    listing = client.request.resource1.list_resource1
+    listing()
+
+    create = client.request.resource1.create_resource1
+    create.data.label = 'created'
+    resp, ok = create()
+    assert ok
+    assert cache.cache_info().invalidated == 1
+
+    listing()
+    assert [call.method for call in server.calls] == ['GET', 'POST', 'GET']
+
+
+def test_write_invalidates_resolved_path(server, spec):
+    cache = ResponseCache()
+    client = _client(server, spec, cache)
+    get = client.request.resource1.get_resource1
+    listing = client.request.resource1.list_resource1
+    for item_id in ('id-1', 'id-2'):
+        get(id=item_id)
+    listing()
+
+    update = client.request.resource1.update_resource1
+    update.data.label = 'updated'
+    assert update(id='id-1')[1]
+
+    # the written item and its collection; not the other items
+    assert cache.cache_info().invalidated == 2
+    get(id='id-2')
+    get(id='id-1')
+    listing()
+    assert [(call.method, call.path) for call in server.calls[3:]] == [
+        ('PUT', '/api/resource1/id-1'), ('GET', '/api/resource1/id-1'),
+        ('GET', '/api/resource1')]
+
+
+def _dated_items(server):
+    items = make_items(3)
+    for item in items:
+        item['created'] = '2020-01-02T03:04:05Z'
+        del item['prop_0']
+    server.set_items(items)
+
+
+def test_hit_is_unmarshalled_as_miss(server, spec):
+    _dated_items(server)
+    cache = ResponseCache()
+    rqst = _client(server, spec, cache).request.resource0.list_resource0
+
+    miss, ok = rqst()
+    hit, hit_ok = rqst()
+
+    assert ok and hit_ok
+    assert cache.cache_info().hits == 1
+    assert hit == miss
+    assert isinstance(hit['items'][0]['created'], datetime.datetime)
+    assert 'prop_0' in hit['items'][0] and hit['items'][0]['prop_0'] is None
+
+
+def test_key_has_server_url(server, spec, tmpdir):
+    backend = DiskBackend(str(tmpdir))
+    cache = ResponseCache(backend)
+    assert cache.backend is backend
+
+    _client(server, spec, cache).request.resource0.list_resource0()
+
+    other_spec = dict(spec, host='127.0.0.1:1')
+    other = Client('http://127.0.0.1:1', origin_spec=other_spec,
+                   response_cache=ResponseCache(backend))
+    rqst = other.request.resource0.list_resource0
+
+    assert backend.get(ResponseCache.key(rqst, {})) is None
+    assert len(backend) == 1
+
+
+def test_disk_backend(tmpdir):
+    backend = DiskBackend(str(tmpdir), maxsize=2)
+
+    def entry(entry_path):
+        return CacheEntry(entry_path, 200, {'etag': '"1"'}, b'{}', time.time() + 60)
+
+    backend.put(('/api/a', '{}'), entry('/api/a'))
+    time.sleep(0.01)
+    backend.put(('/api/a/1', '{"id": 1}'), entry('/api/a/1'))
+    time.sleep(0.01)
+    assert backend.get(('/api/a', '{}')).path == '/api/a'
+    assert backend.get(('/api/b', '{}')) is None
+
+    # the least recently used file is removed over the maxsize
+    time.sleep(0.01)
+    backend.put(('/api/b', '{}'), entry('/api/b'))
+    assert len(backend) == 2
+    assert backend.get(('/api/a/1', '{"id": 1}')) is None
+
+    backend.put(('/api/b/2', '{"id": 2}'), entry('/api/b/2'))
+    assert backend.invalidate('/api/b', exact=True) == 1
+    assert backend.get(('/api/b/2', '{"id": 2}')).path == '/api/b/2'
+    assert backend.invalidate('/api/b') == 1
+
+    backend.put(('/api/c', '{}'), entry('/api/c'))
+    assert backend.invalidate() == 1
+    assert len(backend) == 0
@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+
+from halutz.client import Client
+from halutz.singleflight import SingleFlight
+
+from .mock_server import make_items
+
+
+def _wait_for(condition):
+    for _ in range(500):
+        if condition():
+            return
+        threading.Event().wait(0.01)
+
+
+def test_do():
+    flight = SingleFlight()
+    assert flight.do('key', lambda: 1) == (1, False)
+
+    with pytest.raises(ValueError):
+        flight.do('key', lambda: int('x'))
+
+    assert flight.info() == (2, 0, 0)
+
+
+def _concurrent_calls(rqst, count=3):
+    """ returns the results of `count` concurrent calls of `rqst`, sharing one http call """
+    flight = rqst.client.single_flight
+
+    # the leader is held in the http call until the followers are waiting
+    release = threading.Event()
+    send_request = rqst._send_request
+
+    def held_send(params):
+        release.wait(5)
+        return send_request(params)
+
+    rqst._send_request = held_send
+
+    results = [None] * count
+
+    def call(index):
+        results[index] = rqst()
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+
+    _wait_for(lambda: flight.info().shared == count - 1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    return results
+
+
+def test_concurrent_calls_shared(server, spec):
+    client = Client(server.url, origin_spec=spec, single_flight=True)
+    results = _concurrent_calls(client.request.resource1.list_resource1)
+
+    assert len(server.calls) == 1
+    assert client.single_flight.info() == (1, 2, 0)
+    assert all(ok for resp, ok in results)
+
+    # each caller has its own copy of the response data
+    assert results[0][0] == results[1][0] == results[2][0]
+    assert results[0][0]['items'] is not results[1][0]['items']
+
+
+def test_followers_get_leader_data(server, spec):
+    items = make_items(3)
+    for item in items:
+        del item['prop_0']
+    server.set_items(items)
+
+    client = Client(server.url, origin_spec=spec, single_flight=True)
+    results = _concurrent_calls(client.request.resource0.list_resource0)
+
+    # the followers data is unmarshalled as the leader's: the missing
+    # property is None for all.
+    first_items = [resp['items'][0] for resp, ok in results]
+    assert [item.get('prop_0', 'ABSENT') for item in first_items] == [None, None, None]
+    assert first_items[0] is not first_items[1]
+
+
+def test_writes_not_shared(server, spec):
+    client = Client(server.url, origin_spec=spec, single_flight=True)
+    rqst = client.request.resource1.update_resource1
+    rqst.data.label = 'updated'
+
+    rqst(id='id-0')
+    rqst(id='id-0')
+    assert len(server.calls) == 2
+    assert client.single_flight.info().calls == 0
+
+
+def test_key_has_server_url(server, spec):
+    flight = SingleFlight()
+    clients = [Client(server_url, origin_spec=spec, single_flight=flight)
+               for server_url in (server.url, server.url.replace('127.0.0.1', 'localhost'))]
+    keys = [flight.key(client.request.resource1.list_resource1, {}) for client in clients]
+
+    # the same request of the clients of two servers is not shared
+    assert keys[0] != keys[1]
+    assert keys[0] == flight.key(clients[0].request.resource1.list_resource1, {})
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from halutz.client import Client
+from halutz.artifacts import SpecCache, dump_artifact, load_artifact
+
+
+def test_second_client_uses_cached_spec(server, spec, tmpdir, monkeypatch):
+    cache_dir = str(tmpdir.join('specs'))
+    client = Client(server.url, origin_spec=spec, spec_cache=cache_dir)
+    assert len(tmpdir.join('specs').listdir()) == 1
+
+    def not_built(self):
+        raise AssertionError('the cached spec is not used')
+
+    monkeypatch.setattr(Client, 'make_swagger_spec', not_built)
+    cached = Client(server.url, origin_spec=spec, spec_cache=cache_dir)
+
+    assert cached.origin_spec == client.origin_spec
+    assert cached.swagger_spec.http_client is not None
+    resp, ok = cached.request.resource0.get_resource0(id='id-1')
+    assert ok and resp['label'] == 'item-1'
+
+
+def test_spec_file_key(server, spec, tmpdir):
+    spec_file = tmpdir.join('spec.json')
+    spec_file.write(json.dumps(spec))
+    spec_cache = SpecCache(str(tmpdir.join('specs')))
+
+    Client(server.url, spec_file=str(spec_file), spec_cache=spec_cache)
+    key = spec_cache.file_key(str(spec_file))
+    assert spec_cache.load(key) is not None
+
+    # a changed file has another key
+    spec_file.write(json.dumps(dict(spec, info={'title': 'changed', 'version': '2'})))
+    assert spec_cache.file_key(str(spec_file)) != key
+
+
+def test_artifact_kind_and_key(tmpdir):
+    filepath = str(tmpdir.join('artifact'))
+    dump_artifact(filepath, kind='test', key='abc', payload={'a': 1}, note='x')
+
+    header, payload = load_artifact(filepath, kind='test', key='abc')
+    assert payload == {'a': 1} and header['note'] == 'x'
+
+    assert load_artifact(filepath, kind='other') == (None, None)
+    assert load_artifact(filepath, kind='test', key='xyz') == (None, None)
+    assert load_artifact(str(tmpdir.join('missing')), kind='test') == (None, None)
+
+    tmpdir.join('bad').write('not an artifact')
+    assert load_artifact(str(tmpdir.join('bad')), kind='test') == (None, None)
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_cached_spec_uses_client_server_url(server, spec, tmpdir, lazy):
+    spec_cache = SpecCache(str(tmpdir))
+    spec.pop('host', None)
+
+    Client('http://controller-a:8080', origin_spec=spec, spec_cache=spec_cache, lazy=lazy)
+    client = Client(server.url, origin_spec=spec, spec_cache=spec_cache, lazy=lazy)
+
+    assert len(tmpdir.listdir()) == 1
+    assert client.swagger_spec.api_url == server.url + '/'
+
+    # the refs of the cached spec are resolved, and the calls are sent
+    # to this server
+    resp, ok = client.request.resource1.get_resource1(id='id-0')
+    assert ok and resp['label'] == 'item-0'
+    assert server.calls[-1].path == '/api/resource1/id-0'
@@ -0,0 +1,62 @@
+import copy
+
+from halutz.client import Client
+from halutz.class_factory import copy_schema
+
+
+def _ref_spec(spec):
+    # a Resource0 property that is a '$ref' to the Resource1 definition
+    spec['definitions']['Resource0']['properties']['owner'] = {
+        '$ref': '#/definitions/Resource1'}
+    return spec
+
+
+def _build_models(client):
+    for model_name in client.definitions:
+        client.build.model_class(model_name)
+
+    resource_cls = client.build.model_class('Resource0')
+    return resource_cls(label='item', owner={'label': 'owner', 'prop_1': 1})
+
+
+def test_copied_by_default(server, spec):
+    spec = _ref_spec(spec)
+    origin_spec = copy.deepcopy(spec)
+
+    client = Client(server.url, origin_spec=spec)
+    _build_models(client)
+
+    assert client.origin_spec is not spec
+    assert spec == origin_spec
+
+
+def test_copy_spec_false_is_shared(server, spec):
+    spec = _ref_spec(spec)
+    client = Client(server.url, origin_spec=spec, copy_spec=False)
+
+    assert client.origin_spec is spec
+    assert client.definitions is spec['definitions']
+    assert client.swagger_spec.spec_dict is spec
+
+    # the class builder does not change the shared spec; a '$ref' schema
+    # it resolves is a copy.
+    built_spec = copy.deepcopy(spec)
+    item = _build_models(client)
+    assert item.owner.label == 'owner'
+    assert spec == built_spec
+
+    with client.build.resolver.resolving('#/definitions/Resource1') as resolved:
+        assert resolved == spec['definitions']['Resource1']
+        assert resolved is not spec['definitions']['Resource1']
+
+    resp, ok = client.request.resource1.get_resource1(id='id-0')
+    assert ok and resp['label'] == 'item-0'
+
+
+def test_copy_schema():
+    schema = {'type': 'object', 'properties': {'tags': {'enum': ['a', 'b']}}}
+    copied = copy_schema(schema)
+
+    assert copied == schema
+    assert copied['properties'] is not schema['properties']
+    assert copied['properties']['tags']['enum'] is not schema['properties']['tags']['enum']
@@ -0,0 +1,81 @@
+import json
+
+import msgpack
+import pytest
+
+from halutz.client import Client
+from halutz.indexer import Indexer
+from halutz.streaming import iter_json_items, iter_msgpack_items
+
+
+BODY = {
+    'count': 3,
+    'meta': {'items': ['not', 'these'], 'text': 'a "quoted" } value'},
+    'items': [{'id': 'a', 'tags': ['x', {'y': '}]'}]}, {'id': 'bé'}, 'c', None],
+    'after': [1, 2]
+}
+
+
+def _chunks(data, size):
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('size', [1, 7, 1 << 16])
+def test_json_items(size):
+    chunks = _chunks(json.dumps(BODY).encode('utf-8'), size)
+    assert list(iter_json_items(chunks, 'items')) == BODY['items']
+
+    chunks = _chunks(json.dumps({'items': {'k1': {'v': 1}, 'k2': [2]}}).encode('utf-8'), size)
+    assert list(iter_json_items(chunks, 'items', 'object')) == [('k1', {'v': 1}), ('k2', [2])]
+
+
+def test_json_numbers_split():
+    # the numbers are split at every position across two chunks
+    numbers = [3.5, -12e3, 100, 1.25E-2, 0, True]
+    data = json.dumps({'items': numbers}).encode('utf-8')
+
+    for split in range(1, len(data)):
+        assert list(iter_json_items([data[:split], data[split:]], 'items')) == numbers
+
+
+def test_json_items_shared_keys():
+    chunks = [json.dumps({'items': [{'name': 1}, {'name': 2}]}).encode('utf-8')]
+    first, second = iter_json_items(chunks, 'items')
+    assert list(first)[0] is list(second)[0]
+
+
+def test_json_items_missing():
+    with pytest.raises(KeyError):
+        list(iter_json_items([b'{"other": []}'], 'items'))
+
+
+@pytest.mark.parametrize('size', [1, 5, 1 << 16])
+def test_msgpack_items(size):
+    chunks = _chunks(msgpack.packb(BODY, use_bin_type=True), size)
+    assert list(iter_msgpack_items(chunks, 'items')) == BODY['items']
+
+    chunks = _chunks(msgpack.packb({'items': {'k1': 1, 'k2': 2}}, use_bin_type=True), size)
+    assert list(iter_msgpack_items(chunks, 'items', 'object')) == [('k1', 1), ('k2', 2)]
+
+
+def test_request_stream(server, spec):
+    client = Client(server.url, origin_spec=spec)
+    rqst = client.request.resource1.list_resource1
+
+    items, ok = rqst.stream('items', offset=1)
+    assert ok
+    assert list(items) == server.items[1:]
+
+    error, ok = client.request.resource1.get_resource1.stream('items', id='missing')
+    assert not ok and error[0].status_code == 404
+
+
+def test_indexer_streaming(server, spec):
+    client = Client(server.url, origin_spec=spec)
+    rqst = client.request.resource1.list_resource1
+
+    streamed = Indexer(rqst, name_from='label', streaming=True).run()
+    loaded = Indexer(rqst, name_from='label').run()
+
+    assert streamed.names == loaded.names == ['item-0', 'item-1', 'item-2']
+    assert streamed.catalog == loaded.catalog
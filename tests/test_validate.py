@@ -0,0 +1,37 @@
+import pytest
+
+from halutz.client import Client
+from halutz.models import ValidationError
+
+
+def test_validate_many(server, spec):
+    client = Client(server.url, origin_spec=spec)
+    rqst = client.request.resource1.create_resource1
+
+    model = client.build.model_class('Resource1')(label='model')
+    bodies = [{'label': 'ok', 'prop_1': 1}, {'prop_1': 1}, {'label': 'x', 'prop_1': 'one'},
+              model]
+
+    invalid = rqst.validate_many(bodies)
+    assert sorted(invalid) == [1, 2]
+    assert all(isinstance(errors, list) and errors for errors in invalid.values())
+    assert rqst.validate_many(iter([{'label': 'ok'}])) == {}
+
+    # the validator is compiled once, for the body schema
+    assert rqst.body_validator is client.request.resource1.create_resource1.body_validator
+
+    with pytest.raises(RuntimeError):
+        client.request.resource1.get_resource1.validate_many([{}])
+
+
+def test_map_validate(server, spec):
+    rqst = Client(server.url, origin_spec=spec).request.resource1.create_resource1
+    param_list = [{'data': {'label': 'first'}}, {'data': {'label': 3}},
+                  {'data': {'label': 'third'}}]
+
+    results = rqst.map(param_list, validate=True)
+
+    assert [result.ok for result in results] == [True, False, True]
+    assert isinstance(results[1].error, ValidationError)
+    assert sorted(call.body for call in server.calls) == [
+        b'{"label": "first"}', b'{"label": "third"}']
@@ -0,0 +1,46 @@
+import pytest
+
+from halutz.client import Client
+from halutz.models import ValidationError
+from halutz.views import ObjectView, ArrayView
+
+
+def test_view_response(server, spec):
+    client = Client(server.url, origin_spec=spec)
+    client.model_response = 'view'
+
+    resp, ok = client.request.resource1.list_resource1()
+    assert ok and isinstance(resp, ObjectView)
+    assert resp.count == 3
+
+    # properties named as Mapping methods are read as items
+    items = resp['items']
+    assert isinstance(items, ArrayView) and len(items) == 3
+    assert items[1].label == 'item-1' and items[1]['prop_1'] == 1
+    assert items[-1].id == 'id-2'
+    assert [item.id for item in items[:2]] == ['id-0', 'id-1']
+
+    # the nested views are made once, and the data is not copied
+    assert items is resp['items']
+    assert resp.for_json()['items'][0] is items[0].for_json()
+    assert resp == resp.for_json()
+
+    with pytest.raises(AttributeError):
+        items[0].not_a_property
+
+
+def test_view_validate(server, spec):
+    client = Client(server.url, origin_spec=spec)
+    rqst = client.request.resource1.get_resource1
+    rqst.model_response = 'view'
+
+    item, ok = rqst(id='id-0')
+    assert item.validate()
+
+    item.for_json()['prop_1'] = 'not an integer'
+    with pytest.raises(ValidationError):
+        item.validate()
+
+    # the other requests of the client are not views
+    resp, ok = client.request.resource1.get_resource1(id='id-0')
+    assert type(resp) is dict